@@ -63,6 +63,8 @@ module "monitoring" {
   risk_assessment_service_blue_tg_arn = module.networking.risk_assessment_service_blue_tg_arn
   claims_processing_service_blue_tg_arn = module.networking.claims_processing_service_blue_tg_arn
   ecs_cluster_name = module.compute.ecs_cluster_name
+  scale_out_policy_arns = module.compute.scale_out_policy_arns
+  scale_in_policy_arns = module.compute.scale_in_policy_arns
   aurora_cluster_arn = module.data-storage.aurora_cluster_arn
   sagemaker_endpoint_name = module.analytics.sagemaker_endpoint_name
   waf_web_acl_name = module.security.waf_web_acl_name
@@ -95,6 +97,7 @@ module "security" {
   api_gateway_log_group_arn = var.api_gateway_log_group_arn
   alb_log_group_arn = module.monitoring.alb_log_group_arn
   dynamodb_table_arn = module.data-storage.dynamodb_table_arn
+  telematics_lease_table_arn = module.data-storage.telematics_lease_table_arn
   repositories = module.data-storage.repository_arns
   fraud_detection_engine_log_group_arn = module.monitoring.fraud_detection_engine_log_group_arn
   risk_assessment_service_log_group_arn = module.monitoring.risk_assessment_service_log_group_arn
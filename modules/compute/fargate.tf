@@ -50,7 +50,9 @@ resource "aws_ecs_task_definition" "fraud_detection_engine_task" {
             environment = [
                 {name = "DYNAMODB_TABLE", value = var.dynamodb_table_name},
                 {name = "AURORA_HOST", value = var.aurora_endpoint},
-                {name = "S3_BUCKET", value = var.insurance_bucket_id}
+                {name = "S3_BUCKET", value = var.insurance_bucket_id},
+                {name = "OTEL_TRACES_EXPORTER", value = "otlp"},
+                {name = "OTEL_EXPORTER_OTLP_ENDPOINT", value = "http://localhost:4317"}
             ]
 
             logConfiguration = {
@@ -63,13 +65,15 @@ resource "aws_ecs_task_definition" "fraud_detection_engine_task" {
             }    
         },
         {
-            name = "xray-daemon"
-            image = "amazon/aws-xray-daemon"
+            # Receives the service's OTLP spans and sends them on to X-Ray
+            name = "aws-otel-collector"
+            image = "public.ecr.aws/aws-observability/aws-otel-collector:latest"
+            command = ["--config=/etc/ecs/ecs-default-config.yaml"]
             essential = false
             portMappings = [
                 {
-                    containerPort = 2000
-                    protocol = "udp"
+                    containerPort = 4317
+                    protocol = "tcp"
                 }
             ]
             logConfiguration = {
@@ -111,7 +115,9 @@ resource "aws_ecs_task_definition" "risk_assessment_service_task" {
             environment = [
                 {name = "DYNAMODB_TABLE", value = var.dynamodb_table_name},
                 {name = "AURORA_HOST", value = var.aurora_endpoint},
-                {name = "S3_BUCKET", value = var.insurance_bucket_id}
+                {name = "S3_BUCKET", value = var.insurance_bucket_id},
+                {name = "OTEL_TRACES_EXPORTER", value = "otlp"},
+                {name = "OTEL_EXPORTER_OTLP_ENDPOINT", value = "http://localhost:4317"}
             ]
 
             logConfiguration = {
@@ -124,13 +130,15 @@ resource "aws_ecs_task_definition" "risk_assessment_service_task" {
             }    
         },
         {
-            name = "xray-daemon"
-            image = "amazon/aws-xray-daemon"
+            # Receives the service's OTLP spans and sends them on to X-Ray
+            name = "aws-otel-collector"
+            image = "public.ecr.aws/aws-observability/aws-otel-collector:latest"
+            command = ["--config=/etc/ecs/ecs-default-config.yaml"]
             essential = false
             portMappings = [
                 {
-                    containerPort = 2000
-                    protocol = "udp"
+                    containerPort = 4317
+                    protocol = "tcp"
                 }
             ]
             logConfiguration = {
@@ -170,9 +178,12 @@ resource "aws_ecs_task_definition" "claims_processing_service_task" {
             }]
 
             environment = [
+                {name = "POLICY_STORE", value = "dynamodb"},
                 {name = "DYNAMODB_TABLE", value = var.dynamodb_table_name},
                 {name = "AURORA_HOST", value = var.aurora_endpoint},
-                {name = "S3_BUCKET", value = var.insurance_bucket_id}
+                {name = "S3_BUCKET", value = var.insurance_bucket_id},
+                {name = "OTEL_TRACES_EXPORTER", value = "otlp"},
+                {name = "OTEL_EXPORTER_OTLP_ENDPOINT", value = "http://localhost:4317"}
             ]
 
             logConfiguration = {
@@ -185,13 +196,15 @@ resource "aws_ecs_task_definition" "claims_processing_service_task" {
             }    
         },
         {
-            name = "xray-daemon"
-            image = "amazon/aws-xray-daemon"
+            # Receives the service's OTLP spans and sends them on to X-Ray
+            name = "aws-otel-collector"
+            image = "public.ecr.aws/aws-observability/aws-otel-collector:latest"
+            command = ["--config=/etc/ecs/ecs-default-config.yaml"]
             essential = false
             portMappings = [
                 {
-                    containerPort = 2000
-                    protocol = "udp"
+                    containerPort = 4317
+                    protocol = "tcp"
                 }
             ]
             logConfiguration = {
@@ -234,6 +247,11 @@ resource "aws_ecs_service" "fraud_detection_engine" {
       assign_public_ip = false
     }
 
+    # Set by auto scaling after creation
+    lifecycle {
+      ignore_changes = [desired_count]
+    }
+
     tags = merge(var.base_tags, {
         Service = "fraud-detection-engine"
         Type = "ecs-service"
@@ -294,6 +312,11 @@ resource "aws_ecs_service" "claims_processing_service" {
       assign_public_ip = false
     }
 
+    # Set by auto scaling after creation
+    lifecycle {
+      ignore_changes = [desired_count]
+    }
+
     tags = merge(var.base_tags, {
         Service = "claims-processing-service"
         Type = "ecs-service"
@@ -301,3 +324,59 @@ resource "aws_ecs_service" "claims_processing_service" {
     })
 }
 
+
+# Auto Scaling for the services behind admission control, driven by the saturation alarms in the monitoring module
+resource "aws_appautoscaling_target" "service" {
+    for_each = {
+        fraud_detection_engine = aws_ecs_service.fraud_detection_engine.name
+        claims_processing_service = aws_ecs_service.claims_processing_service.name
+    }
+
+    max_capacity = 10
+    min_capacity = 1
+    resource_id = "service/${aws_ecs_cluster.insurance_cluster.name}/${each.value}"
+    scalable_dimension = "ecs:service:DesiredCount"
+    service_namespace = "ecs"
+}
+
+resource "aws_appautoscaling_policy" "service_scale_out" {
+    for_each = aws_appautoscaling_target.service
+
+    name = "${each.key}-scale-out"
+    policy_type = "StepScaling"
+    resource_id = each.value.resource_id
+    scalable_dimension = each.value.scalable_dimension
+    service_namespace = each.value.service_namespace
+
+    step_scaling_policy_configuration {
+      adjustment_type = "ChangeInCapacity"
+      cooldown = 60
+      metric_aggregation_type = "Maximum"
+
+      step_adjustment {
+        metric_interval_lower_bound = 0
+        scaling_adjustment = 2
+      }
+    }
+}
+
+resource "aws_appautoscaling_policy" "service_scale_in" {
+    for_each = aws_appautoscaling_target.service
+
+    name = "${each.key}-scale-in"
+    policy_type = "StepScaling"
+    resource_id = each.value.resource_id
+    scalable_dimension = each.value.scalable_dimension
+    service_namespace = each.value.service_namespace
+
+    step_scaling_policy_configuration {
+      adjustment_type = "ChangeInCapacity"
+      cooldown = 300
+      metric_aggregation_type = "Average"
+
+      step_adjustment {
+        metric_interval_upper_bound = 0
+        scaling_adjustment = -1
+      }
+    }
+}
@@ -50,6 +50,16 @@ output "service_names" {
  }
 }
 
+output "scale_out_policy_arns" {
+ description = "Step scaling policies that add tasks, by service"
+ value = {for service, policy in aws_appautoscaling_policy.service_scale_out : service => policy.arn}
+}
+
+output "scale_in_policy_arns" {
+ description = "Step scaling policies that remove tasks, by service"
+ value = {for service, policy in aws_appautoscaling_policy.service_scale_in : service => policy.arn}
+}
+
 # For IoT configuration
 output "iot_certificate_arn" {
  description = "ARN of IoT certificate"
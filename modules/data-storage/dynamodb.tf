@@ -74,4 +74,20 @@ resource "aws_appautoscaling_policy" "claims_write_policy" {
       }
       target_value = 70
     }
-}
\ No newline at end of file
+}
+# DynamoDB Table for the leases electing the one task per service that consumes the telematics stream
+resource "aws_dynamodb_table" "telematics_leases" {
+    name = "telematics-leases"
+    billing_mode = "PAY_PER_REQUEST"
+    hash_key = "lease_name"
+
+    attribute {
+      name = "lease_name"
+      type = "S"
+    }
+
+    tags = merge(var.base_tags, {
+        Service = "dynamo-db"
+        Type = "telematics-leases"
+    })
+}
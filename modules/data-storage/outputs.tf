@@ -82,6 +82,11 @@ output "dynamodb_table_hash_key" {
   value = aws_dynamodb_table.insurance_claims.hash_key
 }
 
+output "telematics_lease_table_arn" {
+  description = "ARN of telematics consumer lease table"
+  value = aws_dynamodb_table.telematics_leases.arn
+}
+
 # S3 
 output "insurance_bucket_arn" {
   description = "Insurance Raw Data Bucket ARN"
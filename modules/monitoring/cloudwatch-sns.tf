@@ -206,6 +206,118 @@ resource "aws_cloudwatch_metric_alarm" "service_cpu" {
     })
 }
 
+# Admission Control Saturation Alarms, published by the Fraud Detection and Claims Processing workers.
+# Shedding or a standing queue adds tasks; low use of the concurrency limit removes them.
+resource "aws_cloudwatch_metric_alarm" "service_admission_shedding" {
+    for_each = {
+        fraud_detection_engine = "fraud-detection-engine"
+        claims_processing_service = "claims-processing-service"
+    }
+
+    alarm_name = "${each.value}-admission-shedding"
+    comparison_operator = "GreaterThanThreshold"
+    evaluation_periods = 2
+    metric_name = "AdmissionShed"
+    namespace = var.admission_metrics_namespace
+    period = "60"
+    statistic = "Sum"
+    threshold = "0"
+    treat_missing_data = "notBreaching"
+    alarm_description = "Requests rejected with 429 by admission control for ${each.value}"
+
+    dimensions = {
+      ServiceName = each.value
+    }
+
+    alarm_actions = [aws_sns_topic.service_alerts.arn, var.scale_out_policy_arns[each.key]]
+    tags = merge(var.base_tags, {
+        Service = each.value
+        Type = "alarm"
+    })
+}
+
+resource "aws_cloudwatch_metric_alarm" "service_admission_queueing" {
+    for_each = {
+        fraud_detection_engine = "fraud-detection-engine"
+        claims_processing_service = "claims-processing-service"
+    }
+
+    alarm_name = "${each.value}-admission-queueing"
+    comparison_operator = "GreaterThanThreshold"
+    evaluation_periods = 3
+    metric_name = "AdmissionQueueDepth"
+    namespace = var.admission_metrics_namespace
+    period = "60"
+    statistic = "Maximum"
+    threshold = "10"
+    treat_missing_data = "notBreaching"
+    alarm_description = "Requests waiting for admission on a ${each.value} worker for 3 minutes"
+
+    dimensions = {
+      ServiceName = each.value
+    }
+
+    alarm_actions = [var.scale_out_policy_arns[each.key]]
+    tags = merge(var.base_tags, {
+        Service = each.value
+        Type = "alarm"
+    })
+}
+
+resource "aws_cloudwatch_metric_alarm" "service_admission_underused" {
+    for_each = {
+        fraud_detection_engine = "fraud-detection-engine"
+        claims_processing_service = "claims-processing-service"
+    }
+
+    alarm_name = "${each.value}-admission-underused"
+    comparison_operator = "LessThanThreshold"
+    evaluation_periods = 15
+    threshold = "20"
+    # Without reports there is nothing to say the service is idle, so don't scale in
+    treat_missing_data = "notBreaching"
+    alarm_description = "Under 20% of the ${each.value} concurrency limit in use on average for 15 minutes"
+
+    metric_query {
+        id = "utilisation"
+        expression = "100 * inflight / limit"
+        label = "Concurrency limit in use, time-averaged (%)"
+        return_data = true
+    }
+
+    metric_query {
+        id = "inflight"
+        metric {
+            metric_name = "AdmissionInflight"
+            namespace = var.admission_metrics_namespace
+            period = "60"
+            stat = "Sum"
+            dimensions = {
+              ServiceName = each.value
+            }
+        }
+    }
+
+    metric_query {
+        id = "limit"
+        metric {
+            metric_name = "AdmissionConcurrencyLimit"
+            namespace = var.admission_metrics_namespace
+            period = "60"
+            stat = "Sum"
+            dimensions = {
+              ServiceName = each.value
+            }
+        }
+    }
+
+    alarm_actions = [var.scale_in_policy_arns[each.key]]
+    tags = merge(var.base_tags, {
+        Service = each.value
+        Type = "alarm"
+    })
+}
+
 # CloudWatch Log Group for Aurora
 resource "aws_cloudwatch_log_group" "aurora" {
     name = "/aws/aurora"
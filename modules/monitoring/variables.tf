@@ -34,6 +34,22 @@ variable "ecs_cluster_name" {
   description = "ECS Cluster Name"
 }
 
+variable "scale_out_policy_arns" {
+  type = map(string)
+  description = "ECS step scaling policies that add tasks, by service"
+}
+
+variable "scale_in_policy_arns" {
+  type = map(string)
+  description = "ECS step scaling policies that remove tasks, by service"
+}
+
+variable "admission_metrics_namespace" {
+  type = string
+  description = "CloudWatch namespace the services publish admission control metrics to"
+  default = "InsurancePlatform/Admission"
+}
+
 # Data Storage
 variable "aurora_cluster_arn" {
   type = string
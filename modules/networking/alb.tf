@@ -48,7 +48,7 @@ resource "aws_lb_target_group" "fraud_detection_engine_blue_tg" {
     vpc_id = aws_vpc.main_vpc.id
     target_type = "ip"
     health_check {
-      path = "/health"
+      path = "/ready"
     }
 }
 
@@ -59,7 +59,7 @@ resource "aws_lb_target_group" "fraud_detection_engine_green_tg" {
     vpc_id = aws_vpc.main_vpc.id
     target_type = "ip"
     health_check {
-      path = "/health"
+      path = "/ready"
     }
 }
 
@@ -70,7 +70,7 @@ resource "aws_lb_target_group" "risk_assessment_service_blue_tg" {
     vpc_id = aws_vpc.main_vpc.id
     target_type = "ip"
     health_check {
-      path = "/health"
+      path = "/ready"
     }
 }
 
@@ -81,7 +81,7 @@ resource "aws_lb_target_group" "risk_assessment_service_green_tg" {
     vpc_id = aws_vpc.main_vpc.id
     target_type = "ip"
     health_check {
-      path = "/health"
+      path = "/ready"
     }
 }
 
@@ -92,7 +92,7 @@ resource "aws_lb_target_group" "claims_processing_service_blue_tg" {
     vpc_id = aws_vpc.main_vpc.id
     target_type = "ip"
     health_check {
-      path = "/health"
+      path = "/ready"
     }
 }
 
@@ -103,7 +103,7 @@ resource "aws_lb_target_group" "claims_processing_service_green_tg" {
     vpc_id = aws_vpc.main_vpc.id
     target_type = "ip"
     health_check {
-      path = "/health"
+      path = "/ready"
     }
 }
 
@@ -335,6 +335,75 @@ resource "aws_iam_policy" "fargate_task_policy" {
                     "xray:GetSamplingStatisticSummaries"
                 ]
                 Resource = "*"
+            },
+            # S3 Read Access for supporting document verification in Claims Processing
+            {
+                Effect = "Allow"
+                Action = [
+                    "s3:GetObject"
+                ]
+                Resource = "${var.insurance_bucket_arn}/*"
+            },
+            # Listing claim documents and telematics checkpoints, so reading a missing one returns 404 rather than 403
+            {
+                Effect = "Allow"
+                Action = [
+                    "s3:ListBucket"
+                ]
+                Resource = var.insurance_bucket_arn
+                Condition = {
+                    StringLike = {
+                        "s3:prefix" = ["claims/*", "telematics/*"]
+                    }
+                }
+            },
+            # CloudWatch Metrics for admission control saturation in Fraud Detection and Claims Processing
+            {
+                Effect = "Allow"
+                Action = [
+                    "cloudwatch:PutMetricData"
+                ]
+                Resource = "*"
+                Condition = {
+                    StringEquals = {
+                        "cloudwatch:namespace" = "InsurancePlatform/Admission"
+                    }
+                }
+            },
+            # S3 Write Access for the decision audit logs of all three services
+            {
+                Effect = "Allow"
+                Action = [
+                    "s3:PutObject"
+                ]
+                Resource = "${var.insurance_bucket_arn}/audit/*"
+            },
+            # S3 Write Access for the telematics feature checkpoints in Fraud Detection and Risk Assessment
+            {
+                Effect = "Allow"
+                Action = [
+                    "s3:PutObject"
+                ]
+                Resource = "${var.insurance_bucket_arn}/telematics/*"
+            },
+            # Kinesis Read Access for the telematics consumers in Fraud Detection and Risk Assessment
+            {
+                Effect = "Allow"
+                Action = [
+                    "kinesis:ListShards",
+                    "kinesis:GetShardIterator",
+                    "kinesis:GetRecords"
+                ]
+                Resource = var.kinesis_stream_arn
+            },
+            # Leases electing the one task per service that consumes the telematics stream
+            {
+                Effect = "Allow"
+                Action = [
+                    "dynamodb:PutItem",
+                    "dynamodb:DeleteItem"
+                ]
+                Resource = var.telematics_lease_table_arn
             }
         ]
     })
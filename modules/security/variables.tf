@@ -33,6 +33,11 @@ variable "dynamodb_table_arn" {
   description = "DynamoDB Table S3 Bucket ARN"
 }
 
+variable "telematics_lease_table_arn" {
+  type = string
+  description = "Telematics Lease DynamoDB Table ARN"
+}
+
 variable "sagemaker_model_artifacts_arn" {
   type = string
   description = "SageMaker Model Artifacts S3 Bucket ARN"
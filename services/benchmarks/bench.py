@@ -0,0 +1,315 @@
+"""
+Load and micro-benchmarks for the claims, fraud and risk services.
+
+    python bench.py run [--services fraud claims risk] [--modes asgi uvicorn] [--output results.json]
+    python bench.py compare baseline.json results.json [--threshold 0.1]
+
+"asgi" mode drives the app in-process through httpx's ASGI transport (no network)
+and also reports allocations per request and micro-benchmarks of the scoring
+functions. "uvicorn" mode starts the service under uvicorn on a local port and
+drives it over HTTP. Each service runs in its own subprocess because the three
+apps share module names.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+
+from generators import SyntheticData
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICES_DIR = os.path.dirname(BENCHMARKS_DIR)
+COMMON_DIR = os.path.join(SERVICES_DIR, "common")
+
+SERVICES = {
+    "fraud": {"dir": "fraud-detection-engine", "path": "/api/v1/detect", "payload": "fraud_claim"},
+    "claims": {"dir": "claims-processing-service", "path": "/api/v1/process", "payload": "process_claim"},
+    "risk": {"dir": "risk-assessment-service", "path": "/app/v1/assess", "payload": "policy"}
+}
+
+# Environment variables recorded with results, since they change what is measured
+RECORDED_ENV_PREFIXES = ("MICROBATCH_", "POLICY_", "FRAUD_", "VELOCITY_", "PROFILE", "OTEL_")
+
+# Synthetic claims reference synthetic policies, which only the fake store answers
+os.environ.setdefault("POLICY_STORE", "fake")
+# Every run starts from an empty velocity index rather than one shared through the temporary directory
+os.environ.setdefault("VELOCITY_SNAPSHOT_PATH", "")
+
+UVICORN_STARTUP_TIMEOUT = 30
+
+def payloads(service: str, count: int, seed: int) -> list:
+    data = SyntheticData(seed)
+    generate = getattr(data, SERVICES[service]["payload"])
+    return [generate(i) for i in range(count)]
+
+async def drive(client: httpx.AsyncClient, path: str, bodies: list, concurrency: int) -> dict:
+    """POST every body with at most `concurrency` requests in flight and summarise the latencies"""
+    latencies = np.zeros(len(bodies))
+    status_codes = {}
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < len(bodies):
+            i = next_index
+            next_index += 1
+            start_time = time.perf_counter()
+            response = await client.post(path, json = bodies[i])
+            latencies[i] = time.perf_counter() - start_time
+            status_codes[response.status_code] = status_codes.get(response.status_code, 0) + 1
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start_time
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "requests": len(bodies),
+        "concurrency": concurrency,
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(bodies) / elapsed,
+        "latency_ms": {
+            "p50": p50, "p95": p95, "p99": p99,
+            "mean": latencies.mean() * 1000, "max": latencies.max() * 1000
+        },
+        "status_codes": {str(code): count for code, count in sorted(status_codes.items())},
+        "errors": sum(count for code, count in status_codes.items() if code >= 500)
+    }
+
+async def measure_allocations(client: httpx.AsyncClient, path: str, bodies: list) -> dict:
+    """
+    Sequential pass under tracemalloc: peak bytes allocated while serving each
+    request, and bytes still held once the pass finished, per request.
+    """
+    peaks = []
+    tracemalloc.start()
+    start_bytes = tracemalloc.get_traced_memory()[0]
+    for body in bodies:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        await client.post(path, json = body)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    retained_bytes = tracemalloc.get_traced_memory()[0] - start_bytes
+    tracemalloc.stop()
+    return {
+        "requests": len(bodies),
+        "peak_bytes_per_request_p50": float(np.percentile(peaks, 50)),
+        "peak_bytes_per_request_mean": float(np.mean(peaks)),
+        "retained_bytes_per_request": retained_bytes / len(bodies)
+    }
+
+def time_call(fn, repeat: int = 5) -> dict:
+    """Nanoseconds per call of fn, best and median of `repeat` timeit runs"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    runs = [t / number * 1e9 for t in timer.repeat(repeat = repeat, number = number)]
+    return {"ns_per_call_min": min(runs), "ns_per_call_median": float(np.median(runs)), "calls_per_run": number}
+
+def micro_benchmarks(service: str, app, bodies: list) -> dict:
+    """Pure functions of each service, timed on a representative synthetic input"""
+    body = bodies[0]
+    if service == "fraud":
+        claim = app.ClaimData(**body)
+        batch = [app.ClaimData(**b) for b in bodies[:256]]
+        rule_set = app.FRAUD_RULES.current()
+        features = app.claim_features(claim)
+        functions = {
+            "claim_features": lambda: app.claim_features(claim),
+            "rule_set.evaluate": lambda: rule_set.evaluate(features),
+            "score_claim": lambda: app.score_claim(claim),
+            "score_claims_vectorized[256]": lambda: app.score_claims_vectorized(batch)
+        }
+    elif service == "claims":
+        claim = app.Claim(**body)
+        functions = {
+            "validate_claim_amount": lambda: app.validate_claim_amount(claim),
+            "verify_documents": lambda: app.verify_documents(claim.supporting_documents, claim.claim_type),
+            "get_required_documents": lambda: app.get_required_documents(claim.claim_type)
+        }
+    else:
+        policy = app.PolicyData(**body)
+        batch = [app.PolicyData(**b) for b in bodies[:256]]
+        scores = [60.0, 30.0, 20.0, 50.0, 20.0]
+        functions = {
+            "calculate_age_risk": lambda: app.calculate_age_risk(policy.customer_age, policy.policy_type),
+            "assess_occupation_risk": lambda: app.assess_occupation_risk(policy.occupation, policy.industry),
+            "assess_credit_risk": lambda: app.assess_credit_risk(policy.credit_score or 700),
+            "calculated_weighted_risk": lambda: app.calculated_weighted_risk(scores),
+            "determine_risk_level": lambda: app.determine_risk_level(42.5),
+            "score_policy": lambda: app.score_policy(policy),
+            "score_policies[256]": lambda: app.score_policies(batch)
+        }
+    return {name: time_call(fn) for name, fn in functions.items()}
+
+async def run_asgi(service: str, args) -> dict:
+    """In-process benchmark of one service; runs inside the service's directory"""
+    import app
+
+    spec = SERVICES[service]
+    bodies = payloads(service, args.warmup + args.requests, args.seed)
+    transport = httpx.ASGITransport(app = app.app)
+    async with app.app.router.lifespan_context(app.app):
+        async with httpx.AsyncClient(transport = transport, base_url = "http://benchmark") as client:
+            await drive(client, spec["path"], bodies[:args.warmup], args.concurrency)
+            load = await drive(client, spec["path"], bodies[args.warmup:], args.concurrency)
+            load["allocations"] = await measure_allocations(client, spec["path"], bodies[:args.alloc_requests])
+    return {"load": load, "micro": micro_benchmarks(service, app, bodies)}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def wait_until_healthy(client: httpx.AsyncClient, process: subprocess.Popen):
+    deadline = time.monotonic() + UVICORN_STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("uvicorn did not become healthy in time")
+
+async def run_uvicorn(service: str, args) -> dict:
+    """Benchmark one service served by a local uvicorn over HTTP"""
+    spec = SERVICES[service]
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd = os.path.join(SERVICES_DIR, spec["dir"]), env = dict(os.environ, PYTHONPATH = COMMON_DIR))
+    try:
+        bodies = payloads(service, args.warmup + args.requests, args.seed)
+        limits = httpx.Limits(max_connections = args.concurrency, max_keepalive_connections = args.concurrency)
+        async with httpx.AsyncClient(base_url = f"http://127.0.0.1:{port}", limits = limits, timeout = 30) as client:
+            await wait_until_healthy(client, process)
+            await drive(client, spec["path"], bodies[:args.warmup], args.concurrency)
+            load = await drive(client, spec["path"], bodies[args.warmup:], args.concurrency)
+        load["workers"] = args.workers
+        return {"load": load}
+    finally:
+        process.terminate()
+        process.wait(timeout = 10)
+
+def run_service_in_subprocess(service: str, args) -> dict:
+    """Re-run this script as an asgi worker with the service's directory on the path"""
+    service_dir = os.path.join(SERVICES_DIR, SERVICES[service]["dir"])
+    command = [sys.executable, os.path.abspath(__file__), "asgi-worker", service,
+               "--requests", str(args.requests), "--warmup", str(args.warmup),
+               "--concurrency", str(args.concurrency), "--alloc-requests", str(args.alloc_requests),
+               "--seed", str(args.seed)]
+    env = dict(os.environ, PYTHONPATH = os.pathsep.join([service_dir, COMMON_DIR, BENCHMARKS_DIR]))
+    completed = subprocess.run(command, cwd = service_dir, env = env, capture_output = True, text = True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{service} asgi benchmark failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def git_revision() -> dict:
+    def git(*command):
+        return subprocess.run(["git", *command], cwd = SERVICES_DIR, capture_output = True, text = True).stdout.strip()
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--", "."))}
+
+def run(args):
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git": git_revision(),
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()},
+        "env": {k: v for k, v in sorted(os.environ.items()) if k.startswith(RECORDED_ENV_PREFIXES)},
+        "settings": {"requests": args.requests, "warmup": args.warmup, "concurrency": args.concurrency,
+                     "seed": args.seed, "workers": args.workers},
+        "results": []
+    }
+    for service in args.services:
+        for mode in args.modes:
+            print(f"Benchmarking {service} ({mode})...", file = sys.stderr)
+            if mode == "asgi":
+                result = run_service_in_subprocess(service, args)
+            else:
+                result = asyncio.run(run_uvicorn(service, args))
+            report["results"].append({"service": service, "mode": mode, **result})
+            load = result["load"]
+            print(f"  {load['throughput_rps']:.0f} req/s, p50 {load['latency_ms']['p50']:.2f}ms, "
+                  f"p99 {load['latency_ms']['p99']:.2f}ms, {load['errors']} errors", file = sys.stderr)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent = 2)
+    print(f"Wrote {args.output}", file = sys.stderr)
+
+def compare(args) -> int:
+    """Print changes between two reports; exit non-zero when something regressed past the threshold"""
+    with open(args.baseline) as f:
+        baseline = {(r["service"], r["mode"]): r for r in json.load(f)["results"]}
+    with open(args.current) as f:
+        current = {(r["service"], r["mode"]): r for r in json.load(f)["results"]}
+
+    regressions = 0
+    def report(name: str, old: float, new: float, higher_is_better: bool):
+        nonlocal regressions
+        change = (new - old) / old if old else 0.0
+        regressed = (-change if higher_is_better else change) > args.threshold
+        regressions += regressed
+        print(f"{name:<55} {old:>14.2f} {new:>14.2f} {change:>+8.1%}{'  REGRESSION' if regressed else ''}")
+
+    for key in sorted(baseline.keys() & current.keys()):
+        old, new = baseline[key], current[key]
+        prefix = f"{key[0]}/{key[1]}"
+        report(f"{prefix} throughput_rps", old["load"]["throughput_rps"], new["load"]["throughput_rps"], True)
+        for percentile in ("p50", "p95", "p99"):
+            report(f"{prefix} latency_ms {percentile}", old["load"]["latency_ms"][percentile],
+                   new["load"]["latency_ms"][percentile], False)
+        for name in sorted(old.get("micro", {}).keys() & new.get("micro", {}).keys()):
+            report(f"{prefix} {name} ns", old["micro"][name]["ns_per_call_min"], new["micro"][name]["ns_per_call_min"], False)
+    return 1 if regressions else 0
+
+def add_load_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--requests", type = int, default = 2000, help = "Measured requests per service")
+    parser.add_argument("--warmup", type = int, default = 200, help = "Unmeasured requests sent first")
+    parser.add_argument("--concurrency", type = int, default = 32, help = "Requests in flight")
+    parser.add_argument("--alloc-requests", type = int, default = 200, help = "Requests in the allocation pass")
+    parser.add_argument("--seed", type = int, default = 42, help = "Synthetic data seed")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description = "Benchmark the insurance services")
+    commands = parser.add_subparsers(dest = "command", required = True)
+
+    run_parser = commands.add_parser("run", help = "Run benchmarks and write a JSON report")
+    run_parser.add_argument("--services", nargs = "+", choices = list(SERVICES), default = list(SERVICES))
+    run_parser.add_argument("--modes", nargs = "+", choices = ["asgi", "uvicorn"], default = ["asgi"])
+    run_parser.add_argument("--workers", type = int, default = 1, help = "uvicorn workers in uvicorn mode")
+    run_parser.add_argument("--output", default = "benchmark-results.json")
+    add_load_arguments(run_parser)
+
+    compare_parser = commands.add_parser("compare", help = "Compare two JSON reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type = float, default = 0.1, help = "Relative change counted as a regression")
+
+    worker_parser = commands.add_parser("asgi-worker", help = argparse.SUPPRESS)
+    worker_parser.add_argument("service", choices = list(SERVICES))
+    add_load_arguments(worker_parser)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    elif args.command == "compare":
+        return compare(args)
+    else:
+        print(json.dumps(asyncio.run(run_asgi(args.service, args))))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
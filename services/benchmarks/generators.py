@@ -0,0 +1,116 @@
+import random
+from datetime import datetime, timedelta
+
+# Claim mix and lognormal claim amounts (median, sigma) per claim type
+CLAIM_TYPES = {"auto": 0.45, "health": 0.30, "property": 0.20, "life": 0.05}
+CLAIM_AMOUNTS = {
+    "auto": (4000, 0.9),
+    "health": (2500, 1.1),
+    "property": (12000, 1.0),
+    "life": (45000, 0.6)
+}
+
+# Documents usually submitted per claim type; some claims arrive with one missing
+CLAIM_DOCUMENTS = {
+    "health": ["medical_report", "prescription", "receipts", "claim_form", "test_results"],
+    "auto": ["police_report", "repair_estimate", "photos", "claim_form", "witness_statements"],
+    "property": ["damage_photos", "value_estimate", "ownership_proof", "claim_form", "repair_quotes"],
+    "life": ["death_certificate", "beneficiary_id", "claim_form", "medical_records"]
+}
+MISSING_DOCUMENT_RATE = 0.1
+
+# Claim locations, with a small share from high risk locations
+LOCATIONS = {"GB": 0.55, "US": 0.2, "DE": 0.1, "FR": 0.1, "NK": 0.02, "IR": 0.02, "CU": 0.01}
+
+# Workforce mix, including occupations the risk tables don't know
+OCCUPATIONS = {
+    "software_engineer": 0.14, "teacher": 0.12, "nurse": 0.12, "accountant": 0.08, "receptionist": 0.06,
+    "chef": 0.06, "factory_worker": 0.08, "construction_worker": 0.08, "cab_driver": 0.05,
+    "police_officer": 0.04, "firefighter": 0.03, "pilot": 0.02, "miner": 0.02,
+    "professional_athlete": 0.01, "retail_assistant": 0.06, "student": 0.03
+}
+INDUSTRIES = {None: 0.7, "technology": 0.08, "healthcare": 0.08, "education": 0.06, "oil_and_gas": 0.04, "mining": 0.04}
+
+# Credit score bands (inclusive ranges) and the share of customers in each
+CREDIT_BANDS = {(300, 579): 0.16, (580, 669): 0.20, (670, 739): 0.25, (740, 799): 0.25, (800, 850): 0.14}
+MISSING_CREDIT_RATE = 0.05
+
+POLICY_TYPES = {"auto": 0.35, "health": 0.25, "property": 0.25, "life": 0.15}
+MEDICAL_CONDITIONS = ["diabetes", "hypertension", "asthma", "heart_disease"]
+
+def weighted_choice(rng: random.Random, weights: dict):
+    return rng.choices(list(weights), weights = list(weights.values()))[0]
+
+class SyntheticData:
+    """
+    Seeded generator of request payloads for the three services. The same seed
+    always produces the same payloads, so runs on different commits are comparable.
+    """
+    def __init__(self, seed: int = 42):
+        self.rng = random.Random(seed)
+        self.now = datetime(2024, 6, 1)
+
+    def claim_amount(self, claim_type: str) -> float:
+        median, sigma = CLAIM_AMOUNTS[claim_type]
+        return round(self.rng.lognormvariate(0, sigma) * median, 2)
+
+    def documents(self, claim_type: str) -> list:
+        documents = list(CLAIM_DOCUMENTS[claim_type])
+        if self.rng.random() < MISSING_DOCUMENT_RATE:
+            documents.pop(self.rng.randrange(len(documents)))
+        return documents
+
+    def credit_score(self):
+        if self.rng.random() < MISSING_CREDIT_RATE:
+            return None
+        low, high = weighted_choice(self.rng, CREDIT_BANDS)
+        return self.rng.randint(low, high)
+
+    def fraud_claim(self, i: int) -> dict:
+        """Payload for the fraud engine's /api/v1/detect"""
+        claim_type = weighted_choice(self.rng, CLAIM_TYPES)
+        policy_start = self.now - timedelta(days = int(self.rng.expovariate(1 / 400)))
+        claim_date = min(policy_start + timedelta(days = int(self.rng.expovariate(1 / 200))), self.now)
+        return {
+            "claim_id": f"CLM-{i:08d}",
+            "policy_id": f"POL-{self.rng.randrange(100000):06d}",
+            "claim_amount": self.claim_amount(claim_type),
+            "claim_type": claim_type,
+            "claimant_age": max(18, min(95, int(self.rng.gauss(44, 15)))),
+            "claim_date": claim_date.isoformat(),
+            "previous_claims": min(int(self.rng.expovariate(1 / 1.2)), 12),
+            "policy_start_date": policy_start.isoformat(),
+            "location": weighted_choice(self.rng, LOCATIONS),
+            "device_ip": f"10.{self.rng.randrange(256)}.{self.rng.randrange(256)}.{self.rng.randrange(256)}"
+        }
+
+    def process_claim(self, i: int) -> dict:
+        """Payload for the claims service's /api/v1/process"""
+        claim_type = weighted_choice(self.rng, CLAIM_TYPES)
+        incident_date = self.now - timedelta(days = self.rng.randrange(1, 90))
+        return {
+            "claim_id": f"CLM-{i:08d}",
+            "policy_id": f"POL-{self.rng.randrange(100000):06d}",
+            "claim_amount": self.claim_amount(claim_type),
+            "incident_date": incident_date.isoformat(),
+            "claim_type": claim_type,
+            "description": f"Synthetic {claim_type} claim",
+            "supporting_documents": self.documents(claim_type),
+            "claimant_info": {"name": f"Claimant {i}", "contact": f"claimant{i}@example.com"}
+        }
+
+    def policy(self, i: int) -> dict:
+        """Payload for the risk service's /app/v1/assess"""
+        policy_type = weighted_choice(self.rng, POLICY_TYPES)
+        conditions = [c for c in MEDICAL_CONDITIONS if self.rng.random() < 0.08]
+        return {
+            "policy_id": f"POL-{i:06d}",
+            "customer_id": f"CUS-{self.rng.randrange(1000000):07d}",
+            "policy_type": policy_type,
+            "coverage_amount": round(self.rng.lognormvariate(0, 0.8) * 150000, 2),
+            "customer_age": max(18, min(90, int(self.rng.gauss(45, 14)))),
+            "occupation": weighted_choice(self.rng, OCCUPATIONS),
+            "medical_history": conditions or None,
+            "credit_score": self.credit_score(),
+            "industry": weighted_choice(self.rng, INDUSTRIES)
+        }
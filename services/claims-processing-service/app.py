@@ -1,25 +1,141 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
-from datetime import datetime, timezone, timedelta
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from datetime import datetime, timezone
+from contextlib import nullcontext
+import asyncio
+import json
 import logging
 import time
 from prometheus_client import Counter, Histogram
-from typing import List, Optional
-import numpy as np
+from typing import Dict, FrozenSet, List, NamedTuple, Optional
+import os
+
+from insurance_common.admission import (FAST_LANE, STANDARD_LANE, AdmissionRejected, create_admission_controller,
+                                        create_saturation_reporter)
+from insurance_common.audit_log import create_audit_log, warm_parquet_writer
+from insurance_common.executor import ExecutorOverloaded, ScoringExecutor
+from insurance_common.fastcodec import FastDecodeRoute, decode_record, fast_decode, fast_record
+from insurance_common.microbatch import BatcherOverloaded, create_batcher
+from insurance_common.startup import StartupTracker
+from insurance_common.telemetry import init_tracing, mark_worker_dead, metrics_response, observe
+
+from decision_cache import DecisionCache, InMemoryDecisionStore, content_hash
+from document_store import S3DocumentStore, create_document_verifier
+from instrumentation import PROFILER_ENABLED, profiler, stage
+from policy_cache import PolicyCache
+from policy_repository import DynamoDBPolicyStore, create_policy_repository
 
 # Metrics
 CLAIMS_PROCESSED = Counter('claims_processed_total', 'Total claims processed')
 PROCESSING_TIME = Histogram('claim_processing_seconds', 'Time spent processing claims')
 CLAIM_AMOUNTS = Histogram('claim_amounts', 'Distribution of claim amounts')
+BULK_LINES = Counter('claims_bulk_lines_total', 'NDJSON lines received by bulk processing', ['outcome'])
+
+# Claims up to this amount with complete documentation are approved automatically
+AUTO_APPROVE_MAX_AMOUNT = 5000
+
+# Bulk NDJSON processing limits
+BULK_CHUNK_SIZE = 100  # Decisions per streamed response chunk
+BULK_MAX_LINE_BYTES = 1024 * 1024  # Reject single claims larger than this
+
+# Document requirements config, reloaded when the file changes
+DOCUMENT_REQUIREMENTS_PATH = os.getenv("DOCUMENT_REQUIREMENTS_PATH")
+DOCUMENT_RELOAD_INTERVAL = float(os.getenv("DOCUMENT_RELOAD_INTERVAL", "30"))
+_document_config_mtime = None
+_document_config_checked_at = 0.0
+DOCUMENT_REQUIREMENTS_VERSION = None  # Content hash of the loaded requirements
+
+# Decisions for resubmitted claims are reused while unchanged; bump
+# DECISION_RULES_VERSION when decision logic changes so shared stores are not reused
+DECISION_RULES_VERSION = os.getenv("DECISION_RULES_VERSION", "1")
+
+DEFAULT_DOCUMENT_REQUIREMENTS = {
+    "health": {
+        "required": ["medical_report", "prescription", "receipts", "claim_form"],
+        "optional": ["specialist_report", "test_results"]
+    },
+    "auto": {
+        "required": ["police_report", "repair_estimate", "photos", "claim_form"],
+        "optional": ["witness_statements", "third_party_details"]
+    },
+    "property": {
+        "required": ["damage_photos", "value_estimate", "ownership_proof", "claim_form"],
+        "optional": ["police_report", "repair_quotes"]
+    },
+    "life": {
+        "required": ["death_certificate", "beneficiary_id", "claim_form", "medical_records"],
+        "optional": ["police_report", "coroner_report"]
+    }
+}
+
+class DocumentRequirements(NamedTuple):
+    required: FrozenSet[str]
+    optional: FrozenSet[str]
+    required_order: tuple
+
+NO_DOCUMENT_REQUIREMENTS = DocumentRequirements(frozenset(), frozenset(), ())
 
 app = FastAPI(title = "Claims Processing Service",
              description = "Automated claims processing and evaluation",
              version = "1.0.0")
+# Endpoints marked @fast_decode read JSON and msgpack bodies into slotted records
+app.router.route_class = FastDecodeRoute
+
+init_tracing(app, "claims-processing-service")
+STARTUP = StartupTracker("claims-processing")
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness Endpoint for Load Balancer Routing, 503 until the decision path is warm
+    """
+    report = STARTUP.report()
+    if not STARTUP.ready:
+        raise HTTPException(status_code=503, detail=report)
+    return report
+
+@app.get("/metrics")
+async def metrics(request: Request):
+    """
+    Prometheus Metrics Endpoint
+    """
+    return metrics_response(request)
+
+@app.middleware("http")
+async def profile_sampled_requests(request: Request, call_next):
+    # Opt-in: sample a percentage of requests into the stack profiler
+    if not PROFILER_ENABLED or not profiler.should_sample():
+        return await call_next(request)
+    profiler.start()
+    try:
+        return await call_next(request)
+    finally:
+        profiler.stop()
+
+@app.get("/debug/profile", response_class = PlainTextResponse, tags = ["Diagnostics"])
+async def dump_profile(reset: bool = False):
+    """
+    Collapsed stacks from sampled requests, ready for flamegraph.pl or speedscope
+    """
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+    stacks = profiler.dump()
+    if reset:
+        profiler.reset()
+    return stacks
+
+@app.on_event("shutdown")
+async def close_policy_repository():
+    await POLICY_CACHE.backend.close()
+    if DOCUMENT_VERIFIER is not None:
+        await DOCUMENT_VERIFIER.close()
+    mark_worker_dead()
+
 class Claim(BaseModel):
     claim_id: str = Field(..., description = "Unique identifier for the claim")
     policy_id: str = Field(..., description = "Associated policy ID")
@@ -30,52 +146,349 @@ class Claim(BaseModel):
     supporting_documents: List[str] = Field(..., description = "List of supporting document IDs")
     claimant_info: dict = Field(..., description = "Claimant information")
 
+ClaimRecord = fast_record(Claim)
+
 @app.post("/api/v1/process", response_model = dict, tags = ["Claims Processing"])
+@fast_decode(ClaimRecord)
 async def process_claim(claim:Claim):
     """
     Process and evaluate insurance claims with automated decision making
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     CLAIMS_PROCESSED.inc()
     CLAIM_AMOUNTS.observe(claim.claim_amount)
 
     try:
-        # Validation checks
-        validation_results = validate_claim(claim)
-        if not validation_results["valid"]:
-            return {
-                "status": "rejected",
-                "reasons": validation_results["reasons"]
-            }
+        async with admission(claim_lane(claim)):
+            decision = await submit_claim(claim)
 
-        # Process claim
-        assessment_result = assess_claim(claim)
-        processing_time = time.time() - start_time
-        PROCESSING_TIME.observe(processing_time)
+        if "reasons" in decision:
+            # Failed validation checks
+            return decision
+
+        processing_time = time.perf_counter() - start_time
+        observe(PROCESSING_TIME, processing_time)
 
         return {
+            "claim_id": decision["claim_id"],
+            "status": decision["status"],
+            "approved_amount": decision["approved_amount"],
+            "processing_notes": decision["processing_notes"],
+            "processing_time": processing_time,
+            "next_steps": decision["next_steps"]
+        }
+
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except BatcherOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        logging.error(f"Error processing claim: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Concurrent process_claim requests are bounded by a latency-driven limit, and claims
+# assess_claim would likely auto-approve are admitted ahead of the rest
+ADMISSION = create_admission_controller("claims_process")
+SATURATION_REPORTER = create_saturation_reporter(ADMISSION, "claims-processing-service")
+
+def admission(lane: str):
+    """Hold an admission slot in lane, or nothing when admission control is disabled"""
+    return ADMISSION.admit(lane) if ADMISSION is not None else nullcontext()
+
+def claim_lane(claim: Claim) -> str:
+    """The fast lane for claims within the auto-approval amount with every required document"""
+    if claim.claim_amount > AUTO_APPROVE_MAX_AMOUNT:
+        return STANDARD_LANE
+    if not verify_documents(claim.supporting_documents, claim.claim_type)["complete"]:
+        return STANDARD_LANE
+    return FAST_LANE
+
+@app.on_event("startup")
+async def start_saturation_reporter():
+    if SATURATION_REPORTER is not None:
+        await SATURATION_REPORTER.start()
+
+@app.on_event("shutdown")
+async def stop_saturation_reporter():
+    if SATURATION_REPORTER is not None:
+        await SATURATION_REPORTER.stop()
+
+# Every claim decision is recorded for compliance when AUDIT_STORE is set; decisions
+# reused from DECISION_CACHE were recorded when first made
+AUDIT_LOG = create_audit_log("claims-processing", {
+    "claim_id": "string",
+    "policy_id": "string",
+    "claim_type": "string",
+    "claim_amount": "float64",
+    "status": "string",
+    "approved_amount": "float64",
+    "processing_notes": "string",
+    "reasons": "list<string>",
+    "decision_version": "string"
+})
+
+@app.on_event("startup")
+async def start_audit_log():
+    if AUDIT_LOG is not None:
+        await AUDIT_LOG.start()
+
+@app.on_event("shutdown")
+async def flush_audit_log():
+    if AUDIT_LOG is not None:
+        await AUDIT_LOG.stop()
+
+async def submit_claim(claim: Claim) -> dict:
+    """Decide one claim, micro-batched with concurrent requests when enabled"""
+    if PROCESS_BATCHER is not None:
+        return await PROCESS_BATCHER.submit(claim)
+    return (await decide_claims([claim]))[0]
+
+def claim_content_hash(claim: Claim) -> str:
+    """
+    Hash of the decoded claim's fields, so formatting differences in resubmissions
+    don't matter; the same for Claim models and fast-decoded records.
+    """
+    return content_hash({name: getattr(claim, name) for name in Claim.model_fields})
+
+def decision_version() -> str:
+    """Version of everything a decision depends on besides the claim and policy"""
+    maybe_reload_document_requirements()
+    return f"{DECISION_RULES_VERSION}:{DOCUMENT_REQUIREMENTS_VERSION}"
+
+def claim_decision_version(claim: Claim, policies: Optional[Dict[str, Optional[dict]]]) -> str:
+    """
+    decision_version plus a hash of the claim's policy record from the batched
+    read, so a cached decision is reused only while the policy it was made
+    against is unchanged.
+    """
+    if policies is None:
+        # Decisions made while the policy store is down are kept apart from later ones
+        policy_hash = "unavailable"
+    else:
+        policy = policies.get(claim.policy_id)
+        policy_hash = content_hash(policy) if policy is not None else "none"
+    return f"{decision_version()}:{policy_hash}"
+
+async def decide_cached_claim(claim: Claim, policies: Optional[Dict[str, Optional[dict]]]) -> dict:
+    """Reuse the stored decision for a resubmitted, unchanged claim, or decide it"""
+    return await DECISION_CACHE.get_or_decide(
+        claim.claim_id, claim_content_hash(claim), claim_decision_version(claim, policies), lambda: decide_claim(claim))
+
+async def decide_claim(claim: Claim) -> dict:
+    """Run validation checks and assessment for one claim"""
+    with stage("validate"):
+        validation_results = await validate_claim(claim)
+    if not validation_results["valid"]:
+        decision = {
+            "status": "rejected",
+            "reasons": validation_results["reasons"]
+        }
+    else:
+        with stage("assess"):
+            assessment_result = await assess_claim(claim)
+        decision = {
             "claim_id": claim.claim_id,
             "status": assessment_result["status"],
             "approved_amount": assessment_result["approved_amount"],
             "processing_notes": assessment_result["notes"],
-            "processing_time": processing_time,
             "next_steps": assessment_result["next_steps"]
         }
 
+    if AUDIT_LOG is not None:
+        await AUDIT_LOG.record(
+            claim_id = claim.claim_id,
+            policy_id = claim.policy_id,
+            claim_type = claim.claim_type,
+            claim_amount = claim.claim_amount,
+            status = decision["status"],
+            approved_amount = decision.get("approved_amount", 0),
+            processing_notes = decision.get("processing_notes"),
+            reasons = decision.get("reasons"),
+            decision_version = f"{DECISION_RULES_VERSION}:{DOCUMENT_REQUIREMENTS_VERSION}"
+        )
+    return decision
+
+async def decide_claims(claims: List[Claim]) -> List[dict]:
+    """
+    Decide a batch of claims, reading all their policies in one batched lookup.
+    Retried submissions of an unchanged claim reuse the stored decision.
+    """
+    policies = await prefetch_policies(claims)
+    return list(await asyncio.gather(*(decide_batched_claim(claim, policies) for claim in claims)))
+
+async def decide_batched_claim(claim: Claim, policies: Optional[Dict[str, Optional[dict]]]) -> dict:
+    """
+    decide_cached_claim, returning an error decision instead of raising, so one
+    claim's failure doesn't fail the batch and have the batcher decide, and
+    audit, the others again.
+    """
+    try:
+        return await decide_cached_claim(claim, policies)
     except Exception as e:
-        logging.error(f"Error processing claim: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logging.error(f"Error deciding claim {claim.claim_id}: {str(e)}")
+        return {
+            "claim_id": claim.claim_id,
+            "status": "error",
+            "approved_amount": 0,
+            "processing_notes": "System error during processing",
+            "next_steps": ["Claim flagged for manual review"]
+        }
 
-def validate_claim(claim: Claim) -> dict:
+async def prefetch_policies(claims: List[Claim]) -> Optional[Dict[str, Optional[dict]]]:
+    """
+    Read the claims' policies in one lookup, warming the policy cache so per-claim
+    checks don't each hit the store. Returns None when the lookup fails.
+    """
+    try:
+        with stage("policy_prefetch"):
+            return await POLICY_CACHE.get_many(claim.policy_id for claim in claims)
+    except Exception as e:
+        # Per-claim lookups will retry and surface the error themselves
+        logging.error(f"Error prefetching policies for {len(claims)} claims: {str(e)}")
+        return None
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    Streaming response whose generator reads the request body while responding.
+    The default disconnect listener would consume body messages from the same receive
+    channel, so disconnects are left to Request.stream() which raises ClientDisconnect.
+    """
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+@app.post("/api/v1/process/bulk", tags = ["Claims Processing"])
+async def process_claims_bulk(request: Request):
+    """
+    Process an NDJSON stream of claims, streaming back one NDJSON decision per input line
+    """
+    return BodyStreamingResponse(stream_bulk_decisions(request), media_type = "application/x-ndjson")
+
+async def stream_bulk_decisions(request: Request):
+    """Decode claims line by line as the body arrives and yield decisions in chunks"""
+    buffer = b""
+    line_number = 0
+    skipping_line = False
+    decisions = []
+
+    async for chunk in request.stream():
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        pending = []
+        for line in lines:
+            line_number += 1
+            if skipping_line:
+                # Tail of an oversized line that was already reported
+                skipping_line = False
+                continue
+            pending.append((line_number, line))
+        decisions.extend(await process_bulk_lines(pending))
+
+        if len(buffer) > BULK_MAX_LINE_BYTES:
+            if not skipping_line:
+                decisions.append(bulk_line_error(line_number + 1, "Line exceeds maximum size"))
+            skipping_line = True
+            buffer = b""
+
+        if len(decisions) >= BULK_CHUNK_SIZE:
+            yield "".join(decisions)
+            decisions = []
+
+    if buffer.strip() and not skipping_line:
+        line_number += 1
+        decisions.extend(await process_bulk_lines([(line_number, buffer)]))
+
+    if decisions:
+        yield "".join(decisions)
+
+@app.post("/admin/document-requirements/reload", tags = ["Administration"])
+async def reload_document_requirements_endpoint():
+    """
+    Force this worker to reload document requirements from the config file
+    """
+    try:
+        claim_types = reload_document_requirements()
+    except (OSError, ValueError) as e:
+        logging.error(f"Error reloading document requirements: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    # Decisions made under the previous requirements would be skipped as stale anyway
+    await DECISION_CACHE.invalidate()
+    return {"status": "reloaded", "claim_types": claim_types}
+
+async def process_bulk_lines(lines: List[tuple]) -> List[str]:
+    """Decode (line_number, line) pairs and evaluate them, reading their policies in one batch"""
+    try:
+        decoded = await SCORING_EXECUTOR.run(decode_bulk_lines, lines)
+    except ExecutorOverloaded:
+        # The response is already streaming, so decode here rather than fail it
+        decoded = decode_bulk_lines(lines)
+
+    claims = [claim for _, claim, _ in decoded if claim is not None]
+    policies = await prefetch_policies(claims) if claims else None
+
+    # Results go out in line order, errors included
+    decisions = []
+    for line_number, claim, error in decoded:
+        if claim is None:
+            decisions.append(bulk_line_error(line_number, error))
+        else:
+            decisions.append(await process_bulk_claim(claim, line_number, policies))
+    return decisions
+
+def decode_bulk_lines(lines: List[tuple]) -> List[tuple]:
+    """Parse and validate NDJSON lines into (line_number, claim, None) or (line_number, None, error)"""
+    decoded = []
+    for line_number, line in lines:
+        if not line.strip():
+            continue
+        if len(line) > BULK_MAX_LINE_BYTES:
+            # A whole oversized line can arrive within one chunk, never reaching the buffer check
+            decoded.append((line_number, None, "Line exceeds maximum size"))
+            continue
+        try:
+            decoded.append((line_number, decode_record(ClaimRecord, Claim, line), None))
+        except ValidationError as e:
+            decoded.append((line_number, None, f"Invalid claim: {e.error_count()} validation error(s)"))
+    return decoded
+
+async def process_bulk_claim(claim: Claim, line_number: int, policies: Optional[Dict[str, Optional[dict]]]) -> str:
+    """Run validate_claim and assess_claim on one decoded claim, returning the encoded decision"""
+    CLAIMS_PROCESSED.inc()
+    CLAIM_AMOUNTS.observe(claim.claim_amount)
+
+    try:
+        # Bulk claims share the concurrency limit with single ones, behind the fast lane
+        async with admission(STANDARD_LANE):
+            decided = await decide_cached_claim(claim, policies)
+        decision = {"line": line_number, "claim_id": claim.claim_id, **decided}
+    except AdmissionRejected as e:
+        # The response is already streaming, so the line reports it rather than the status code
+        return bulk_line_error(line_number, str(e))
+    except Exception as e:
+        logging.error(f"Error processing claim {claim.claim_id} on line {line_number}: {str(e)}")
+        return bulk_line_error(line_number, str(e))
+
+    BULK_LINES.labels(outcome = "processed").inc()
+    return json.dumps(decision) + "\n"
+
+def bulk_line_error(line_number: int, error: str) -> str:
+    """Encode an error record for a line that could not be processed"""
+    BULK_LINES.labels(outcome = "error").inc()
+    return json.dumps({"line": line_number, "status": "error", "error": error}) + "\n"
+
+async def validate_claim(claim: Claim) -> dict:
     """Validate claim data and supporting documents"""
     reasons = []
     
     # Check if policy is active
-    if not is_policy_active(claim.policy_id):
+    if not await is_policy_active(claim.policy_id):
         reasons.append("Policy not active")
 
-    # Validate incident date
-    if claim.incident_date > datetime.now():
+    # Validate incident date; dates without an offset are taken as UTC
+    incident_date = claim.incident_date
+    if incident_date.tzinfo is None:
+        incident_date = incident_date.replace(tzinfo = timezone.utc)
+    if incident_date > datetime.now(timezone.utc):
         reasons.append("Invalid incident date")
 
     # Check supporting documents
@@ -87,11 +500,12 @@ def validate_claim(claim: Claim) -> dict:
         "reasons": reasons
     }
 
-def assess_claim(claim: Claim) -> dict:
+async def assess_claim(claim: Claim) -> dict:
     """Assess claim and make processing decision"""
     try:
         # Policy coverage verification
-        policy_coverage = verify_policy_coverage(claim.policy_id, claim.claim_amount)
+        with stage("coverage"):
+            policy_coverage = await verify_policy_coverage(claim.policy_id, claim.claim_amount)
         if not policy_coverage["covered"]:
             return {
                 "status": "rejected",
@@ -101,7 +515,8 @@ def assess_claim(claim: Claim) -> dict:
             }
 
         # Amount validation
-        amount_validation = validate_claim_amount(claim)
+        with stage("amount"):
+            amount_validation = validate_claim_amount(claim)
         if not amount_validation["valid"]:
             return {
                 "status": "under_review",
@@ -111,7 +526,8 @@ def assess_claim(claim: Claim) -> dict:
             }
 
         # Document verification
-        doc_verification = verify_documents(claim.supporting_documents, claim.claim_type)
+        with stage("documents"):
+            doc_verification = verify_documents(claim.supporting_documents, claim.claim_type)
         if not doc_verification["complete"]:
             return {
                 "status": "pending",
@@ -120,8 +536,31 @@ def assess_claim(claim: Claim) -> dict:
                 "next_steps": doc_verification["missing_documents"]
             }
 
+        # Stored documents: present with an accepted size and type, and not reused from another claim
+        if DOCUMENT_VERIFIER is not None:
+            with stage("document_store"):
+                stored = await DOCUMENT_VERIFIER.verify(claim.claim_id, claim.supporting_documents)
+            if stored["missing"] or stored["invalid"]:
+                return {
+                    "status": "pending",
+                    "approved_amount": 0,
+                    "notes": "Supporting documents not found or invalid",
+                    "next_steps": [f"Upload {doc}" for doc in stored["missing"]] +
+                                  [f"Replace {doc}: {reason}" for doc, reason in stored["invalid"].items()]
+                }
+            if stored["duplicates"]:
+                return {
+                    "status": "in_review",
+                    "approved_amount": 0,
+                    "notes": "Duplicate supporting documents: " + ", ".join(
+                        f"{doc} matches claim {other}" for doc, other in stored["duplicates"].items()),
+                    "next_steps": ["Fraud investigation", "Adjuster assignment"]
+                }
+
         # Automated approval rules
-        if claim.claim_amount <= 5000 and doc_verification["complete"]:
+        with stage("auto_approval"):
+            auto_approve = claim.claim_amount <= AUTO_APPROVE_MAX_AMOUNT and doc_verification["complete"]
+        if auto_approve:
             return {
                 "status": "approved",
                 "approved_amount": claim.claim_amount,
@@ -150,12 +589,17 @@ def assess_claim(claim: Claim) -> dict:
             "next_steps": ["Claim flagged for manual review"]
         }
 
-def verify_policy_coverage(policy_id: str, claim_amount: float) -> dict:
+async def verify_policy_coverage(policy_id: str, claim_amount: float) -> dict:
     """Verify if policy covers the claim amount"""
-    # In real implementation, would check policy database
+    with stage("policy_lookup"):
+        policy = await POLICY_CACHE.get(policy_id)
+    if policy is None:
+        return {"covered": False, "reason": "Policy not found"}
+
+    coverage_limit = policy.get("coverage_limit", 50000)
     return {
-        "covered": True if claim_amount <= 50000 else False,
-        "reason": "Amount exceeds policy limit" if claim_amount > 50000 else "Within policy limits"
+        "covered": True if claim_amount <= coverage_limit else False,
+        "reason": "Amount exceeds policy limit" if claim_amount > coverage_limit else "Within policy limits"
     }
 
 def validate_claim_amount(claim: Claim) -> dict:
@@ -185,27 +629,27 @@ def validate_claim_amount(claim: Claim) -> dict:
 
 def verify_documents(documents: List[str], claim_type: str) -> dict:
     """Verify all required documents are provided"""
-    required_docs = get_required_documents(claim_type)
-    missing = [doc for doc in required_docs if doc not in documents]
-    
+    requirements = get_document_requirements(claim_type)
+    provided = frozenset(documents)
+    missing = requirements.required - provided
+
     return {
-        "complete": len(missing) == 0,
-        "missing_documents": missing if missing else []
+        "complete": not missing,
+        # Keep the configured order so next steps read consistently
+        "missing_documents": [doc for doc in requirements.required_order if doc in missing] if missing else [],
+        "optional_documents": sorted(requirements.optional & provided)
     }
 
-def is_policy_active(policy_id: str) -> bool:
+async def is_policy_active(policy_id: str) -> bool:
    """
    Check if insurance policy is active and valid.
    """
    try:
-       # In real implementation, this would check policy database
-       policy_status = {
-           "payment_status": "current",  # current, overdue, cancelled
-           "expiry_date": datetime.now(timezone.utc) + timedelta(days=180),
-           "policy_restrictions": [],
-           "last_payment_date": datetime.now(timezone.utc) - timedelta(days=15)
-       }
-       
+       with stage("policy_lookup"):
+           policy_status = await POLICY_CACHE.get(policy_id)
+       if policy_status is None:
+           return False
+
        return all([
            policy_status["payment_status"] == "current",
            policy_status["expiry_date"] > datetime.now(timezone.utc),
@@ -216,59 +660,146 @@ def is_policy_active(policy_id: str) -> bool:
        logging.error(f"Error checking policy {policy_id}: {str(e)}")
        return False
 
+# Shared by is_policy_active and verify_policy_coverage
+POLICY_CACHE = PolicyCache(
+   create_policy_repository(),
+   max_size = int(os.getenv("POLICY_CACHE_MAX_SIZE", "10000")),
+   ttl = float(os.getenv("POLICY_CACHE_TTL", "60")),
+   negative_ttl = float(os.getenv("POLICY_CACHE_NEGATIVE_TTL", "10"))
+)
+
+# Decisions by claim_id, reused when a claim is resubmitted unchanged under the same rules and policy record
+DECISION_CACHE = DecisionCache(
+   max_size = int(os.getenv("DECISION_CACHE_MAX_SIZE", "10000")),
+   ttl = float(os.getenv("DECISION_CACHE_TTL", "300")),
+   store = InMemoryDecisionStore() if os.getenv("DECISION_STORE") == "memory" else None,
+   # Pending claims are waiting on documents, which can arrive without the claim changing
+   uncached_statuses = ("error", "pending")
+)
+
+# Supporting documents checked against the document bucket when DOCUMENT_STORE is set
+DOCUMENT_VERIFIER = create_document_verifier()
+
+# CPU-bound bulk decoding runs here so the event loop stays free for requests and health checks
+SCORING_EXECUTOR = ScoringExecutor("claims")
+
+@app.on_event("startup")
+async def start_scoring_executor():
+    await SCORING_EXECUTOR.start()
+
+@app.on_event("shutdown")
+async def stop_scoring_executor():
+    SCORING_EXECUTOR.shutdown()
+
+# Concurrent process_claim requests are decided together with one policy lookup
+PROCESS_BATCHER = create_batcher("claims_process", decide_claims)
+
 def get_required_documents(claim_type: str) -> int:
    """
    Return minimum required documents for claim type.
    """
-   document_requirements = {
-       "health": {
-           "required": [
-               "medical_report",
-               "prescription",
-               "receipts",
-               "claim_form"
-           ],
-           "optional": [
-               "specialist_report",
-               "test_results"
-           ]
-       },
-       "auto": {
-           "required": [
-               "police_report",
-               "repair_estimate",
-               "photos",
-               "claim_form"
-           ],
-           "optional": [
-               "witness_statements",
-               "third_party_details"
-           ]
-       },
-       "property": {
-           "required": [
-               "damage_photos",
-               "value_estimate",
-               "ownership_proof",
-               "claim_form"
-           ],
-           "optional": [
-               "police_report",
-               "repair_quotes"
-           ]
-       },
-       "life": {
-           "required": [
-               "death_certificate",
-               "beneficiary_id",
-               "claim_form",
-               "medical_records"
-           ],
-           "optional": [
-               "police_report",
-               "coroner_report"
-           ]
-       }
-   }
-   
-   return len(document_requirements.get(claim_type, {}).get("required", []))
\ No newline at end of file
+   return len(get_document_requirements(claim_type).required)
+
+def get_document_requirements(claim_type: str) -> DocumentRequirements:
+   """
+   Return the precompiled document requirements for a claim type.
+   """
+   maybe_reload_document_requirements()
+   return DOCUMENT_INDEX.get(claim_type, NO_DOCUMENT_REQUIREMENTS)
+
+def compile_document_requirements(requirements: dict) -> Dict[str, DocumentRequirements]:
+   """
+   Compile a {claim_type: {"required": [...], "optional": [...]}} mapping into frozenset lookups.
+   Raises ValueError for a mapping of any other shape.
+   """
+   if not isinstance(requirements, dict):
+       raise ValueError("Document requirements must map claim types to their documents")
+   index = {}
+   for claim_type, documents in requirements.items():
+       if not isinstance(documents, dict):
+           raise ValueError(f"Document requirements for {claim_type} must be an object")
+       for kind in ("required", "optional"):
+           names = documents.get(kind, [])
+           if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+               raise ValueError(f"{kind} documents for {claim_type} must be a list of document names")
+       required_order = tuple(dict.fromkeys(documents.get("required", [])))
+       index[claim_type] = DocumentRequirements(
+           required = frozenset(required_order),
+           optional = frozenset(documents.get("optional", [])),
+           required_order = required_order
+       )
+   return index
+
+def reload_document_requirements(path: Optional[str] = None) -> int:
+   """
+   Reload document requirements from the config file, swapping the index atomically.
+   Falls back to the built-in defaults when no config file is configured.
+   """
+   global DOCUMENT_INDEX, DOCUMENT_REQUIREMENTS_VERSION, _document_config_mtime
+
+   path = path or DOCUMENT_REQUIREMENTS_PATH
+   if path and os.path.exists(path):
+       mtime = os.path.getmtime(path)
+       with open(path) as f:
+           requirements = json.load(f)
+       index = compile_document_requirements(requirements)
+       _document_config_mtime = mtime
+   else:
+       requirements = DEFAULT_DOCUMENT_REQUIREMENTS
+       index = compile_document_requirements(requirements)
+
+   DOCUMENT_INDEX = index
+   DOCUMENT_REQUIREMENTS_VERSION = content_hash(requirements)
+   return len(index)
+
+def maybe_reload_document_requirements():
+   """
+   Pick up config file changes made while running, checking at most once per interval.
+   """
+   global _document_config_checked_at
+
+   if not DOCUMENT_REQUIREMENTS_PATH:
+       return
+   now = time.monotonic()
+   if now - _document_config_checked_at < DOCUMENT_RELOAD_INTERVAL:
+       return
+   _document_config_checked_at = now
+
+   try:
+       if os.path.getmtime(DOCUMENT_REQUIREMENTS_PATH) != _document_config_mtime:
+           reload_document_requirements()
+   except (OSError, ValueError) as e:
+       # Keep serving the current index if the new file is missing or malformed
+       logging.error(f"Error reloading document requirements: {str(e)}")
+
+DOCUMENT_INDEX = {}
+reload_document_requirements()
+
+def preload_policy_store_client():
+    """Import the DynamoDB client libraries the policy store would otherwise import on its first connection"""
+    if isinstance(POLICY_CACHE.backend.store, DynamoDBPolicyStore):
+        import aiobotocore.session
+
+def preload_document_store_client():
+    """Import the S3 client libraries the document store would otherwise import on its first lookup"""
+    if DOCUMENT_VERIFIER is not None and isinstance(DOCUMENT_VERIFIER.store, S3DocumentStore):
+        import aiobotocore.config
+        import aiobotocore.session
+
+def warm_decision_path():
+    """Decode and check a synthetic claim once so the first request doesn't pay first-call costs"""
+    line = json.dumps({
+        "claim_id": "warmup", "policy_id": "warmup", "claim_amount": 1000.0,
+        "incident_date": datetime.now().isoformat(), "claim_type": "auto", "description": "warmup",
+        "supporting_documents": ["claim_form"], "claimant_info": {}
+    })
+    _, claim, _ = decode_bulk_lines([(1, line.encode())])[0]
+    validate_claim_amount(claim)
+    verify_documents(claim.supporting_documents, claim.claim_type)
+
+STARTUP.step("policy_store_client", preload_policy_store_client)
+STARTUP.step("document_store_client", preload_document_store_client)
+if AUDIT_LOG is not None:
+    STARTUP.step("audit_writer", warm_parquet_writer, preload = False)
+STARTUP.step("decision_path", warm_decision_path, preload = False)
+STARTUP.finish_imports(app)
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+from singleflight import LeaderCancelled, SingleFlight
+
+# Metrics
+DECISION_CACHE_REQUESTS = Counter('decision_cache_requests_total', 'Claim decision cache lookups by result', ['result'])
+DECISION_CACHE_EVICTIONS = Counter('decision_cache_evictions_total', 'Claim decision cache evictions by reason', ['reason'])
+DECISION_CACHE_SIZE = Gauge('decision_cache_entries', 'Claim decisions currently cached', multiprocess_mode = 'livesum')
+
+def content_hash(payload: dict) -> str:
+    """Canonical hash of a claim payload: key order and whitespace don't matter"""
+    canonical = json.dumps(payload, sort_keys = True, separators = (",", ":"), default = str)
+    return hashlib.blake2b(canonical.encode(), digest_size = 16).hexdigest()
+
+class DecisionStore:
+    """
+    Decision store shared between workers and tasks, keyed by claim_id. Entries are
+    JSON-serializable dicts with content_hash, version, decision and expires_at
+    (epoch seconds).
+    """
+    async def get(self, claim_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def put(self, claim_id: str, entry: dict):
+        raise NotImplementedError
+
+    async def delete(self, claim_id: str):
+        raise NotImplementedError
+
+class InMemoryDecisionStore(DecisionStore):
+    """
+    Dict-backed decision store for tests and local development.
+    """
+    def __init__(self):
+        self.entries: Dict[str, dict] = {}
+
+    async def get(self, claim_id: str) -> Optional[dict]:
+        entry = self.entries.get(claim_id)
+        if entry is not None and entry["expires_at"] <= time.time():
+            del self.entries[claim_id]
+            return None
+        return entry
+
+    async def put(self, claim_id: str, entry: dict):
+        self.entries[claim_id] = entry
+
+    async def delete(self, claim_id: str):
+        self.entries.pop(claim_id, None)
+
+class DecisionCache:
+    """
+    Bounded LRU cache of claim decisions, one entry per claim_id, with TTL. An
+    entry is reused only when the resubmitted claim has the same content hash and
+    was decided under the current rules version; otherwise the claim is decided
+    again and the entry replaced. Concurrent submissions of the same claim share
+    one decision. The optional shared store lets workers reuse each other's
+    decisions; its failures fall back to deciding the claim. Decisions with a
+    status in uncached_statuses ("error" by default) are never cached so a retry
+    gets a fresh attempt.
+    """
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0, store: Optional[DecisionStore] = None,
+                 uncached_statuses: tuple = ("error",)):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.store = store
+        self.uncached_statuses = frozenset(uncached_statuses)
+        self._entries = OrderedDict()  # claim_id -> (expires_at, content_hash, version, decision)
+        self._inflight = SingleFlight()
+
+    async def get_or_decide(self, claim_id: str, claim_hash: str, version: str,
+                            decide: Callable[[], Awaitable[dict]]) -> dict:
+        """Return the cached decision for this claim content and rules version, or decide and cache it"""
+        if self.ttl <= 0:
+            return await decide()
+
+        key = (claim_id, claim_hash, version)
+        while True:
+            decision, result = self._lookup(claim_id, claim_hash, version)
+            if decision is not None:
+                DECISION_CACHE_REQUESTS.labels(result = result).inc()
+                return decision
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            DECISION_CACHE_REQUESTS.labels(result = "coalesced").inc()
+            try:
+                return await self._inflight.wait(inflight)
+            except LeaderCancelled:
+                # The deciding request was cancelled; look again and decide it if nobody has
+                continue
+
+        with self._inflight.lead([key]) as flight:
+            decision = await self._lookup_shared(claim_id, claim_hash, version)
+            if decision is not None:
+                result = "shared_hit"
+            DECISION_CACHE_REQUESTS.labels(result = result).inc()
+            if decision is None:
+                decision = await decide()
+                if decision.get("status") not in self.uncached_statuses:
+                    await self.put(claim_id, claim_hash, version, decision)
+            flight.resolve(key, decision)
+        return decision
+
+    def _lookup(self, claim_id: str, claim_hash: str, version: str) -> Tuple[Optional[dict], str]:
+        """(decision or None, lookup result for metrics) from the local cache"""
+        entry = self._entries.get(claim_id)
+        if entry is None:
+            return None, "miss"
+        expires_at, cached_hash, cached_version, decision = entry
+        if expires_at <= time.monotonic():
+            self._remove(claim_id, "expired")
+            return None, "miss"
+        if cached_version != version:
+            self._remove(claim_id, "rules_changed")
+            return None, "stale"
+        if cached_hash != claim_hash:
+            return None, "changed"
+        self._entries.move_to_end(claim_id)
+        return decision, "hit"
+
+    async def _lookup_shared(self, claim_id: str, claim_hash: str, version: str) -> Optional[dict]:
+        if self.store is None:
+            return None
+        try:
+            entry = await self.store.get(claim_id)
+        except Exception as e:
+            logging.error(f"Error reading decision store for claim {claim_id}: {str(e)}")
+            return None
+        if entry is None or entry["content_hash"] != claim_hash or entry["version"] != version:
+            return None
+        remaining = entry["expires_at"] - time.time()
+        if remaining <= 0:
+            return None
+        self._store_local(claim_id, claim_hash, version, entry["decision"], remaining)
+        return entry["decision"]
+
+    async def put(self, claim_id: str, claim_hash: str, version: str, decision: dict):
+        self._store_local(claim_id, claim_hash, version, decision, self.ttl)
+        if self.store is None:
+            return
+        entry = {"content_hash": claim_hash, "version": version, "decision": decision,
+                 "expires_at": time.time() + self.ttl}
+        try:
+            await self.store.put(claim_id, entry)
+        except Exception as e:
+            logging.error(f"Error writing decision store for claim {claim_id}: {str(e)}")
+
+    def _store_local(self, claim_id: str, claim_hash: str, version: str, decision: dict, ttl: float):
+        self._entries[claim_id] = (time.monotonic() + ttl, claim_hash, version, decision)
+        self._entries.move_to_end(claim_id)
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._remove(oldest, "lru")
+        DECISION_CACHE_SIZE.set(len(self._entries))
+
+    async def invalidate(self, claim_id: Optional[str] = None):
+        """Drop one claim's decision, or every local decision when no claim_id is given"""
+        if claim_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(claim_id, None)
+            if self.store is not None:
+                try:
+                    await self.store.delete(claim_id)
+                except Exception as e:
+                    logging.error(f"Error deleting claim {claim_id} from decision store: {str(e)}")
+        DECISION_CACHE_SIZE.set(len(self._entries))
+
+    def _remove(self, claim_id: str, reason: str):
+        if self._entries.pop(claim_id, None) is not None:
+            DECISION_CACHE_EVICTIONS.labels(reason = reason).inc()
+        DECISION_CACHE_SIZE.set(len(self._entries))
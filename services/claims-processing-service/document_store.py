@@ -0,0 +1,286 @@
+import asyncio
+import base64
+import hashlib
+import logging
+import mimetypes
+import os
+import random
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from singleflight import LeaderCancelled, SingleFlight
+
+# Metrics
+DOCUMENT_CHECKS = Counter('document_checks_total', 'Supporting documents checked against the document store', ['result'])
+DOCUMENT_HEAD_CACHE = Counter('document_head_cache_requests_total', 'Document metadata cache lookups by result', ['result'])
+DOCUMENT_HEAD_CACHE_SIZE = Gauge('document_head_cache_entries', 'Document metadata records currently cached',
+                                 multiprocess_mode = 'livesum')
+DOCUMENT_STORE_ERRORS = Counter('document_store_errors_total', 'Document store metadata requests that failed', ['reason'])
+DOCUMENT_STORE_LATENCY = Histogram('document_store_request_seconds', 'Latency of document store metadata requests')
+DOCUMENT_VERIFY_TIME = Histogram('document_verification_seconds', 'Time spent verifying all documents of a claim')
+
+DOCUMENT_MAX_BYTES = int(os.getenv("DOCUMENT_MAX_BYTES", str(25 * 1024 * 1024)))
+DOCUMENT_ALLOWED_TYPES = frozenset(os.getenv(
+    "DOCUMENT_ALLOWED_TYPES", "application/pdf,image/jpeg,image/png,image/heic,image/tiff").split(","))
+# Object key of a claim's document; supporting_documents holds IDs such as "police_report"
+DOCUMENT_KEY_TEMPLATE = os.getenv("DOCUMENT_KEY_TEMPLATE", "claims/{claim_id}/{document_id}")
+
+class DocumentAccessDenied(Exception):
+    """The document store refused to read a document"""
+
+class DocumentInfo(NamedTuple):
+    size: int
+    content_type: str
+    content_hash: Optional[str]  # "sha256:<hex>", or "etag:<etag>" when the store holds no checksum
+
+class S3DocumentStore:
+    """
+    Document metadata from an S3 bucket with HeadObject. One aiobotocore client is
+    shared by all requests; its connection pool holds pool_size keep-alive
+    connections. The content hash is the object's SHA-256 checksum, or a sha256
+    user metadata value, falling back to the ETag.
+    """
+    def __init__(self, bucket: str, region_name: Optional[str] = None, pool_size: int = 20):
+        self.bucket = bucket
+        self.region_name = region_name
+        self.pool_size = pool_size
+        self._client = None
+        self._context = None
+        self._lock = asyncio.Lock()
+
+    async def _get_client(self):
+        async with self._lock:
+            if self._client is None:
+                from aiobotocore.config import AioConfig
+                from aiobotocore.session import get_session
+
+                self._context = get_session().create_client(
+                    "s3", region_name = self.region_name, config = AioConfig(max_pool_connections = self.pool_size))
+                self._client = await self._context.__aenter__()
+        return self._client
+
+    async def head(self, key: str) -> Optional[DocumentInfo]:
+        client = self._client or await self._get_client()
+        try:
+            response = await client.head_object(Bucket = self.bucket, Key = key, ChecksumMode = "ENABLED")
+        except client.exceptions.ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if code in ("404", "NoSuchKey", "NotFound"):
+                return None
+            if code in ("403", "AccessDenied", "Forbidden"):
+                # A broken role or bucket policy, not a missing upload: the claim goes to
+                # manual review rather than waiting on documents that may already be there
+                DOCUMENT_STORE_ERRORS.labels(reason = "access_denied").inc()
+                raise DocumentAccessDenied(f"Access denied reading document {key} from {self.bucket}") from e
+            DOCUMENT_STORE_ERRORS.labels(reason = "other").inc()
+            raise
+
+        if response.get("ChecksumSHA256") and "-" not in response["ChecksumSHA256"]:
+            content_hash = f"sha256:{base64.b64decode(response['ChecksumSHA256']).hex()}"
+        elif response.get("Metadata", {}).get("sha256"):
+            content_hash = f"sha256:{response['Metadata']['sha256'].lower()}"
+        elif response.get("ETag"):
+            content_hash = "etag:" + response["ETag"].strip('"')
+        else:
+            content_hash = None
+        return DocumentInfo(response["ContentLength"], response.get("ContentType", ""), content_hash)
+
+    async def close(self):
+        if self._context is not None:
+            await self._context.__aexit__(None, None, None)
+            self._client = None
+
+class LocalDocumentStore:
+    """
+    Local stand-in for the document bucket: object keys are paths under root. The
+    content type is guessed from the file name and the hash computed from the
+    file. Latency injection simulates a network round trip per request.
+    """
+    def __init__(self, root: str, latency: float = 0.0, jitter: float = 0.0):
+        self.root = root
+        self.latency = latency
+        self.jitter = jitter
+        self.request_count = 0
+
+    async def head(self, key: str) -> Optional[DocumentInfo]:
+        self.request_count += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        return await asyncio.to_thread(self._head, os.path.join(self.root, key))
+
+    def _head(self, path: str) -> Optional[DocumentInfo]:
+        try:
+            size = os.path.getsize(path)
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+        except (FileNotFoundError, IsADirectoryError):
+            return None
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        return DocumentInfo(size, content_type, f"sha256:{digest.hexdigest()}")
+
+    async def close(self):
+        pass
+
+class DocumentVerifier:
+    """
+    Confirms that a claim's supporting documents exist in the document store with
+    an accepted size and type, and flags documents whose content was already
+    submitted, on another claim or twice on the same one.
+
+    All documents of a claim are looked up concurrently, with at most
+    max_concurrency store requests in flight per worker. Metadata is cached with
+    TTL in LRU order, concurrent lookups of the same key share one request, and
+    missing documents are cached briefly so an upload soon shows up. Content
+    hashes seen on earlier claims are remembered per worker, bounded by max_hashes.
+    """
+    def __init__(self, store, max_size: int = 50000, ttl: float = 300.0, negative_ttl: float = 10.0,
+                 max_concurrency: int = 20, max_hashes: int = 100000):
+        self.store = store
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_hashes = max_hashes
+        self._entries = OrderedDict()  # key -> (expires_at, DocumentInfo or None)
+        self._inflight = SingleFlight()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._hash_claims = OrderedDict()  # content_hash -> claim_id first seen with it
+
+    async def verify(self, claim_id: str, document_ids: List[str]) -> dict:
+        """
+        Check every document of a claim: returns the missing IDs, invalid IDs with
+        the reason, duplicate IDs with the claim their content was first seen on,
+        and each found document's content hash.
+        """
+        start_time = time.perf_counter()
+        document_ids = list(dict.fromkeys(document_ids))
+        infos = await asyncio.gather(*(
+            self.head(DOCUMENT_KEY_TEMPLATE.format(claim_id = claim_id, document_id = document_id))
+            for document_id in document_ids))
+
+        missing, invalid, duplicates, hashes = [], {}, {}, {}
+        for document_id, info in zip(document_ids, infos):
+            if info is None:
+                missing.append(document_id)
+                DOCUMENT_CHECKS.labels(result = "missing").inc()
+                continue
+            reason = document_problem(info)
+            if reason is not None:
+                invalid[document_id] = reason
+                DOCUMENT_CHECKS.labels(result = "invalid").inc()
+                continue
+            if info.content_hash is not None:
+                first_claim = self._hash_claims.get(info.content_hash)
+                if info.content_hash in hashes.values():
+                    duplicates[document_id] = claim_id
+                elif first_claim is not None and first_claim != claim_id:
+                    duplicates[document_id] = first_claim
+                hashes[document_id] = info.content_hash
+            DOCUMENT_CHECKS.labels(result = "duplicate" if document_id in duplicates else "verified").inc()
+
+        self._remember_hashes(claim_id, hashes.values())
+        DOCUMENT_VERIFY_TIME.observe(time.perf_counter() - start_time)
+        return {"missing": missing, "invalid": invalid, "duplicates": duplicates, "hashes": hashes}
+
+    def _remember_hashes(self, claim_id: str, content_hashes):
+        for content_hash in content_hashes:
+            if content_hash in self._hash_claims:
+                self._hash_claims.move_to_end(content_hash)
+            else:
+                self._hash_claims[content_hash] = claim_id
+        while len(self._hash_claims) > self.max_hashes:
+            self._hash_claims.popitem(last = False)
+
+    async def head(self, key: str) -> Optional[DocumentInfo]:
+        """Document metadata, or None when the key doesn't exist; store errors are raised and not cached"""
+        while True:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, info = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    DOCUMENT_HEAD_CACHE.labels(result = "hit" if info is not None else "negative_hit").inc()
+                    return info
+                del self._entries[key]
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            DOCUMENT_HEAD_CACHE.labels(result = "coalesced").inc()
+            try:
+                return await self._inflight.wait(inflight)
+            except LeaderCancelled:
+                # The request looking it up was cancelled; look again and request it if nobody has
+                continue
+
+        DOCUMENT_HEAD_CACHE.labels(result = "miss").inc()
+        with self._inflight.lead([key]) as flight:
+            async with self._semaphore:
+                start_time = time.perf_counter()
+                info = await self.store.head(key)
+                DOCUMENT_STORE_LATENCY.observe(time.perf_counter() - start_time)
+            self._put(key, info)
+            flight.resolve(key, info)
+        return info
+
+    def _put(self, key: str, info: Optional[DocumentInfo]):
+        ttl = self.ttl if info is not None else self.negative_ttl
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, info)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last = False)
+        DOCUMENT_HEAD_CACHE_SIZE.set(len(self._entries))
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop one key, or every key when none is given"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+        DOCUMENT_HEAD_CACHE_SIZE.set(len(self._entries))
+
+    async def close(self):
+        await self.store.close()
+
+def document_problem(info: DocumentInfo) -> Optional[str]:
+    """Why a stored document can't support a claim, or None if it can"""
+    if info.size <= 0:
+        return "Document is empty"
+    if info.size > DOCUMENT_MAX_BYTES:
+        return "Document exceeds maximum size"
+    if info.content_type.split(";", 1)[0].strip().lower() not in DOCUMENT_ALLOWED_TYPES:
+        return f"Unsupported document type {info.content_type or 'unknown'}"
+    return None
+
+def create_document_verifier() -> Optional[DocumentVerifier]:
+    """Build the verifier selected by DOCUMENT_STORE (s3 or local), or None when documents aren't checked"""
+    store_type = os.getenv("DOCUMENT_STORE", "")
+    pool_size = int(os.getenv("DOCUMENT_STORE_POOL_SIZE", "20"))
+
+    if not store_type:
+        return None
+    if store_type == "s3":
+        store = S3DocumentStore(os.environ["S3_BUCKET"], region_name = os.getenv("AWS_REGION"), pool_size = pool_size)
+    elif store_type == "local":
+        store = LocalDocumentStore(
+            os.getenv("DOCUMENT_STORE_ROOT", "documents"),
+            latency = float(os.getenv("DOCUMENT_STORE_LATENCY_MS", "0")) / 1000,
+            jitter = float(os.getenv("DOCUMENT_STORE_JITTER_MS", "0")) / 1000
+        )
+    else:
+        raise ValueError(f"Unknown DOCUMENT_STORE {store_type}")
+
+    logging.info(f"Verifying supporting documents against the {store_type} document store")
+    return DocumentVerifier(
+        store,
+        max_size = int(os.getenv("DOCUMENT_HEAD_CACHE_MAX_SIZE", "50000")),
+        ttl = float(os.getenv("DOCUMENT_HEAD_CACHE_TTL", "300")),
+        negative_ttl = float(os.getenv("DOCUMENT_HEAD_NEGATIVE_TTL", "10")),
+        max_concurrency = pool_size
+    )
@@ -0,0 +1,105 @@
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+
+from opentelemetry import trace
+from prometheus_client import Histogram
+
+from insurance_common.telemetry import observe
+
+# Metrics
+STAGE_LATENCY = Histogram('claim_stage_seconds', 'Latency of claims pipeline stages', ['stage'],
+                          buckets = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1))
+
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "claims-processing-service")
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.01"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+
+tracer = trace.get_tracer(SERVICE_NAME)
+
+# Labelled histogram per stage, resolved once instead of on every observation
+_stage_histograms = {}
+
+@contextmanager
+def stage(name: str):
+    """Time a pipeline stage with perf_counter and record it as a span"""
+    histogram = _stage_histograms.get(name)
+    if histogram is None:
+        histogram = _stage_histograms[name] = STAGE_LATENCY.labels(stage = name)
+    start_time = time.perf_counter()
+    with tracer.start_as_current_span(name):
+        try:
+            yield
+        finally:
+            observe(histogram, time.perf_counter() - start_time)
+
+class SamplingProfiler:
+    """
+    Samples the event loop thread's stack while a sampled request is in flight and
+    aggregates the samples as collapsed stacks ("frame;frame;frame count"), the
+    input format of flamegraph.pl and speedscope. Requests share the event loop,
+    so a sample shows whatever the loop was running, including other requests.
+    """
+    def __init__(self, sample_rate: float = PROFILE_SAMPLE_RATE, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.stacks = StackCounter()
+        self._active = 0
+        self._thread_id = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._sampler = None
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self):
+        """Mark a sampled request as started on the calling (event loop) thread"""
+        with self._lock:
+            self._thread_id = threading.get_ident()
+            self._active += 1
+            if self._sampler is None:
+                self._sampler = threading.Thread(target = self._run, name = "sampling-profiler", daemon = True)
+                self._sampler.start()
+            self._wake.set()
+
+    def stop(self):
+        with self._lock:
+            self._active -= 1
+            if self._active == 0:
+                self._wake.clear()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                stack = collapse_stack(frame)
+                with self._lock:
+                    self.stacks[stack] += 1
+            time.sleep(self.interval)
+
+    def dump(self) -> str:
+        with self._lock:
+            stacks = self.stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+
+def collapse_stack(frame) -> str:
+    """Render a frame and its callers root-first as semicolon-separated function names"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+profiler = SamplingProfiler()
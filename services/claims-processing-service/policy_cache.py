@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from prometheus_client import Counter, Gauge
+
+from singleflight import LeaderCancelled, SingleFlight
+
+# Metrics
+POLICY_CACHE_REQUESTS = Counter('policy_cache_requests_total', 'Policy cache lookups by result', ['result'])
+POLICY_CACHE_EVICTIONS = Counter('policy_cache_evictions_total', 'Policy cache evictions by reason', ['reason'])
+POLICY_CACHE_SIZE = Gauge('policy_cache_entries', 'Policy records currently cached', multiprocess_mode = 'livesum')
+
+class PolicyBackend:
+    """
+    Source of policy state records. Returns None when the policy does not exist.
+    """
+    async def fetch(self, policy_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def fetch_many(self, policy_ids: Iterable[str]) -> Dict[str, dict]:
+        """Fetch several policies, omitting those that don't exist"""
+        policy_ids = list(policy_ids)
+        records = await asyncio.gather(*(self.fetch(policy_id) for policy_id in policy_ids))
+        return {policy_id: record for policy_id, record in zip(policy_ids, records) if record is not None}
+
+class InMemoryPolicyBackend(PolicyBackend):
+    """
+    Dict-backed policy store for tests and local development.
+    """
+    def __init__(self, policies: Optional[Dict[str, dict]] = None):
+        self.policies = dict(policies or {})
+        self.fetch_count = 0
+
+    async def fetch(self, policy_id: str) -> Optional[dict]:
+        self.fetch_count += 1
+        return self.policies.get(policy_id)
+
+class PolicyCache:
+    """
+    Bounded LRU cache of policy records with per-entry TTL, negative caching
+    and coalescing of concurrent lookups for the same policy_id.
+    """
+    def __init__(self, backend: PolicyBackend, max_size: int = 10000,
+                 ttl: float = 60.0, negative_ttl: float = 10.0):
+        self.backend = backend
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()  # policy_id -> (expires_at, record or None)
+        self._inflight = SingleFlight()
+
+    async def get(self, policy_id: str) -> Optional[dict]:
+        """Return the policy record, fetching it from the backend on a miss"""
+        while True:
+            entry = self._entries.get(policy_id)
+            if entry is not None:
+                expires_at, record = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(policy_id)
+                    POLICY_CACHE_REQUESTS.labels(result = "hit" if record is not None else "negative_hit").inc()
+                    return record
+                self._remove(policy_id, "expired")
+
+            inflight = self._inflight.get(policy_id)
+            if inflight is None:
+                break
+            POLICY_CACHE_REQUESTS.labels(result = "coalesced").inc()
+            try:
+                return await self._inflight.wait(inflight)
+            except LeaderCancelled:
+                # The request fetching it was cancelled; look again and fetch it if nobody has
+                continue
+
+        POLICY_CACHE_REQUESTS.labels(result = "miss").inc()
+        with self._inflight.lead([policy_id]) as flight:
+            record = await self.backend.fetch(policy_id)
+            self.put(policy_id, record)
+            flight.resolve(policy_id, record)
+        return record
+
+    async def get_many(self, policy_ids: Iterable[str]) -> Dict[str, Optional[dict]]:
+        """Return records for several policies, fetching all misses in one backend call"""
+        results = {}
+        missing = []
+        waiting = {}
+        now = time.monotonic()
+
+        for policy_id in dict.fromkeys(policy_ids):
+            entry = self._entries.get(policy_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(policy_id)
+                POLICY_CACHE_REQUESTS.labels(result = "hit" if entry[1] is not None else "negative_hit").inc()
+                results[policy_id] = entry[1]
+            elif policy_id in self._inflight:
+                POLICY_CACHE_REQUESTS.labels(result = "coalesced").inc()
+                waiting[policy_id] = self._inflight.get(policy_id)
+            else:
+                if entry is not None:
+                    self._remove(policy_id, "expired")
+                POLICY_CACHE_REQUESTS.labels(result = "miss").inc()
+                missing.append(policy_id)
+
+        if missing:
+            with self._inflight.lead(missing) as flight:
+                records = await self.backend.fetch_many(missing)
+                for policy_id in missing:
+                    record = records.get(policy_id)
+                    self.put(policy_id, record)
+                    flight.resolve(policy_id, record)
+                    results[policy_id] = record
+
+        for policy_id, future in waiting.items():
+            try:
+                results[policy_id] = await self._inflight.wait(future)
+            except LeaderCancelled:
+                results[policy_id] = await self.get(policy_id)
+        return results
+
+    def put(self, policy_id: str, record: Optional[dict]):
+        """Store a record, or None to cache that the policy does not exist"""
+        ttl = self.ttl if record is not None else self.negative_ttl
+        if ttl <= 0:
+            return
+        self._entries[policy_id] = (time.monotonic() + ttl, record)
+        self._entries.move_to_end(policy_id)
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._remove(oldest, "lru")
+        POLICY_CACHE_SIZE.set(len(self._entries))
+
+    def invalidate(self, policy_id: Optional[str] = None):
+        """Drop one policy, or every policy when no policy_id is given"""
+        if policy_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(policy_id, None)
+        POLICY_CACHE_SIZE.set(len(self._entries))
+
+    def _remove(self, policy_id: str, reason: str):
+        if self._entries.pop(policy_id, None) is not None:
+            POLICY_CACHE_EVICTIONS.labels(reason = reason).inc()
+            logging.debug(f"Evicted policy {policy_id} from cache: {reason}")
+        POLICY_CACHE_SIZE.set(len(self._entries))
@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from prometheus_client import Gauge, Histogram
+
+from policy_cache import PolicyBackend
+
+# Metrics
+POOL_CONNECTIONS = Gauge('policy_store_connections', 'Policy store connections by state', ['state'],
+                           multiprocess_mode = 'livesum')
+STORE_LATENCY = Histogram('policy_store_request_seconds', 'Latency of policy store requests')
+STORE_BATCH_SIZE = Histogram('policy_store_batch_size', 'Policy IDs per policy store request',
+                             buckets = (1, 5, 10, 25, 50, 100))
+
+# DynamoDB BatchGetItem accepts at most 100 keys per request
+MAX_BATCH_KEYS = 100
+
+class ConnectionPool:
+    """
+    Bounded pool of policy store connections. Connections are created lazily up
+    to max_size and callers wait for a free connection beyond that.
+    """
+    def __init__(self, connect, max_size: int = 10):
+        self._connect = connect
+        self.max_size = max_size
+        self._idle = deque()
+        self._semaphore = asyncio.Semaphore(max_size)
+        self._in_use = 0
+
+    @asynccontextmanager
+    async def acquire(self):
+        async with self._semaphore:
+            connection = self._idle.pop() if self._idle else await self._connect()
+            self._in_use += 1
+            self._report()
+            try:
+                yield connection
+            except BaseException:
+                # Don't hand a possibly broken connection to the next caller
+                await connection.close()
+                raise
+            else:
+                self._idle.append(connection)
+            finally:
+                self._in_use -= 1
+                self._report()
+
+    async def close(self):
+        while self._idle:
+            await self._idle.pop().close()
+        self._report()
+
+    def _report(self):
+        POOL_CONNECTIONS.labels(state = "in_use").set(self._in_use)
+        POOL_CONNECTIONS.labels(state = "idle").set(len(self._idle))
+
+class PolicyRepository(PolicyBackend):
+    """
+    Async policy data access over a pooled store, with multi-key batched reads.
+    """
+    def __init__(self, store, pool_size: int = 10):
+        self.store = store
+        self.pool = ConnectionPool(store.connect, max_size = pool_size)
+
+    async def fetch(self, policy_id: str) -> Optional[dict]:
+        return (await self.fetch_many([policy_id])).get(policy_id)
+
+    async def fetch_many(self, policy_ids: Iterable[str]) -> Dict[str, dict]:
+        """Fetch many policies, splitting into store-sized batches run concurrently"""
+        policy_ids = list(dict.fromkeys(policy_ids))
+        batches = [policy_ids[i:i + MAX_BATCH_KEYS] for i in range(0, len(policy_ids), MAX_BATCH_KEYS)]
+        results = await asyncio.gather(*(self._fetch_batch(batch) for batch in batches))
+
+        policies = {}
+        for result in results:
+            policies.update(result)
+        return policies
+
+    async def _fetch_batch(self, policy_ids: List[str]) -> Dict[str, dict]:
+        STORE_BATCH_SIZE.observe(len(policy_ids))
+        async with self.pool.acquire() as connection:
+            start_time = time.perf_counter()
+            policies = await connection.get_many(policy_ids)
+            STORE_LATENCY.observe(time.perf_counter() - start_time)
+        return policies
+
+    async def close(self):
+        await self.pool.close()
+
+class FakePolicyStore:
+    """
+    Local policy store for development and benchmarks. Unknown policy IDs get an
+    active placeholder policy unless default_active is False. Latency injection
+    simulates a network round trip per request to measure concurrency behaviour.
+    """
+    def __init__(self, policies: Optional[Dict[str, dict]] = None, default_active: bool = True,
+                 latency: float = 0.0, jitter: float = 0.0):
+        self.policies = dict(policies or {})
+        self.default_active = default_active
+        self.latency = latency
+        self.jitter = jitter
+        self.request_count = 0
+
+    async def connect(self):
+        return FakePolicyConnection(self)
+
+class FakePolicyConnection:
+    def __init__(self, store: FakePolicyStore):
+        self.store = store
+
+    async def get_many(self, policy_ids: List[str]) -> Dict[str, dict]:
+        store = self.store
+        store.request_count += 1
+        if store.latency or store.jitter:
+            await asyncio.sleep(store.latency + random.uniform(0, store.jitter))
+
+        policies = {}
+        for policy_id in policy_ids:
+            policy = store.policies.get(policy_id)
+            if policy is None and store.default_active:
+                policy = placeholder_policy()
+            if policy is not None:
+                policies[policy_id] = policy
+        return policies
+
+    async def close(self):
+        pass
+
+def placeholder_policy() -> dict:
+    """Active policy record used by the fake store for unknown policy IDs"""
+    return {
+        "payment_status": "current",  # current, overdue, cancelled
+        "expiry_date": datetime.now(timezone.utc) + timedelta(days=180),
+        "policy_restrictions": [],
+        "last_payment_date": datetime.now(timezone.utc) - timedelta(days=15),
+        "coverage_limit": 50000
+    }
+
+class DynamoDBPolicyStore:
+    """
+    Policy store backed by a DynamoDB table keyed on policy_id. Each pooled
+    connection is an aiobotocore client with its own HTTP keep-alive pool.
+    """
+    def __init__(self, table_name: str, region_name: Optional[str] = None):
+        self.table_name = table_name
+        self.region_name = region_name
+
+    async def connect(self):
+        from aiobotocore.session import get_session
+
+        context = get_session().create_client("dynamodb", region_name = self.region_name)
+        client = await context.__aenter__()
+        return DynamoDBPolicyConnection(self.table_name, client, context)
+
+class DynamoDBPolicyConnection:
+    def __init__(self, table_name: str, client, context):
+        self.table_name = table_name
+        self.client = client
+        self.context = context
+
+    async def get_many(self, policy_ids: List[str]) -> Dict[str, dict]:
+        request = {self.table_name: {"Keys": [{"policy_id": {"S": policy_id}} for policy_id in policy_ids]}}
+        policies = {}
+        attempt = 0
+
+        # Retry unprocessed keys with backoff, as BatchGetItem may return a partial result
+        while request:
+            response = await self.client.batch_get_item(RequestItems = request)
+            for item in response.get("Responses", {}).get(self.table_name, []):
+                policy = policy_from_item(item)
+                policies[policy["policy_id"]] = policy
+
+            request = response.get("UnprocessedKeys") or None
+            if request:
+                attempt += 1
+                if attempt > 5:
+                    raise RuntimeError(f"Unprocessed policy keys after {attempt} attempts")
+                await asyncio.sleep(0.05 * 2 ** attempt)
+        return policies
+
+    async def close(self):
+        await self.context.__aexit__(None, None, None)
+
+def policy_from_item(item: dict) -> dict:
+    """Convert a DynamoDB item into the policy record used by the claim rules"""
+    policy = {key: deserialize_attribute(value) for key, value in item.items()}
+    for field in ("expiry_date", "last_payment_date"):
+        if isinstance(policy.get(field), str):
+            policy[field] = datetime.fromisoformat(policy[field])
+    policy.setdefault("policy_restrictions", [])
+    if "coverage_limit" in policy:
+        policy["coverage_limit"] = float(policy["coverage_limit"])
+    return policy
+
+def deserialize_attribute(value: dict):
+    """Decode a DynamoDB attribute value"""
+    (kind, data), = value.items()
+    if kind == "S" or kind == "BOOL":
+        return data
+    if kind == "N":
+        return float(data) if any(c in data for c in ".eE") else int(data)
+    if kind == "NULL":
+        return None
+    if kind == "L":
+        return [deserialize_attribute(v) for v in data]
+    if kind == "M":
+        return {k: deserialize_attribute(v) for k, v in data.items()}
+    if kind in ("SS", "NS"):
+        return [deserialize_attribute({kind[0]: v}) for v in data]
+    raise ValueError(f"Unsupported DynamoDB attribute type {kind}")
+
+def create_policy_repository() -> PolicyRepository:
+    """
+    Build the repository selected by POLICY_STORE: dynamodb, reading the table in
+    DYNAMODB_TABLE, or fake. The fake store answers every unknown policy with an
+    active one, so it is only used when asked for.
+    """
+    pool_size = int(os.getenv("POLICY_STORE_POOL_SIZE", "10"))
+    store_type = os.getenv("POLICY_STORE", "dynamodb")
+
+    if store_type == "dynamodb":
+        table_name = os.getenv("DYNAMODB_TABLE")
+        if not table_name:
+            raise ValueError("POLICY_STORE dynamodb needs DYNAMODB_TABLE; set POLICY_STORE=fake for local development")
+        store = DynamoDBPolicyStore(table_name, region_name = os.getenv("AWS_REGION"))
+    elif store_type == "fake":
+        store = FakePolicyStore(
+            latency = float(os.getenv("POLICY_STORE_LATENCY_MS", "0")) / 1000,
+            jitter = float(os.getenv("POLICY_STORE_JITTER_MS", "0")) / 1000
+        )
+    else:
+        raise ValueError(f"Unknown POLICY_STORE {store_type}")
+
+    logging.info(f"Using {store_type} policy store with pool size {pool_size}")
+    return PolicyRepository(store, pool_size = pool_size)
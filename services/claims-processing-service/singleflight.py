@@ -0,0 +1,86 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, Optional
+
+class LeaderCancelled(Exception):
+    """The call being waited on was cancelled before it finished, so the waiter should retry"""
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key onto one in-flight call. The
+    caller that starts a call leads it and later callers wait for its result or
+    its error. A leader's cancellation belongs to the leader's own request: its
+    waiters get LeaderCancelled rather than CancelledError, and retry so that
+    one of them leads the next call.
+    """
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def get(self, key: Hashable) -> Optional[asyncio.Future]:
+        """The in-flight call for key, or None"""
+        return self._calls.get(key)
+
+    def lead(self, keys: Iterable[Hashable]) -> "Flight":
+        """Start calls for keys that are not in flight; resolve each through the returned Flight"""
+        return Flight(self._calls, keys)
+
+    @staticmethod
+    async def wait(future: asyncio.Future):
+        """Result of another caller's call; cancelling the waiter leaves the call running"""
+        return await asyncio.shield(future)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable]):
+        """Result of call(), shared with every concurrent caller for the same key"""
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                with self.lead([key]) as flight:
+                    value = await call()
+                    flight.resolve(key, value)
+                return value
+            try:
+                return await self.wait(future)
+            except LeaderCancelled:
+                continue
+
+class Flight:
+    """
+    Calls led by one caller. Used as a context manager: on exit, calls that were
+    not resolved fail with the leader's error, or with LeaderCancelled when the
+    leader was cancelled or left without resolving them.
+    """
+    def __init__(self, calls: Dict[Hashable, asyncio.Future], keys: Iterable[Hashable]):
+        loop = asyncio.get_running_loop()
+        self._calls = calls
+        self.futures = {key: loop.create_future() for key in keys}
+        self._calls.update(self.futures)
+
+    def resolve(self, key: Hashable, value):
+        self._release(key)
+        self.futures[key].set_result(value)
+
+    def _release(self, key: Hashable):
+        # Forget the call before waiters wake, so a retrying waiter starts a new one
+        if self._calls.get(key) is self.futures[key]:
+            del self._calls[key]
+
+    def __enter__(self) -> "Flight":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for key, future in self.futures.items():
+            self._release(key)
+            if future.done():
+                continue
+            if isinstance(exc, Exception):
+                # Errors are not cached; waiting callers see the same failure
+                future.set_exception(exc)
+            else:
+                future.set_exception(LeaderCancelled())
+            future.exception()  # Mark retrieved when nobody is waiting
+        return False
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Tests import the service modules the way the app does, from the service directory
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+# The shared modules, as the image installs them from services/common
+sys.path.insert(1, os.path.join(os.path.dirname(SERVICE_DIR), "common"))
+
+# The app builds its policy repository on import; tests replace POLICY_CACHE's backend
+os.environ.setdefault("POLICY_STORE", "fake")
@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+import app
+from decision_cache import DecisionCache
+from insurance_common.admission import FAST_LANE, STANDARD_LANE, AdmissionController
+from policy_cache import InMemoryPolicyBackend, PolicyCache
+
+DOCUMENTS = ["police_report", "repair_estimate", "photos", "claim_form"]
+
+def active_policy() -> dict:
+    now = datetime.now(timezone.utc)
+    return {"payment_status": "current", "expiry_date": now + timedelta(days = 180), "policy_restrictions": [],
+            "last_payment_date": now - timedelta(days = 15), "coverage_limit": 50000}
+
+def claim_payload(claim_id: str, claim_amount: float, documents: list = DOCUMENTS) -> dict:
+    return {"claim_id": claim_id, "policy_id": "POL-1", "claim_amount": claim_amount,
+            "incident_date": (datetime.now(timezone.utc) - timedelta(days = 3)).isoformat(), "claim_type": "auto",
+            "description": "Rear-ended at a junction", "supporting_documents": documents,
+            "claimant_info": {"name": "Test Claimant"}}
+
+@pytest.fixture(autouse = True)
+def claims_app(monkeypatch):
+    monkeypatch.setattr(app, "POLICY_CACHE", PolicyCache(InMemoryPolicyBackend({"POL-1": active_policy()})))
+    monkeypatch.setattr(app, "DECISION_CACHE", DecisionCache())
+    monkeypatch.setattr(app, "AUDIT_LOG", None)
+    monkeypatch.setattr(app, "DOCUMENT_VERIFIER", None)
+
+@pytest.mark.parametrize("claim_amount, documents, lane", [
+    (app.AUTO_APPROVE_MAX_AMOUNT, DOCUMENTS, FAST_LANE),
+    (app.AUTO_APPROVE_MAX_AMOUNT + 1, DOCUMENTS, STANDARD_LANE),
+    (1000.0, DOCUMENTS[:2], STANDARD_LANE)
+])
+def test_claim_lane(claim_amount, documents, lane):
+    assert app.claim_lane(app.Claim(**claim_payload("CLM-1", claim_amount, documents))) == lane
+
+def test_auto_approvable_claim_is_admitted_while_standard_claims_are_shed(monkeypatch):
+    # One slot for standard claims and one held back for the fast lane, with no queue
+    monkeypatch.setattr(app, "ADMISSION", AdmissionController("test", initial_limit = 2, min_limit = 2, max_limit = 2,
+                                                                fast_reserve = 0.5, max_queue = 0, queue_timeout_ms = 10))
+    release = asyncio.Event()
+    submit_claim = app.submit_claim
+
+    async def slow_standard_claims(claim):
+        if claim.claim_amount > app.AUTO_APPROVE_MAX_AMOUNT:
+            await release.wait()
+        return await submit_claim(claim)
+
+    monkeypatch.setattr(app, "submit_claim", slow_standard_claims)
+
+    async def run():
+        async with httpx.AsyncClient(transport = httpx.ASGITransport(app = app.app), base_url = "http://test") as client:
+            held = asyncio.create_task(client.post("/api/v1/process", json = claim_payload("CLM-1", 20000.0)))
+            await asyncio.sleep(0.05)
+            shed = await client.post("/api/v1/process", json = claim_payload("CLM-2", 20000.0))
+            fast = await client.post("/api/v1/process", json = claim_payload("CLM-3", 1000.0))
+            release.set()
+            return shed, fast, await held
+
+    shed, fast, held = asyncio.run(run())
+    assert shed.status_code == 429
+    assert "Retry-After" in shed.headers
+    assert fast.status_code == 200 and fast.json()["status"] == "approved"
+    assert held.status_code == 200
@@ -0,0 +1,55 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import app
+from decision_cache import DecisionCache
+from policy_cache import InMemoryPolicyBackend, PolicyCache
+
+def active_policy() -> dict:
+    now = datetime.now(timezone.utc)
+    return {"payment_status": "current", "expiry_date": now + timedelta(days = 180), "policy_restrictions": [],
+            "last_payment_date": now - timedelta(days = 15), "coverage_limit": 50000}
+
+def claim(claim_id: str, incident_date: datetime) -> app.Claim:
+    return app.Claim(claim_id = claim_id, policy_id = "POL-1", claim_amount = 1500.0, incident_date = incident_date,
+                     claim_type = "auto", description = "Rear-ended at a junction",
+                     supporting_documents = ["police_report", "repair_estimate", "photos", "claim_form"],
+                     claimant_info = {"name": "Test Claimant"})
+
+@pytest.fixture(autouse = True)
+def claims_app(monkeypatch):
+    monkeypatch.setattr(app, "POLICY_CACHE", PolicyCache(InMemoryPolicyBackend({"POL-1": active_policy()})))
+    monkeypatch.setattr(app, "DECISION_CACHE", DecisionCache())
+    monkeypatch.setattr(app, "AUDIT_LOG", None)
+    monkeypatch.setattr(app, "DOCUMENT_VERIFIER", None)
+
+def test_failing_claim_does_not_fail_its_batch(monkeypatch):
+    decided = []
+    decide_claim = app.decide_claim
+
+    async def failing_decide_claim(claim):
+        decided.append(claim.claim_id)
+        if claim.claim_id == "CLM-2":
+            raise RuntimeError("decision failed")
+        return await decide_claim(claim)
+
+    monkeypatch.setattr(app, "decide_claim", failing_decide_claim)
+    incident_date = datetime.now() - timedelta(days = 3)
+    decisions = asyncio.run(app.decide_claims([claim(f"CLM-{i}", incident_date) for i in range(1, 4)]))
+
+    assert [decision["status"] for decision in decisions] == ["approved", "error", "approved"]
+    assert decisions[1]["claim_id"] == "CLM-2"
+    assert decisions[1]["next_steps"] == ["Claim flagged for manual review"]
+    # Nothing raised, so the batcher has no reason to decide the claims again
+    assert sorted(decided) == ["CLM-1", "CLM-2", "CLM-3"]
+
+def test_incident_dates_with_and_without_offset():
+    past = datetime.now(timezone.utc) - timedelta(days = 3)
+    future = datetime.now(timezone.utc) + timedelta(days = 3)
+    claims = [claim("CLM-1", past), claim("CLM-2", past.replace(tzinfo = None)), claim("CLM-3", future)]
+
+    decisions = asyncio.run(app.decide_claims(claims))
+    assert [decision["status"] for decision in decisions] == ["approved", "approved", "rejected"]
+    assert decisions[2]["reasons"] == ["Invalid incident date"]
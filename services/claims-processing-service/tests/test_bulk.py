@@ -0,0 +1,73 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+import app
+from decision_cache import DecisionCache
+from policy_cache import InMemoryPolicyBackend, PolicyCache
+
+def active_policy() -> dict:
+    now = datetime.now(timezone.utc)
+    return {"payment_status": "current", "expiry_date": now + timedelta(days = 180), "policy_restrictions": [],
+            "last_payment_date": now - timedelta(days = 15), "coverage_limit": 50000}
+
+def claim_line(claim_id: str, claim_amount: float = 1500.0) -> bytes:
+    claim = {"claim_id": claim_id, "policy_id": "POL-1", "claim_amount": claim_amount,
+             "incident_date": (datetime.now(timezone.utc) - timedelta(days = 3)).isoformat(), "claim_type": "auto",
+             "description": "Rear-ended at a junction",
+             "supporting_documents": ["police_report", "repair_estimate", "photos", "claim_form"],
+             "claimant_info": {"name": "Test Claimant"}}
+    return json.dumps(claim).encode() + b"\n"
+
+@pytest.fixture(autouse = True)
+def claims_app(monkeypatch):
+    monkeypatch.setattr(app, "POLICY_CACHE", PolicyCache(InMemoryPolicyBackend({"POL-1": active_policy()})))
+    monkeypatch.setattr(app, "DECISION_CACHE", DecisionCache())
+    monkeypatch.setattr(app, "AUDIT_LOG", None)
+    monkeypatch.setattr(app, "DOCUMENT_VERIFIER", None)
+
+def post_bulk(body: bytes, chunk_size: int) -> list:
+    """Decisions for body, sent in chunk_size pieces so lines straddle chunk boundaries"""
+    async def chunks():
+        for start in range(0, len(body), chunk_size):
+            yield body[start:start + chunk_size]
+
+    async def run():
+        async with httpx.AsyncClient(transport = httpx.ASGITransport(app = app.app), base_url = "http://test") as client:
+            response = await client.post("/api/v1/process/bulk", content = chunks(),
+                                         headers = {"Content-Type": "application/x-ndjson"})
+            assert response.status_code == 200
+            return [json.loads(line) for line in response.text.splitlines()]
+
+    return asyncio.run(run())
+
+@pytest.mark.parametrize("chunk_size", [7, 100, 1 << 20])
+def test_decisions_follow_line_order_with_errors_in_place(chunk_size):
+    body = (claim_line("CLM-1") + b"{not json\n" + b"\n" + claim_line("CLM-3", 20000.0)
+            + json.dumps({"claim_id": "CLM-4"}).encode() + b"\n" + claim_line("CLM-5").rstrip(b"\n"))
+    decisions = post_bulk(body, chunk_size)
+
+    assert [decision["line"] for decision in decisions] == [1, 2, 4, 5, 6]
+    assert [decision.get("claim_id") for decision in decisions] == ["CLM-1", None, "CLM-3", None, "CLM-5"]
+    assert decisions[0]["status"] == "approved"
+    assert decisions[1]["status"] == decisions[3]["status"] == "error"
+    assert decisions[2]["status"] != "error"
+
+def test_decisions_stream_in_chunks(monkeypatch):
+    monkeypatch.setattr(app, "BULK_CHUNK_SIZE", 3)
+    body = b"".join(claim_line(f"CLM-{index}") for index in range(10))
+    decisions = post_bulk(body, 64)
+    assert [decision["claim_id"] for decision in decisions] == [f"CLM-{index}" for index in range(10)]
+
+@pytest.mark.parametrize("chunk_size", [16, 1 << 20])
+def test_oversized_line_is_reported_once_and_skipped(monkeypatch, chunk_size):
+    monkeypatch.setattr(app, "BULK_MAX_LINE_BYTES", 1024)
+    oversized = json.dumps({"claim_id": "CLM-2", "description": "x" * 4096}).encode() + b"\n"
+    decisions = post_bulk(claim_line("CLM-1") + oversized + claim_line("CLM-3"), chunk_size)
+
+    assert [decision["line"] for decision in decisions] == [1, 2, 3]
+    assert decisions[1] == {"line": 2, "status": "error", "error": "Line exceeds maximum size"}
+    assert [decisions[0]["claim_id"], decisions[2]["claim_id"]] == ["CLM-1", "CLM-3"]
@@ -0,0 +1,138 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import app
+from decision_cache import DecisionCache
+from policy_cache import InMemoryPolicyBackend, PolicyCache
+
+APPROVED = {"claim_id": "CLM-1", "status": "approved", "approved_amount": 100.0}
+
+class Decider:
+    """Counts decisions; a decision waits for the gate once the test closes it"""
+    def __init__(self, decision = APPROVED):
+        self.decision = decision
+        self.calls = 0
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.gate.wait()
+        return dict(self.decision)
+
+def test_unchanged_claim_reuses_decision():
+    cache = DecisionCache()
+    decide = Decider()
+
+    async def run():
+        first = await cache.get_or_decide("CLM-1", "hash-1", "v1", decide)
+        second = await cache.get_or_decide("CLM-1", "hash-1", "v1", decide)
+        return first, second
+
+    assert asyncio.run(run()) == (APPROVED, APPROVED)
+    assert decide.calls == 1
+
+def test_changed_claim_or_version_is_decided_again():
+    cache = DecisionCache()
+    decide = Decider()
+
+    async def run():
+        await cache.get_or_decide("CLM-1", "hash-1", "v1", decide)
+        await cache.get_or_decide("CLM-1", "hash-2", "v1", decide)
+        await cache.get_or_decide("CLM-1", "hash-2", "v2", decide)
+        await cache.get_or_decide("CLM-1", "hash-2", "v2", decide)
+
+    asyncio.run(run())
+    assert decide.calls == 3
+
+def test_error_decisions_are_not_cached():
+    cache = DecisionCache()
+    decide = Decider({"claim_id": "CLM-1", "status": "error"})
+
+    async def run():
+        await cache.get_or_decide("CLM-1", "hash-1", "v1", decide)
+        await cache.get_or_decide("CLM-1", "hash-1", "v1", decide)
+
+    asyncio.run(run())
+    assert decide.calls == 2
+
+def test_cancelled_leader_hands_decision_to_waiter():
+    cache = DecisionCache()
+    decide = Decider()
+    decide.gate.clear()
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_decide("CLM-1", "hash-1", "v1", decide))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_decide("CLM-1", "hash-1", "v1", decide))
+        await asyncio.sleep(0)
+        leader.cancel()
+        decide.gate.set()
+        assert await asyncio.wait_for(waiter, timeout = 1) == APPROVED
+        assert leader.cancelled()
+        assert not cache._inflight
+
+    asyncio.run(run())
+    assert decide.calls == 2
+
+def active_policy() -> dict:
+    now = datetime.now(timezone.utc)
+    return {"payment_status": "current", "expiry_date": now + timedelta(days = 180), "policy_restrictions": [],
+            "last_payment_date": now - timedelta(days = 15), "coverage_limit": 50000}
+
+INCIDENT_DATE = datetime.now() - timedelta(days = 3)
+
+def claim(claim_id: str, policy_id: str = "POL-1") -> app.Claim:
+    return app.Claim(claim_id = claim_id, policy_id = policy_id, claim_amount = 1500.0,
+                     incident_date = INCIDENT_DATE, claim_type = "auto", description = "Rear-ended at a junction",
+                     supporting_documents = ["police_report", "repair_estimate", "photos", "claim_form"],
+                     claimant_info = {"name": "Test Claimant"})
+
+class CountingBackend(InMemoryPolicyBackend):
+    """Counts batched reads apart from single-policy fetches"""
+    def __init__(self, policies):
+        super().__init__(policies)
+        self.batches = 0
+
+    async def fetch_many(self, policy_ids):
+        self.batches += 1
+        return {policy_id: self.policies[policy_id] for policy_id in policy_ids if policy_id in self.policies}
+
+@pytest.fixture
+def claims_app(monkeypatch):
+    backend = CountingBackend({"POL-1": active_policy(), "POL-2": active_policy()})
+    monkeypatch.setattr(app, "POLICY_CACHE", PolicyCache(backend))
+    monkeypatch.setattr(app, "DECISION_CACHE", DecisionCache())
+    monkeypatch.setattr(app, "AUDIT_LOG", None)
+    monkeypatch.setattr(app, "DOCUMENT_VERIFIER", None)
+    return backend
+
+def test_batch_reads_policies_once_for_decisions_and_versions(claims_app):
+    decisions = asyncio.run(app.decide_claims([claim("CLM-1"), claim("CLM-2", "POL-2"), claim("CLM-3")]))
+    assert [decision["claim_id"] for decision in decisions] == ["CLM-1", "CLM-2", "CLM-3"]
+    assert claims_app.batches == 1
+    assert claims_app.fetch_count == 0
+
+def test_policy_change_invalidates_cached_decision(claims_app, monkeypatch):
+    decided = []
+    decide_claim = app.decide_claim
+
+    async def counting_decide_claim(claim):
+        decided.append(claim.claim_id)
+        return await decide_claim(claim)
+
+    monkeypatch.setattr(app, "decide_claim", counting_decide_claim)
+
+    async def run():
+        await app.decide_claims([claim("CLM-1")])
+        await app.decide_claims([claim("CLM-1")])
+        # A cancelled policy must not keep the decision made while it was active
+        claims_app.policies["POL-1"] = dict(active_policy(), payment_status = "cancelled")
+        app.POLICY_CACHE.invalidate("POL-1")
+        return (await app.decide_claims([claim("CLM-1")]))[0]
+
+    decision = asyncio.run(run())
+    assert decided == ["CLM-1", "CLM-1"]
+    assert decision["status"] == "rejected"
@@ -0,0 +1,200 @@
+import asyncio
+
+import pytest
+
+import policy_cache
+from policy_cache import InMemoryPolicyBackend, PolicyCache
+
+POLICY = {"policy_id": "POL-1", "payment_status": "current"}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+class GatedBackend(InMemoryPolicyBackend):
+    """Fetches wait until the test opens the gate"""
+    def __init__(self, policies = None):
+        super().__init__(policies)
+        self.gate = asyncio.Event()
+        self.started = asyncio.Event()
+
+    async def fetch(self, policy_id):
+        self.fetch_count += 1
+        self.started.set()
+        await self.gate.wait()
+        return self.policies.get(policy_id)
+
+    async def fetch_many(self, policy_ids):
+        self.fetch_count += 1
+        self.started.set()
+        await self.gate.wait()
+        return {policy_id: self.policies[policy_id] for policy_id in policy_ids if policy_id in self.policies}
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(policy_cache, "time", clock)
+    return clock
+
+def test_miss_then_hit(clock):
+    backend = InMemoryPolicyBackend({"POL-1": POLICY})
+    cache = PolicyCache(backend)
+
+    async def run():
+        assert await cache.get("POL-1") == POLICY
+        assert await cache.get("POL-1") == POLICY
+
+    asyncio.run(run())
+    assert backend.fetch_count == 1
+
+def test_entry_expires_after_ttl(clock):
+    backend = InMemoryPolicyBackend({"POL-1": POLICY})
+    cache = PolicyCache(backend, ttl = 60)
+
+    async def run():
+        await cache.get("POL-1")
+        clock.now += 59
+        await cache.get("POL-1")
+        assert backend.fetch_count == 1
+        clock.now += 2
+        await cache.get("POL-1")
+        assert backend.fetch_count == 2
+
+    asyncio.run(run())
+
+def test_missing_policy_is_cached_for_negative_ttl(clock):
+    backend = InMemoryPolicyBackend()
+    cache = PolicyCache(backend, ttl = 60, negative_ttl = 10)
+
+    async def run():
+        assert await cache.get("POL-404") is None
+        assert await cache.get("POL-404") is None
+        assert backend.fetch_count == 1
+        clock.now += 11
+        backend.policies["POL-404"] = POLICY
+        assert await cache.get("POL-404") == POLICY
+        assert backend.fetch_count == 2
+
+    asyncio.run(run())
+
+def test_lru_eviction(clock):
+    backend = InMemoryPolicyBackend({f"POL-{i}": {"policy_id": f"POL-{i}"} for i in range(3)})
+    cache = PolicyCache(backend, max_size = 2)
+
+    async def run():
+        await cache.get("POL-0")
+        await cache.get("POL-1")
+        await cache.get("POL-0")  # POL-1 is now least recently used
+        await cache.get("POL-2")
+        backend.fetch_count = 0
+        await cache.get("POL-0")
+        assert backend.fetch_count == 0
+        await cache.get("POL-1")
+        assert backend.fetch_count == 1
+
+    asyncio.run(run())
+
+def test_concurrent_lookups_share_one_fetch():
+    backend = GatedBackend({"POL-1": POLICY})
+    cache = PolicyCache(backend)
+
+    async def run():
+        lookups = [asyncio.create_task(cache.get("POL-1")) for _ in range(5)]
+        await backend.started.wait()
+        backend.gate.set()
+        return await asyncio.gather(*lookups)
+
+    assert asyncio.run(run()) == [POLICY] * 5
+    assert backend.fetch_count == 1
+
+def test_get_many_coalesces_with_get():
+    backend = GatedBackend({"POL-1": POLICY})
+    cache = PolicyCache(backend)
+
+    async def run():
+        single = asyncio.create_task(cache.get("POL-1"))
+        await backend.started.wait()
+        many = asyncio.create_task(cache.get_many(["POL-1", "POL-2"]))
+        await asyncio.sleep(0)
+        backend.gate.set()
+        return await single, await many
+
+    assert asyncio.run(run()) == (POLICY, {"POL-1": POLICY, "POL-2": None})
+    assert backend.fetch_count == 2
+
+def test_backend_error_reaches_waiters_and_is_not_cached():
+    class FailingBackend(GatedBackend):
+        async def fetch(self, policy_id):
+            await super().fetch(policy_id)
+            raise RuntimeError("backend down")
+
+    backend = FailingBackend({"POL-1": POLICY})
+    cache = PolicyCache(backend)
+
+    async def run():
+        lookups = [asyncio.create_task(cache.get("POL-1")) for _ in range(2)]
+        await backend.started.wait()
+        backend.gate.set()
+        return await asyncio.gather(*lookups, return_exceptions = True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert "POL-1" not in cache._entries
+    assert not cache._inflight
+
+def test_cancelled_leader_hands_fetch_to_waiter():
+    backend = GatedBackend({"POL-1": POLICY})
+    cache = PolicyCache(backend)
+
+    async def run():
+        leader = asyncio.create_task(cache.get("POL-1"))
+        await backend.started.wait()
+        waiter = asyncio.create_task(cache.get("POL-1"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        # The leader's cancellation is its own: the waiter fetches the policy itself
+        backend.gate.set()
+        assert await asyncio.wait_for(waiter, timeout = 1) == POLICY
+        assert leader.cancelled()
+        assert not cache._inflight
+
+    asyncio.run(run())
+    assert backend.fetch_count == 2
+
+def test_cancelled_get_many_leader_hands_fetch_to_waiters():
+    backend = GatedBackend({"POL-1": POLICY})
+    cache = PolicyCache(backend)
+
+    async def run():
+        leader = asyncio.create_task(cache.get_many(["POL-1"]))
+        await backend.started.wait()
+        single = asyncio.create_task(cache.get("POL-1"))
+        many = asyncio.create_task(cache.get_many(["POL-1", "POL-2"]))
+        await asyncio.sleep(0)
+        leader.cancel()
+        backend.gate.set()
+        assert await asyncio.wait_for(single, timeout = 1) == POLICY
+        assert await asyncio.wait_for(many, timeout = 1) == {"POL-1": POLICY, "POL-2": None}
+        assert not cache._inflight
+
+    asyncio.run(run())
+
+def test_cancelled_waiter_leaves_fetch_running():
+    backend = GatedBackend({"POL-1": POLICY})
+    cache = PolicyCache(backend)
+
+    async def run():
+        leader = asyncio.create_task(cache.get("POL-1"))
+        await backend.started.wait()
+        waiter = asyncio.create_task(cache.get("POL-1"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        backend.gate.set()
+        assert await leader == POLICY
+        assert waiter.cancelled()
+
+    asyncio.run(run())
+    assert backend.fetch_count == 1
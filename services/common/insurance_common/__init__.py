@@ -0,0 +1,5 @@
+"""
+Runtime modules shared by the claims, fraud and risk services: admission control,
+the decision audit log, the scoring executor, fast request decoding, micro-batching,
+startup tracking, the telematics feature store and telemetry.
+"""
@@ -0,0 +1,292 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Metrics
+ADMISSION_ADMITTED = Counter('admission_admitted_total', 'Requests admitted by admission control', ['lane'])
+ADMISSION_SHED = Counter('admission_shed_total', 'Requests rejected by admission control', ['lane', 'reason'])
+ADMISSION_QUEUE_DEPTH = Gauge('admission_queue_depth', 'Requests waiting for an admission slot', ['lane'],
+                              multiprocess_mode = 'livesum')
+ADMISSION_INFLIGHT = Gauge('admission_inflight', 'Requests holding an admission slot', multiprocess_mode = 'livesum')
+ADMISSION_LIMIT = Gauge('admission_concurrency_limit', 'Adaptive concurrency limit', multiprocess_mode = 'livesum')
+ADMISSION_QUEUE_WAIT = Histogram('admission_queue_wait_seconds', 'Time admitted requests waited for a slot', ['lane'],
+                                 buckets = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1))
+
+# Lanes, in priority order
+FAST_LANE = "fast"
+STANDARD_LANE = "standard"
+
+# Defaults, overridable per service through the environment
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_LATENCY_TARGET_MS = float(os.getenv("ADMISSION_LATENCY_TARGET_MS", "250"))
+ADMISSION_INITIAL_LIMIT = int(os.getenv("ADMISSION_INITIAL_LIMIT", "32"))
+ADMISSION_MIN_LIMIT = int(os.getenv("ADMISSION_MIN_LIMIT", "4"))
+ADMISSION_MAX_LIMIT = int(os.getenv("ADMISSION_MAX_LIMIT", "512"))
+ADMISSION_BACKOFF = float(os.getenv("ADMISSION_BACKOFF", "0.9"))
+ADMISSION_FAST_RESERVE = float(os.getenv("ADMISSION_FAST_RESERVE", "0.2"))  # Share of the limit standard requests can't use
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "128"))
+ADMISSION_QUEUE_TIMEOUT_MS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", str(ADMISSION_LATENCY_TARGET_MS)))
+# CloudWatch namespace for saturation metrics; unset disables publishing
+ADMISSION_METRICS_NAMESPACE = os.getenv("ADMISSION_METRICS_NAMESPACE", "")
+ADMISSION_METRICS_INTERVAL = float(os.getenv("ADMISSION_METRICS_INTERVAL", "60"))
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; retry_after is a whole number of seconds"""
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Bounds the requests a worker handles at once with a concurrency limit that
+    adapts to latency against a target, additive increase and multiplicative
+    decrease style. A request slower than latency_target_ms cuts the limit by
+    backoff, at most once per recent latency so one slow burst counts once; a
+    request on time while the limit is nearly used raises it by 1 / limit, so
+    about one slot per limit requests. The limit stays within min_limit and
+    max_limit.
+
+    A block doing the work of several requests, such as a batch, holds one slot
+    per request up to its lane's capacity, and its latency counts per request
+    held, so batches steer the limit like the single requests they replace.
+
+    Requests beyond the limit wait in a queue per lane, up to max_queue each.
+    Freed slots go to the fast lane first, and standard requests never use the
+    last fast_reserve share of the limit, so cheap requests keep moving while
+    expensive ones back up. A request that finds its queue full, or isn't
+    admitted within queue_timeout_ms, gets AdmissionRejected with a Retry-After
+    estimated from the queue and recent latency.
+    """
+    def __init__(self, name: str, latency_target_ms: float = ADMISSION_LATENCY_TARGET_MS,
+                 initial_limit: int = ADMISSION_INITIAL_LIMIT, min_limit: int = ADMISSION_MIN_LIMIT,
+                 max_limit: int = ADMISSION_MAX_LIMIT, backoff: float = ADMISSION_BACKOFF,
+                 fast_reserve: float = ADMISSION_FAST_RESERVE, max_queue: int = ADMISSION_MAX_QUEUE,
+                 queue_timeout_ms: float = ADMISSION_QUEUE_TIMEOUT_MS):
+        self.name = name
+        self.latency_target = latency_target_ms / 1000
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.fast_reserve = fast_reserve
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout_ms / 1000
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.inflight = 0
+        self.latency = self.latency_target / 2  # Moving average of admitted request latency
+        self._queues: Dict[str, deque] = {FAST_LANE: deque(), STANDARD_LANE: deque()}  # (future, slots) pairs
+        self._last_decrease = 0.0
+        self.shed_count = 0
+        # Since the last saturation report
+        self.max_queue_depth = 0
+        self.max_inflight = 0
+        self._inflight_seconds = 0.0  # Slots held integrated over time
+        self._inflight_changed_at = self._stats_reset_at = time.monotonic()
+        ADMISSION_LIMIT.set(int(self.limit))
+
+    def capacity(self, lane: str) -> int:
+        """Slots a lane may fill; standard requests leave the fast reserve free"""
+        limit = int(self.limit)
+        if lane == FAST_LANE:
+            return limit
+        return max(1, limit - int(limit * self.fast_reserve))
+
+    @asynccontextmanager
+    async def admit(self, lane: str = STANDARD_LANE, measure: bool = True, requests: int = 1):
+        """
+        Hold slots for the body of the block, one per request it serves up to the
+        lane's capacity. measure = False leaves the block's latency out of the
+        limit, for work with its own cost profile.
+        """
+        slots = max(1, min(requests, self.capacity(lane)))
+        await self._acquire(lane, slots)
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            # Requests beyond the slots held ran one after another on them
+            latency = (time.perf_counter() - started_at) * slots / max(requests, 1)
+            self._release(slots, latency if measure else None)
+
+    async def _acquire(self, lane: str, slots: int):
+        queue = self._queues[lane]
+        if not queue and not self._queues[FAST_LANE] and self.inflight + slots <= self.capacity(lane):
+            self._take_slots(lane, slots)
+            ADMISSION_QUEUE_WAIT.labels(lane = lane).observe(0)
+            return
+
+        if len(queue) >= self.max_queue:
+            self._shed(lane, "queue_full")
+        future = asyncio.get_running_loop().create_future()
+        entry = (future, slots)
+        queue.append(entry)
+        self._track_queue(lane)
+        queued_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._shed(lane, "queue_timeout")
+        except asyncio.CancelledError:
+            # Granted just as the caller was cancelled: hand the slots on
+            if future.done() and not future.cancelled():
+                self._release(slots, None)
+            raise
+        finally:
+            if entry in queue:
+                queue.remove(entry)
+                self._track_queue(lane)
+        ADMISSION_QUEUE_WAIT.labels(lane = lane).observe(time.perf_counter() - queued_at)
+
+    def _take_slots(self, lane: str, slots: int):
+        self._set_inflight(self.inflight + slots)
+        ADMISSION_ADMITTED.labels(lane = lane).inc()
+
+    def _release(self, slots: int, latency: Optional[float]):
+        self._set_inflight(self.inflight - slots)
+        if latency is not None:
+            self._update_limit(latency)
+        self._dispatch()
+
+    def _set_inflight(self, inflight: int):
+        now = time.monotonic()
+        self._inflight_seconds += self.inflight * (now - self._inflight_changed_at)
+        self._inflight_changed_at = now
+        self.inflight = inflight
+        self.max_inflight = max(self.max_inflight, inflight)
+        ADMISSION_INFLIGHT.set(inflight)
+
+    def take_inflight_stats(self) -> tuple:
+        """(time-averaged, peak) slots held since the last call, which starts a new period"""
+        self._set_inflight(self.inflight)
+        elapsed = self._inflight_changed_at - self._stats_reset_at
+        average = self._inflight_seconds / elapsed if elapsed > 0 else float(self.inflight)
+        peak = self.max_inflight
+        self._inflight_seconds = 0.0
+        self._stats_reset_at = self._inflight_changed_at
+        self.max_inflight = self.inflight
+        return average, peak
+
+    def _update_limit(self, latency: float):
+        self.latency += 0.1 * (latency - self.latency)
+        now = time.monotonic()
+        if latency > self.latency_target:
+            if now - self._last_decrease >= self.latency:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+        elif self.inflight + 1 >= self.limit * 0.8:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        ADMISSION_LIMIT.set(int(self.limit))
+
+    def _dispatch(self):
+        """Grant free slots to waiting requests, fast lane first"""
+        for lane in (FAST_LANE, STANDARD_LANE):
+            queue = self._queues[lane]
+            while queue:
+                future, slots = queue[0]
+                if future.done():
+                    queue.popleft()  # Timed out or cancelled
+                    continue
+                # A block queued before the limit fell below its slots goes once the lane is empty
+                if self.inflight + slots > self.capacity(lane) and self.inflight > 0:
+                    break
+                queue.popleft()
+                self._take_slots(lane, slots)
+                future.set_result(None)
+            self._track_queue(lane)
+
+    def _shed(self, lane: str, reason: str):
+        self.shed_count += 1
+        ADMISSION_SHED.labels(lane = lane, reason = reason).inc()
+        raise AdmissionRejected(f"{self.name} is overloaded ({reason.replace('_', ' ')})", self.retry_after())
+
+    def _track_queue(self, lane: str):
+        depth = len(self._queues[lane])
+        ADMISSION_QUEUE_DEPTH.labels(lane = lane).set(depth)
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth())
+
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue has likely drained at the recent latency"""
+        drain_time = (self.queue_depth() + 1) * self.latency / max(1, int(self.limit))
+        return min(30, max(1, math.ceil(drain_time)))
+
+class SaturationReporter:
+    """
+    Publishes an admission controller's saturation to CloudWatch every interval
+    seconds, for alarms and scaling policies that can't read Prometheus, each
+    covering the time since the last report: AdmissionShed (requests shed),
+    AdmissionQueueDepth (the deepest queue), AdmissionInflight (slots held,
+    averaged over time), AdmissionPeakInflight (the most slots held at once),
+    and AdmissionConcurrencyLimit, with a ServiceName dimension. Every worker
+    publishes its own values; alarms sum or max them.
+    """
+    def __init__(self, controller: AdmissionController, service: str, namespace: str,
+                 interval: float = ADMISSION_METRICS_INTERVAL, region_name: Optional[str] = None):
+        self.controller = controller
+        self.service = service
+        self.namespace = namespace
+        self.interval = interval
+        self.region_name = region_name
+        self._task = None
+        self._shed_reported = 0
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        from aiobotocore.session import get_session
+
+        async with get_session().create_client("cloudwatch", region_name = self.region_name) as client:
+            while True:
+                await asyncio.sleep(self.interval)
+                try:
+                    await client.put_metric_data(Namespace = self.namespace, MetricData = self.metric_data())
+                except Exception as e:
+                    logging.error(f"Error publishing admission metrics: {str(e)}")
+
+    def metric_data(self) -> list:
+        """Metrics since the last call, as PutMetricData entries"""
+        controller = self.controller
+        shed = controller.shed_count - self._shed_reported
+        self._shed_reported = controller.shed_count
+        queue_depth = max(controller.max_queue_depth, controller.queue_depth())
+        controller.max_queue_depth = 0
+        average_inflight, peak_inflight = controller.take_inflight_stats()
+
+        dimensions = [{"Name": "ServiceName", "Value": self.service}]
+        return [
+            {"MetricName": "AdmissionShed", "Dimensions": dimensions, "Value": shed, "Unit": "Count"},
+            {"MetricName": "AdmissionQueueDepth", "Dimensions": dimensions, "Value": queue_depth, "Unit": "Count"},
+            {"MetricName": "AdmissionInflight", "Dimensions": dimensions, "Value": average_inflight, "Unit": "Count"},
+            {"MetricName": "AdmissionPeakInflight", "Dimensions": dimensions, "Value": peak_inflight, "Unit": "Count"},
+            {"MetricName": "AdmissionConcurrencyLimit", "Dimensions": dimensions, "Value": int(controller.limit),
+             "Unit": "Count"}
+        ]
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+def create_admission_controller(name: str) -> Optional[AdmissionController]:
+    """Build a controller with the environment's limits, or None when admission control is disabled"""
+    if not ADMISSION_ENABLED:
+        return None
+    return AdmissionController(name)
+
+def create_saturation_reporter(controller: Optional[AdmissionController], service: str) -> Optional[SaturationReporter]:
+    """Build a CloudWatch reporter when ADMISSION_METRICS_NAMESPACE is set, else None"""
+    if controller is None or not ADMISSION_METRICS_NAMESPACE:
+        return None
+    return SaturationReporter(controller, service, ADMISSION_METRICS_NAMESPACE, region_name = os.getenv("AWS_REGION"))
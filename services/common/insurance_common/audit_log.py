@@ -0,0 +1,382 @@
+import asyncio
+import io
+import logging
+import math
+import numbers
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Metrics
+AUDIT_RECORDS = Counter('audit_records_total', 'Decision audit records by outcome', ['outcome'])
+AUDIT_BUFFERED = Gauge('audit_records_buffered', 'Audit records held in memory, buffered or being flushed',
+                       multiprocess_mode = 'livesum')
+AUDIT_FLUSH_TIME = Histogram('audit_flush_seconds', 'Time spent encoding and writing an audit file')
+AUDIT_FLUSH_SIZE = Histogram('audit_flush_records', 'Records per audit file',
+                             buckets = (10, 100, 1000, 5000, 10000, 50000, 100000))
+
+# s3 or local; unset disables the audit log
+AUDIT_STORE = os.getenv("AUDIT_STORE", "")
+AUDIT_LOCAL_PATH = os.getenv("AUDIT_LOCAL_PATH", "audit")
+AUDIT_PREFIX = os.getenv("AUDIT_PREFIX", "audit/")
+AUDIT_FLUSH_RECORDS = int(os.getenv("AUDIT_FLUSH_RECORDS", "5000"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "30"))
+AUDIT_MAX_RECORDS = int(os.getenv("AUDIT_MAX_RECORDS", "100000"))
+AUDIT_OVERFLOW = os.getenv("AUDIT_OVERFLOW", "drop")  # drop, or block for up to AUDIT_BLOCK_TIMEOUT_MS
+AUDIT_BLOCK_TIMEOUT_MS = float(os.getenv("AUDIT_BLOCK_TIMEOUT_MS", "50"))
+
+INT64_RANGE = (-2 ** 63, 2 ** 63 - 1)
+
+def coerce_string(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, float) and math.isnan(value):
+        # A missing value in a pandas column
+        return None
+    if isinstance(value, numbers.Number):
+        return str(value)
+    raise TypeError(f"expected a string, got {type(value).__name__}")
+
+def coerce_float(value):
+    if value is None or type(value) is float:
+        return value
+    if isinstance(value, numbers.Real):
+        return float(value)
+    raise TypeError(f"expected a number, got {type(value).__name__}")
+
+def coerce_int(value):
+    if value is None:
+        return value
+    if isinstance(value, numbers.Integral):
+        value = int(value)
+    elif isinstance(value, float) and value.is_integer():
+        value = int(value)
+    else:
+        raise TypeError(f"expected an integer, got {value!r}")
+    if not INT64_RANGE[0] <= value <= INT64_RANGE[1]:
+        raise ValueError(f"{value} is out of the int64 range")
+    return value
+
+def coerce_bool(value):
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, numbers.Integral) and value in (0, 1):
+        return bool(value)
+    raise TypeError(f"expected a bool, got {value!r}")
+
+def coerce_string_list(value):
+    if value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [coerce_string(item) for item in value]
+    raise TypeError(f"expected a list of strings, got {type(value).__name__}")
+
+# Column types an audit schema may use, as Arrow types, with the function that
+# converts a recorded value to one Arrow can encode or raises TypeError/ValueError
+COLUMN_TYPES: Dict[str, Callable] = {
+    "string": coerce_string,
+    "float64": coerce_float,
+    "int64": coerce_int,
+    "bool": coerce_bool,
+    "list<string>": coerce_string_list
+}
+
+class LocalAuditStore:
+    """
+    Audit files under a local directory, a stand-in for the audit bucket. Files
+    are written to a temporary name and renamed, so readers never see a partial one.
+    """
+    def __init__(self, root: str):
+        self.root = root
+
+    async def put(self, key: str, data: bytes):
+        await asyncio.to_thread(self._write, os.path.join(self.root, key), data)
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(data)
+        os.replace(temporary_path, path)
+
+    async def close(self):
+        pass
+
+class S3AuditStore:
+    """
+    Audit files written to an S3 bucket through one aiobotocore client.
+    """
+    def __init__(self, bucket: str, region_name: Optional[str] = None):
+        self.bucket = bucket
+        self.region_name = region_name
+        self._client = None
+        self._context = None
+
+    async def put(self, key: str, data: bytes):
+        if self._client is None:
+            from aiobotocore.session import get_session
+
+            self._context = get_session().create_client("s3", region_name = self.region_name)
+            self._client = await self._context.__aenter__()
+        await self._client.put_object(Bucket = self.bucket, Key = key, Body = data,
+                                      ContentType = "application/vnd.apache.parquet")
+
+    async def close(self):
+        if self._context is not None:
+            await self._context.__aexit__(None, None, None)
+            self._client = None
+
+class AuditLog:
+    """
+    Append-only log of decisions, written as zstd-compressed Parquet files.
+
+    record() and record_many() append decisions to in-memory column lists and
+    never do I/O. Values are converted to their column's type as they are
+    recorded, and a record with a value that can't be is rejected on its own,
+    so one bad record never costs the rest of its file. A background task swaps the columns out once flush_records are
+    buffered or flush_interval seconds have passed, encodes them in a thread and
+    writes the file to the store, one flush at a time. Each record gets a
+    decided_at timestamp column. Files are keyed
+    <prefix><service>/date=YYYY-MM-DD/<time>-<id>.parquet for partitioned queries.
+
+    At most max_records are held, counting records buffered, being flushed and
+    waiting for a retried write. When full, the overflow policy either drops new
+    records or blocks the caller until a flush makes room, dropping after
+    block_timeout_ms. Failed writes are retried on the next flush, so a store
+    outage fills the log and then triggers the overflow policy. stop() flushes
+    everything still held.
+    """
+    def __init__(self, service: str, columns: Dict[str, str], store, prefix: str = AUDIT_PREFIX,
+                 flush_records: int = AUDIT_FLUSH_RECORDS, flush_interval: float = AUDIT_FLUSH_INTERVAL,
+                 max_records: int = AUDIT_MAX_RECORDS, overflow: str = AUDIT_OVERFLOW,
+                 block_timeout_ms: float = AUDIT_BLOCK_TIMEOUT_MS):
+        for name, column_type in columns.items():
+            if column_type not in COLUMN_TYPES:
+                raise ValueError(f"Unsupported audit column type {column_type} for {name}")
+        if overflow not in ("drop", "block"):
+            raise ValueError(f"Unknown audit overflow policy {overflow}")
+        self.service = service
+        self.columns = {**columns, "decided_at": "timestamp"}
+        self._coercers = {name: COLUMN_TYPES[column_type] for name, column_type in columns.items()}
+        self.store = store
+        self.prefix = prefix
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.max_records = max_records
+        self.overflow = overflow
+        self.block_timeout = block_timeout_ms / 1000
+        self._buffer = self._empty_buffer()
+        self._buffered = 0
+        self._held = 0  # Buffered plus being flushed or awaiting a retried write
+        self._failed: List[tuple] = []  # (key, encoded file, records)
+        self._flush_requested = asyncio.Event()
+        self._space = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    def _empty_buffer(self) -> Dict[str, list]:
+        return {name: [] for name in self.columns}
+
+    async def record(self, **values):
+        """Buffer one decision; columns not given are null"""
+        try:
+            row = {name: coerce(values.get(name)) for name, coerce in self._coercers.items()}
+        except (TypeError, ValueError) as e:
+            self._reject(1, e)
+            return
+        if self._held >= self.max_records and not await self._wait_for_space():
+            AUDIT_RECORDS.labels(outcome = "dropped").inc()
+            return
+        row["decided_at"] = int(time.time() * 1000)
+        for name, column in self._buffer.items():
+            column.append(row[name])
+        self._buffered += 1
+        self._held += 1
+        AUDIT_RECORDS.labels(outcome = "buffered").inc()
+        AUDIT_BUFFERED.set(self._held)
+        if self._buffered >= self.flush_records:
+            self._flush_requested.set()
+
+    async def record_many(self, count: int, **columns):
+        """Buffer count decisions given as column sequences; columns not given are null"""
+        columns, count = self._coerce_columns(count, columns)
+        offset = 0
+        while offset < count:
+            if self._held >= self.max_records and not await self._wait_for_space():
+                AUDIT_RECORDS.labels(outcome = "dropped").inc(count - offset)
+                return
+            end = min(count, offset + self.max_records - self._held)
+            decided_at = int(time.time() * 1000)
+            for name, column in self._buffer.items():
+                if name == "decided_at":
+                    column.extend([decided_at] * (end - offset))
+                elif name in columns:
+                    column.extend(columns[name][offset:end])
+                else:
+                    column.extend([None] * (end - offset))
+            self._buffered += end - offset
+            self._held += end - offset
+            AUDIT_RECORDS.labels(outcome = "buffered").inc(end - offset)
+            AUDIT_BUFFERED.set(self._held)
+            if self._buffered >= self.flush_records:
+                self._flush_requested.set()
+            offset = end
+
+    def _coerce_columns(self, count: int, columns: Dict[str, Sequence]) -> tuple:
+        """Columns converted to their types, without the records holding a value that can't be"""
+        coerced = {}
+        rejected = {}  # Row index to its first error
+        for name, values in columns.items():
+            coerce = self._coercers.get(name)
+            if coerce is None:
+                continue
+            column = coerced[name] = []
+            for index, value in enumerate(values[:count]):
+                try:
+                    column.append(coerce(value))
+                except (TypeError, ValueError) as e:
+                    column.append(None)
+                    rejected.setdefault(index, e)
+        if not rejected:
+            return coerced, count
+        self._reject(len(rejected), next(iter(rejected.values())))
+        kept = [index for index in range(count) if index not in rejected]
+        return {name: [column[index] for index in kept] for name, column in coerced.items()}, len(kept)
+
+    def _reject(self, records: int, error: Exception):
+        logging.error(f"Rejected {records} audit records for {self.service}: {str(error)}")
+        AUDIT_RECORDS.labels(outcome = "rejected").inc(records)
+
+    async def _wait_for_space(self) -> bool:
+        if self.overflow == "drop":
+            return False
+        self._flush_requested.set()
+        deadline = time.monotonic() + self.block_timeout
+        while self._held >= self.max_records:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self._space.clear()
+            try:
+                await asyncio.wait_for(self._space.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f"Error flushing audit log: {str(e)}")
+
+    async def flush(self):
+        """Write buffered records, and retry earlier failed writes, off the event loop"""
+        async with self._lock:
+            failed, self._failed = self._failed, []
+            for key, data, records in failed:
+                await self._write(key, data, records)
+
+            if not self._buffered:
+                return
+            buffer, records = self._buffer, self._buffered
+            self._buffer, self._buffered = self._empty_buffer(), 0
+
+            start_time = time.perf_counter()
+            try:
+                data = await asyncio.to_thread(encode_parquet, buffer, self.columns)
+            except Exception as e:
+                # Values are coerced when recorded, so this is a bug rather than bad data;
+                # the batch would fail every retry, so it is counted and dropped
+                logging.error(f"Error encoding {records} audit records: {str(e)}")
+                AUDIT_RECORDS.labels(outcome = "failed").inc(records)
+                self._release(records)
+                return
+            AUDIT_FLUSH_SIZE.observe(records)
+            await self._write(self._key(), data, records)
+            AUDIT_FLUSH_TIME.observe(time.perf_counter() - start_time)
+
+    async def _write(self, key: str, data: bytes, records: int):
+        try:
+            await self.store.put(key, data)
+        except Exception as e:
+            # Kept for the next flush; the records still count against max_records
+            logging.error(f"Error writing audit file {key}: {str(e)}")
+            self._failed.append((key, data, records))
+            return
+        AUDIT_RECORDS.labels(outcome = "written").inc(records)
+        self._release(records)
+
+    def _release(self, records: int):
+        self._held -= records
+        AUDIT_BUFFERED.set(self._held)
+        self._space.set()
+
+    def _key(self) -> str:
+        now = datetime.now(timezone.utc)
+        return (f"{self.prefix}{self.service}/date={now:%Y-%m-%d}/"
+                f"{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:12]}.parquet")
+
+    async def stop(self):
+        """Stop the flush task and write everything still held"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+        for key, _, records in self._failed:
+            logging.error(f"Audit file {key} with {records} records not written before shutdown")
+            AUDIT_RECORDS.labels(outcome = "failed").inc(records)
+        self._failed = []
+        await self.store.close()
+
+def warm_parquet_writer():
+    """Encode one record so the first flush doesn't pay pyarrow's import and codec setup"""
+    encode_parquet({"decided_at": [0]}, {"decided_at": "timestamp"})
+
+def encode_parquet(buffer: Dict[str, list], columns: Dict[str, str]) -> bytes:
+    """Encode column lists as a zstd-compressed Parquet file"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {
+        "string": pa.string(),
+        "float64": pa.float64(),
+        "int64": pa.int64(),
+        "bool": pa.bool_(),
+        "list<string>": pa.list_(pa.string()),
+        "timestamp": pa.timestamp("ms", tz = "UTC")
+    }
+    table = pa.table({name: pa.array(buffer[name], type = types[column_type]) for name, column_type in columns.items()})
+    sink = io.BytesIO()
+    pq.write_table(table, sink, compression = "zstd")
+    return sink.getvalue()
+
+def create_audit_log(service: str, columns: Dict[str, str]) -> Optional[AuditLog]:
+    """Build the audit log for AUDIT_STORE (s3 or local), or None when decisions aren't audited"""
+    if not AUDIT_STORE:
+        return None
+    if AUDIT_STORE == "s3":
+        store = S3AuditStore(os.environ["S3_BUCKET"], region_name = os.getenv("AWS_REGION"))
+    elif AUDIT_STORE == "local":
+        store = LocalAuditStore(AUDIT_LOCAL_PATH)
+    else:
+        raise ValueError(f"Unknown AUDIT_STORE {AUDIT_STORE}")
+
+    logging.info(f"Auditing {service} decisions to the {AUDIT_STORE} audit store")
+    return AuditLog(service, columns, store)
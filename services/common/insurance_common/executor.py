@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Metrics
+EXECUTOR_QUEUE_DEPTH = Gauge('scoring_executor_queue_depth', 'Tasks queued or running in the scoring executor', ['executor'],
+                             multiprocess_mode = 'livesum')
+EXECUTOR_REJECTED = Counter('scoring_executor_rejected_total', 'Tasks shed because the scoring executor was saturated', ['executor'])
+EXECUTOR_TASK_TIME = Histogram('scoring_executor_task_seconds', 'Time from submitting a scoring task to its result', ['executor'],
+                               buckets = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5))
+
+# Defaults, overridable per service through the environment
+SCORING_EXECUTOR = os.getenv("SCORING_EXECUTOR", "thread")  # inline, thread or process
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", "2"))
+SCORING_MAX_QUEUE = int(os.getenv("SCORING_MAX_QUEUE", "64"))
+SCORING_QUEUE_TIMEOUT_MS = float(os.getenv("SCORING_QUEUE_TIMEOUT_MS", "100"))
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+WARMUP_TIMEOUT = 60
+
+class ExecutorOverloaded(Exception):
+    """Raised when a task cannot be queued before the queue timeout"""
+    # A batch shed for load should fail as a whole, not be retried item by item
+    batch_retry = False
+
+def warm_worker(delay: float) -> int:
+    """Pre-warm task: holds its worker briefly so each task lands on a different one"""
+    time.sleep(delay)
+    return os.getpid()
+
+class ScoringExecutor:
+    """
+    Runs CPU-bound scoring off the event loop so handlers and health checks stay
+    responsive. "thread" mode uses a thread pool (NumPy and model inference release
+    the GIL for much of their work); "process" mode uses spawned worker processes
+    to use every vCPU, so task functions and arguments must be picklable and live
+    at module level. Each worker process imports its own copy of the service's
+    modules, so state the service can change after startup, such as a reloaded
+    rule set, must travel with each task instead of being read from a global.
+    "inline" runs tasks on the event loop as before.
+
+    At most max_queue tasks are queued or running; further callers wait up to
+    queue_timeout_ms for room and then get ExecutorOverloaded.
+    """
+    def __init__(self, name: str, mode: str = SCORING_EXECUTOR, workers: int = SCORING_WORKERS,
+                 max_queue: int = SCORING_MAX_QUEUE, queue_timeout_ms: float = SCORING_QUEUE_TIMEOUT_MS,
+                 initializer: Optional[Callable] = None):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown scoring executor mode {mode}")
+        self.name = name
+        self.mode = mode
+        self.workers = workers
+        self.queue_timeout = queue_timeout_ms / 1000
+        self.initializer = initializer
+        self._capacity = asyncio.Semaphore(max_queue)
+        self._outstanding = 0
+        self._pool = None
+
+    async def start(self):
+        """Create the pool and start every worker before traffic arrives"""
+        if self.mode == "inline" or self._pool is not None:
+            return
+        start_time = time.perf_counter()
+        if self.mode == "thread":
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix = f"{self.name}-scoring",
+                                            initializer = self.initializer)
+        else:
+            # Spawned rather than forked: the parent already runs threads and an event loop
+            self._pool = ProcessPoolExecutor(self.workers, mp_context = multiprocessing.get_context("spawn"),
+                                             initializer = self.initializer)
+        loop = asyncio.get_running_loop()
+        warmups = [loop.run_in_executor(self._pool, warm_worker, 0.05) for _ in range(self.workers)]
+        await asyncio.wait_for(asyncio.gather(*warmups), WARMUP_TIMEOUT)
+        logging.info(f"Started {self.workers} {self.mode} scoring workers for {self.name} "
+                     f"in {time.perf_counter() - start_time:.2f}s")
+
+    async def run(self, fn: Callable, *args):
+        """Run fn(*args) in the pool and wait for its result"""
+        if self.mode == "inline" or self._pool is None:
+            return fn(*args)
+
+        try:
+            await asyncio.wait_for(self._capacity.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            EXECUTOR_REJECTED.labels(executor = self.name).inc()
+            raise ExecutorOverloaded(f"{self.name} scoring executor is saturated")
+
+        self._outstanding += 1
+        EXECUTOR_QUEUE_DEPTH.labels(executor = self.name).set(self._outstanding)
+        start_time = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            EXECUTOR_TASK_TIME.labels(executor = self.name).observe(time.perf_counter() - start_time)
+            self._outstanding -= 1
+            EXECUTOR_QUEUE_DEPTH.labels(executor = self.name).set(self._outstanding)
+            self._capacity.release()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait = False, cancel_futures = True)
+            self._pool = None
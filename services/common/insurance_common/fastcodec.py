@@ -0,0 +1,141 @@
+import inspect
+import logging
+import os
+import typing
+from typing import Any, Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Decode request bodies into slotted records instead of Pydantic models where an endpoint opts in
+FAST_DECODE = os.getenv("FAST_DECODE", "true").lower() == "true"
+
+JSON_TYPES = ("application/json", "")
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+_records = {}
+_decoders = {}
+
+def _record_annotation(annotation):
+    """The annotation with every Pydantic model in it replaced by its record"""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return fast_record(annotation)
+    args = typing.get_args(annotation)
+    if not args:
+        return annotation
+    origin = typing.get_origin(annotation)
+    args = tuple(_record_annotation(arg) for arg in args)
+    return typing.Union[args] if origin is typing.Union else origin[args]
+
+def fast_record(model: type) -> Optional[type]:
+    """
+    msgspec Struct mirroring a Pydantic model's fields: a slotted C record that
+    msgspec decodes from JSON or msgpack in one pass without building a model.
+    Rule functions read it through the same attribute names. It is named
+    <Model>Record in the model's module; assign it to that name at module level
+    so process pools can pickle it. None when msgspec isn't installed.
+    """
+    if msgspec is None:
+        return None
+    if model not in _records:
+        fields = []
+        for name, info in model.model_fields.items():
+            annotation = _record_annotation(info.annotation)
+            fields.append((name, annotation) if info.is_required() else (name, annotation, info.default))
+        _records[model] = msgspec.defstruct(f"{model.__name__}Record", fields, module = model.__module__)
+    return _records[model]
+
+def _decoder(record: type, msgpack: bool):
+    key = (record, msgpack)
+    if key not in _decoders:
+        # Not strict, so numeric strings and timestamps convert as in Pydantic's lax mode
+        _decoders[key] = (msgspec.msgpack if msgpack else msgspec.json).Decoder(record, strict = False)
+    return _decoders[key]
+
+def decode_record(record: Optional[type], model: type, body: bytes, content_type: str = "application/json"):
+    """
+    Decode a body into a record, or into the Pydantic model when the record
+    rejects it. Inputs only Pydantic accepts (date-only datetimes, say) still
+    work, and errors are Pydantic's ValidationError. Raises ValueError for
+    undecodable msgpack.
+    """
+    msgpack = content_type in MSGPACK_TYPES
+    if record is not None:
+        try:
+            return _decoder(record, msgpack).decode(body)
+        except (msgspec.ValidationError, msgspec.DecodeError):
+            pass
+    if msgpack:
+        try:
+            data = msgspec.msgpack.decode(body)
+        except msgspec.DecodeError as e:
+            raise ValueError(f"Invalid msgpack body: {str(e)}")
+        return model.model_validate(data)
+    return model.model_validate_json(body)
+
+def _encode_hook(value):
+    # NumPy scalars that slip into a result
+    if hasattr(value, "item"):
+        return value.item()
+    raise NotImplementedError(f"Cannot encode {type(value).__name__}")
+
+def encode_response(content: Any, accept: str, status_code: int = 200) -> Response:
+    """Serialize a handler's result straight to bytes, as msgpack when the client accepts it"""
+    if any(media_type in accept for media_type in MSGPACK_TYPES):
+        return Response(msgspec.msgpack.encode(content, enc_hook = _encode_hook), status_code = status_code,
+                        media_type = MSGPACK_TYPES[0])
+    return Response(msgspec.json.encode(content, enc_hook = _encode_hook), status_code = status_code,
+                    media_type = "application/json")
+
+def fast_decode(record: Optional[type]):
+    """Let FastDecodeRoute pass the endpoint's body parameter as this record"""
+    def decorator(endpoint):
+        endpoint.fast_decode_record = record
+        return endpoint
+    return decorator
+
+class FastDecodeRoute(APIRoute):
+    """
+    Route that decodes JSON and msgpack bodies of @fast_decode endpoints into
+    records and writes the returned dict straight to the response, skipping
+    FastAPI's body parsing, model validation, jsonable_encoder and response_model
+    copies. Other endpoints and content types take the standard FastAPI path.
+    """
+    def get_route_handler(self) -> Callable:
+        default_handler = super().get_route_handler()
+        record = getattr(self.endpoint, "fast_decode_record", None)
+        if record is None or not FAST_DECODE:
+            return default_handler
+
+        endpoint = self.endpoint
+        parameter = next(iter(inspect.signature(endpoint).parameters.values()))
+        model = parameter.annotation
+        status_code = self.status_code or 200
+
+        async def handler(request: Request) -> Response:
+            content_type = request.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+            if content_type not in JSON_TYPES and content_type not in MSGPACK_TYPES:
+                return await default_handler(request)
+            body = await request.body()
+            if not body:
+                return await default_handler(request)
+            try:
+                value = decode_record(record, model, body, content_type)
+            except ValueError as e:
+                # Same 422 response FastAPI gives for an invalid body
+                errors = e.errors(include_url = False) if hasattr(e, "errors") else [
+                    {"type": "value_error", "loc": (), "msg": str(e), "input": {}}]
+                raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in errors])
+            return encode_response(await endpoint(**{parameter.name: value}), request.headers.get("accept", ""),
+                                   status_code)
+        return handler
+
+if FAST_DECODE and msgspec is None:
+    logging.warning("msgspec is not installed; request bodies are decoded with Pydantic")
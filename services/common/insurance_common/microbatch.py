@@ -0,0 +1,136 @@
+import asyncio
+import inspect
+import logging
+import os
+import time
+from typing import Callable, List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Metrics
+MICROBATCH_SIZE = Histogram('microbatch_size', 'Items per micro-batch call', ['batcher'],
+                            buckets = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512))
+MICROBATCH_QUEUE_WAIT = Histogram('microbatch_queue_wait_seconds', 'Time items wait before their batch runs', ['batcher'],
+                                  buckets = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1))
+MICROBATCH_QUEUE_DEPTH = Gauge('microbatch_queue_depth', 'Items submitted and not yet answered', ['batcher'],
+                               multiprocess_mode = 'livesum')
+MICROBATCH_REJECTED = Counter('microbatch_rejected_total', 'Items rejected because the queue was full', ['batcher'])
+
+# Defaults, overridable per service through the environment
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "true").lower() == "true"
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2"))
+MICROBATCH_MAX_QUEUE = int(os.getenv("MICROBATCH_MAX_QUEUE", "1024"))
+MICROBATCH_QUEUE_TIMEOUT_MS = float(os.getenv("MICROBATCH_QUEUE_TIMEOUT_MS", "100"))
+
+class BatcherOverloaded(Exception):
+    """Raised when an item cannot be queued before the queue timeout"""
+
+class MicroBatcher:
+    """
+    Collects items submitted by concurrent requests and processes them with one
+    call of process_batch once max_batch_size items are waiting or max_wait_ms has
+    passed since the first one arrived. process_batch takes a list of items and
+    returns a list of results in the same order, and may be sync or async.
+
+    At most max_queue items are outstanding; further submitters wait up to
+    queue_timeout_ms for room and then get BatcherOverloaded. When a batch fails,
+    its items are retried one by one unless the error sets batch_retry = False.
+    """
+    def __init__(self, name: str, process_batch: Callable, max_batch_size: int = MICROBATCH_MAX_SIZE,
+                 max_wait_ms: float = MICROBATCH_MAX_WAIT_MS, max_queue: int = MICROBATCH_MAX_QUEUE,
+                 queue_timeout_ms: float = MICROBATCH_QUEUE_TIMEOUT_MS):
+        self.name = name
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue_timeout = queue_timeout_ms / 1000
+        self._capacity = asyncio.Semaphore(max_queue)
+        self._pending = []  # (item, future, submitted_at)
+        self._flush_handle = None
+        self._outstanding = 0
+        self._tasks = set()
+
+    async def submit(self, item):
+        """Queue an item and wait for its result"""
+        try:
+            await asyncio.wait_for(self._capacity.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            MICROBATCH_REJECTED.labels(batcher = self.name).inc()
+            raise BatcherOverloaded(f"{self.name} queue is full")
+
+        self._outstanding += 1
+        MICROBATCH_QUEUE_DEPTH.labels(batcher = self.name).set(self._outstanding)
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending.append((item, future, time.perf_counter()))
+
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.max_wait, self._flush)
+            return await future
+        finally:
+            self._outstanding -= 1
+            MICROBATCH_QUEUE_DEPTH.labels(batcher = self.name).set(self._outstanding)
+            self._capacity.release()
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            # Keep a reference so the task isn't garbage collected mid-flight
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[tuple]):
+        started_at = time.perf_counter()
+        MICROBATCH_SIZE.labels(batcher = self.name).observe(len(batch))
+        for _, _, submitted_at in batch:
+            MICROBATCH_QUEUE_WAIT.labels(batcher = self.name).observe(started_at - submitted_at)
+
+        items = [item for item, _, _ in batch]
+        try:
+            results = await self._call(items)
+        except Exception as e:
+            if len(batch) == 1 or not getattr(e, "batch_retry", True):
+                for _, future, _ in batch:
+                    self._resolve(future, exception = e)
+                return
+            # Retry one by one so a single bad item doesn't fail its neighbours
+            logging.error(f"Error in {self.name} batch of {len(batch)}, retrying individually: {str(e)}")
+            for item, future, _ in batch:
+                try:
+                    self._resolve(future, result = (await self._call([item]))[0])
+                except Exception as item_error:
+                    self._resolve(future, exception = item_error)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            self._resolve(future, result = result)
+
+    async def _call(self, items: list) -> list:
+        results = self.process_batch(items)
+        if inspect.isawaitable(results):
+            results = await results
+        return results
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result = None, exception: Optional[BaseException] = None):
+        # The submitter may have been cancelled while waiting
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+def create_batcher(name: str, process_batch: Callable) -> Optional[MicroBatcher]:
+    """Build a batcher with the environment's limits, or None when micro-batching is disabled"""
+    if not MICROBATCH_ENABLED:
+        return None
+    return MicroBatcher(name, process_batch)
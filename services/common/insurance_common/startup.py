@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+from prometheus_client import Gauge
+
+# Metrics
+STARTUP_TIME = Gauge('service_startup_seconds', 'Time spent in each startup phase', ['phase'],
+                     multiprocess_mode = 'max')
+
+# Set by the dockerfile when gunicorn imports the app once with --preload before forking workers
+STARTUP_PRELOAD = os.getenv("STARTUP_PRELOAD", "false").lower() == "true"
+
+def process_uptime() -> Optional[float]:
+    """Seconds since this process started, from /proc, or None where that isn't available"""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesised command name; starttime is field 22 overall
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+class StartupTracker:
+    """
+    Startup steps, their timings and readiness for one service.
+
+    Preload steps load state every worker shares: models, tables and heavy
+    imports. Under gunicorn --preload (STARTUP_PRELOAD) they run once in the
+    master when the app is imported, so forked workers start with that state
+    already in memory. Otherwise each worker runs them in the background after
+    startup, keeping them off the import path. Warm-up steps pay first-call costs
+    and always run in each worker after startup, since libraries such as OpenMP
+    runtimes don't survive a fork once used.
+
+    The worker reports ready once every step has finished; a failed step keeps
+    it unready so the load balancer never routes to it.
+    """
+    def __init__(self, service: str):
+        self.service = service
+        self.phases: Dict[str, float] = {}
+        self.failed: Dict[str, str] = {}
+        self.preloaded = False
+        self._steps: List[Tuple[str, Callable, bool]] = []
+        self._pending: List[str] = []
+        self._serving = False
+        self._task = None
+
+    def step(self, name: str, fn: Callable, preload: bool = True):
+        """Register a synchronous startup step; preload steps may run before the fork"""
+        self._steps.append((name, fn, preload))
+        self._pending.append(name)
+
+    @property
+    def ready(self) -> bool:
+        return self._serving and not self._pending and not self.failed
+
+    def finish_imports(self, app: FastAPI):
+        """
+        Call at the end of the app module: records import time, runs preload steps
+        when preloading, and schedules the remaining steps after worker startup.
+        """
+        self._record("imports", process_uptime())
+        if STARTUP_PRELOAD:
+            for name, fn, preload in self._steps:
+                if preload:
+                    self._run(name, fn)
+            self.preloaded = True
+
+        # Registered last, so it runs once every other startup hook has finished
+        @app.on_event("startup")
+        async def start_background_steps():
+            self._record("startup", process_uptime())
+            self._serving = True
+            self._task = asyncio.create_task(self._run_remaining())
+
+        @app.on_event("shutdown")
+        async def stop_background_steps():
+            if self._task is not None:
+                self._task.cancel()
+
+    async def _run_remaining(self):
+        for name, fn, preload in self._steps:
+            if name in self._pending:
+                await asyncio.to_thread(self._run, name, fn)
+        if self.ready:
+            self._record("ready", process_uptime())
+            logging.info(f"{self.service} ready: {self.phases}")
+
+    def _run(self, name: str, fn: Callable):
+        start_time = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            logging.error(f"Startup step {name} failed: {str(e)}")
+            self.failed[name] = str(e)
+        else:
+            self._record(f"step.{name}", time.perf_counter() - start_time)
+        finally:
+            self._pending.remove(name)
+
+    def _record(self, phase: str, seconds: Optional[float]):
+        if seconds is None:
+            return
+        self.phases[phase] = round(seconds, 4)
+        STARTUP_TIME.labels(phase = phase).set(seconds)
+
+    def report(self) -> dict:
+        """Readiness and the startup-time breakdown of this worker"""
+        if self.failed:
+            status = "failed"
+        else:
+            status = "ready" if self.ready else "starting"
+        return {
+            "status": status,
+            "service": self.service,
+            "pid": os.getpid(),
+            "preloaded": self.preloaded,
+            "startup_seconds": self.phases,
+            "pending": list(self._pending),
+            "failed": self.failed
+        }
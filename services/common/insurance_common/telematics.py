@@ -0,0 +1,879 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+from typing import IO, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+# Metrics
+TELEMATICS_EVENTS = Counter('telematics_events_total', 'Telematics and home sensor events consumed', ['result'])
+TELEMATICS_ERRORS = Counter('telematics_consumer_errors_total', 'Telematics consumer failures', ['stage'])
+TELEMATICS_POLICIES = Gauge('telematics_policies', 'Policies with telematics features held in memory',
+                            multiprocess_mode = 'max')
+TELEMATICS_LAG = Gauge('telematics_consumer_lag_seconds', 'Age of the newest event in the last applied batch',
+                       multiprocess_mode = 'max')
+
+# kinesis, file or queue; unset leaves every policy without telematics features
+TELEMATICS_SOURCE = os.getenv("TELEMATICS_SOURCE", "")
+TELEMATICS_STREAM_NAME = os.getenv("TELEMATICS_STREAM_NAME", "iot-data-stream")
+TELEMATICS_KINESIS_START = os.getenv("TELEMATICS_KINESIS_START", "TRIM_HORIZON")  # Shards without a checkpoint
+# Kinesis allows 5 GetRecords calls per second per shard, shared by every consumer of the stream
+TELEMATICS_SHARD_POLL_INTERVAL = float(os.getenv("TELEMATICS_SHARD_POLL_INTERVAL", "1"))
+TELEMATICS_THROTTLE_MAX_BACKOFF = float(os.getenv("TELEMATICS_THROTTLE_MAX_BACKOFF", "30"))
+TELEMATICS_FILE_PATH = os.getenv("TELEMATICS_FILE_PATH", "telematics_events.ndjson")
+TELEMATICS_BATCH_SIZE = int(os.getenv("TELEMATICS_BATCH_SIZE", "1000"))
+TELEMATICS_POLL_INTERVAL = float(os.getenv("TELEMATICS_POLL_INTERVAL", "1"))
+TELEMATICS_MAX_POLICIES = int(os.getenv("TELEMATICS_MAX_POLICIES", "100000"))
+# local, or s3 for a key in S3_BUCKET that outlives the task; TELEMATICS_CHECKPOINT_PATH unset disables checkpoints
+TELEMATICS_CHECKPOINT_STORE = os.getenv("TELEMATICS_CHECKPOINT_STORE", "local")
+TELEMATICS_CHECKPOINT_PATH = os.getenv("TELEMATICS_CHECKPOINT_PATH")
+TELEMATICS_CHECKPOINT_INTERVAL = float(os.getenv("TELEMATICS_CHECKPOINT_INTERVAL", "60"))
+# Where the consuming worker publishes its features to the other workers, by default <tmp>/<service>-telematics
+TELEMATICS_SHARED_PATH = os.getenv("TELEMATICS_SHARED_PATH")
+TELEMATICS_SHARE_INTERVAL = float(os.getenv("TELEMATICS_SHARE_INTERVAL", "15"))
+# DynamoDB table of leases electing the one task per service that consumes the stream; unset, every task consumes
+TELEMATICS_LEASE_TABLE = os.getenv("TELEMATICS_LEASE_TABLE", "")
+TELEMATICS_LEASE_SECONDS = float(os.getenv("TELEMATICS_LEASE_SECONDS", "30"))
+
+# Rolling window of one-day buckets, and the per-day sums kept in each bucket
+TELEMATICS_DAYS = 30
+DAY_SECONDS = 86400
+METRICS = ("events", "miles", "harsh_braking", "water_leaks")
+EVENTS, MILES, HARSH_BRAKING, WATER_LEAKS = range(len(METRICS))
+ROW_BUCKETS = len(METRICS) * TELEMATICS_DAYS
+
+TELEMATICS_FEATURES = (
+    "telematics_events_30d",
+    "telematics_miles_30d",
+    "telematics_harsh_braking_30d",
+    "telematics_harsh_braking_per_100mi",
+    "water_leak_alerts_30d"
+)
+
+CHECKPOINT_FORMAT_VERSION = 2
+
+def parse_event(data: bytes) -> Optional[Tuple[str, float, tuple]]:
+    """
+    (policy_id, timestamp, per-metric amounts) from one device message, or None
+    when it isn't usable. Vehicle telematics messages report distance_miles and
+    harsh_braking_events since the last message; home sensor messages report
+    water_leak (or alert = "water_leak"). timestamp is epoch seconds or ISO 8601,
+    defaulting to the time the message is read.
+    """
+    try:
+        event = json.loads(data)
+        policy_id = event.get("policy_id")
+        if not policy_id:
+            return None
+        timestamp = event.get("timestamp")
+        if timestamp is None:
+            timestamp = time.time()
+        elif isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+        harsh_braking = event.get("harsh_braking_events", 0)
+        water_leak = event.get("water_leak") or event.get("alert") == "water_leak"
+        return str(policy_id), float(timestamp), (1.0, float(event.get("distance_miles", 0)), float(harsh_braking),
+                                                  1.0 if water_leak else 0.0)
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+def aggregate_events(records: List[bytes]) -> Tuple[Dict[Tuple[str, int], list], float, int]:
+    """
+    Sum a batch of raw messages per policy and day, so the store is updated once
+    per policy-day rather than once per message. Returns the sums, the newest
+    event timestamp and the number of unusable messages.
+    """
+    totals = {}
+    newest = 0.0
+    invalid = 0
+    for data in records:
+        parsed = parse_event(data)
+        if parsed is None:
+            invalid += 1
+            continue
+        policy_id, timestamp, amounts = parsed
+        key = (policy_id, int(timestamp // DAY_SECONDS))
+        sums = totals.get(key)
+        if sums is None:
+            totals[key] = list(amounts)
+        else:
+            for metric, amount in enumerate(amounts):
+                sums[metric] += amount
+        newest = max(newest, timestamp)
+    return totals, newest, invalid
+
+class TelematicsFeatureStore:
+    """
+    Rolling 30-day telematics sums per policy in flat arrays: each policy owns a
+    row of one-day buckets per metric plus running totals, so reading a policy's
+    features is a dict lookup and a few array reads. Buckets that leave the
+    window are subtracted as a row advances to a new day. At most max_policies
+    rows are kept in LRU order of their last update; rows with no events in the
+    window are reused first.
+    """
+    def __init__(self, max_policies: int = TELEMATICS_MAX_POLICIES):
+        self.max_policies = max_policies
+        self._rows = OrderedDict()  # policy_id -> row
+        self._free: List[int] = []
+        self.heads = array("q")  # Latest day number per row
+        self.last_seen = array("d")  # Start of the newest event's day per row
+        self.buckets = array("f")  # Row-major: row, metric, day % TELEMATICS_DAYS
+        self.totals = array("d")  # Row-major: row, metric
+
+    def apply(self, totals: Dict[Tuple[str, int], list]) -> Tuple[int, int]:
+        """Add aggregate_events sums; returns (events applied, events outside the window)"""
+        now = time.time()
+        oldest_day = int(now // DAY_SECONDS) - TELEMATICS_DAYS
+        applied = late = 0
+        for (policy_id, day), amounts in totals.items():
+            if day <= oldest_day:
+                late += int(amounts[EVENTS])
+                continue
+            row = self._row(policy_id, now)
+            self._advance(row, day)
+            if day <= self.heads[row] - TELEMATICS_DAYS:
+                late += int(amounts[EVENTS])
+                continue
+            bucket_offset = row * ROW_BUCKETS + day % TELEMATICS_DAYS
+            total_offset = row * len(METRICS)
+            for metric, amount in enumerate(amounts):
+                self.buckets[bucket_offset + metric * TELEMATICS_DAYS] += amount
+                self.totals[total_offset + metric] += amount
+            self.last_seen[row] = max(self.last_seen[row], day * DAY_SECONDS)
+            applied += int(amounts[EVENTS])
+        TELEMATICS_POLICIES.set(len(self._rows))
+        return applied, late
+
+    def features(self, policy_id: str, timestamp: Optional[float] = None) -> dict:
+        """Telematics features for a policy as of timestamp, zero for policies without devices"""
+        row = self._rows.get(policy_id)
+        if row is None:
+            return dict.fromkeys(TELEMATICS_FEATURES, 0.0)
+        self._advance(row, int((time.time() if timestamp is None else timestamp) // DAY_SECONDS))
+        offset = row * len(METRICS)
+        # Running sums can drift a hair below zero as buckets are subtracted
+        events, miles, harsh_braking, water_leaks = (max(total, 0.0) for total in self.totals[offset:offset + len(METRICS)])
+        return {
+            "telematics_events_30d": events,
+            "telematics_miles_30d": miles,
+            "telematics_harsh_braking_30d": harsh_braking,
+            "telematics_harsh_braking_per_100mi": harsh_braking * 100 / miles if miles >= 1 else 0.0,
+            "water_leak_alerts_30d": water_leaks
+        }
+
+    def _row(self, policy_id: str, timestamp: float) -> int:
+        row = self._rows.get(policy_id)
+        if row is not None:
+            self._rows.move_to_end(policy_id)
+            return row
+        self._evict(timestamp)
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = len(self.heads)
+            self.heads.append(-1)
+            self.last_seen.append(0.0)
+            self.buckets.extend(array("f", [0.0]) * ROW_BUCKETS)
+            self.totals.extend(array("d", [0.0]) * len(METRICS))
+        self._rows[policy_id] = row
+        return row
+
+    def _evict(self, now: float):
+        # Least recently updated policies come first; reuse those with nothing left in the window
+        while self._rows:
+            policy_id, row = next(iter(self._rows.items()))
+            if self.last_seen[row] > now - TELEMATICS_DAYS * DAY_SECONDS and len(self._rows) < self.max_policies:
+                break
+            del self._rows[policy_id]
+            self._clear(row)
+            self._free.append(row)
+
+    def _clear(self, row: int):
+        self.heads[row] = -1
+        self.last_seen[row] = 0.0
+        self.buckets[row * ROW_BUCKETS:(row + 1) * ROW_BUCKETS] = array("f", [0.0]) * ROW_BUCKETS
+        self.totals[row * len(METRICS):(row + 1) * len(METRICS)] = array("d", [0.0]) * len(METRICS)
+
+    def _advance(self, row: int, day: int):
+        head = self.heads[row]
+        if day <= head:
+            return
+        if head < 0 or day - head >= TELEMATICS_DAYS:
+            last_seen = self.last_seen[row]
+            self._clear(row)
+            self.last_seen[row] = last_seen
+        else:
+            total_offset = row * len(METRICS)
+            for expired in range(head + 1, day + 1):
+                bucket_offset = row * ROW_BUCKETS + expired % TELEMATICS_DAYS
+                for metric in range(len(METRICS)):
+                    slot = bucket_offset + metric * TELEMATICS_DAYS
+                    self.totals[total_offset + metric] -= self.buckets[slot]
+                    self.buckets[slot] = 0.0
+        self.heads[row] = day
+
+    def snapshot_state(self) -> dict:
+        """Copy of the store contents for a checkpoint"""
+        return {
+            "days": TELEMATICS_DAYS,
+            "metrics": METRICS,
+            "rows": list(self._rows.items()),
+            "free": list(self._free),
+            "heads": self.heads.tobytes(),
+            "last_seen": self.last_seen.tobytes(),
+            "buckets": self.buckets.tobytes(),
+            "totals": self.totals.tobytes()
+        }
+
+    def restore_state(self, state: dict) -> int:
+        """Replace the store contents from snapshot_state output; returns the policies restored"""
+        if state["days"] != TELEMATICS_DAYS or tuple(state["metrics"]) != METRICS:
+            raise ValueError("Telematics checkpoint was written with a different feature layout")
+        self._rows = OrderedDict(state["rows"])
+        self._free = list(state["free"])
+        self.heads = array("q", state["heads"])
+        self.last_seen = array("d", state["last_seen"])
+        self.buckets = array("f", state["buckets"])
+        self.totals = array("d", state["totals"])
+        TELEMATICS_POLICIES.set(len(self._rows))
+        return len(self._rows)
+
+class EventSource:
+    """
+    Stream of raw device messages. A position is a JSON-serializable dict that
+    start() resumes after; read() returns a batch with the position just past it.
+    """
+    async def start(self, position: Optional[dict]):
+        pass
+
+    async def read(self, limit: int) -> Tuple[List[bytes], dict]:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+class QueueEventSource(EventSource):
+    """
+    In-process queue of messages, for tests and local runs. Messages are not
+    durable, so a restart never resumes from a checkpointed position.
+    """
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.consumed = 0
+
+    def put(self, data: bytes):
+        self.queue.put_nowait(data)
+
+    async def read(self, limit: int) -> Tuple[List[bytes], dict]:
+        records = []
+        while len(records) < limit and not self.queue.empty():
+            records.append(self.queue.get_nowait())
+        self.consumed += len(records)
+        return records, {"consumed": self.consumed}
+
+class FileEventSource(EventSource):
+    """
+    NDJSON file of device messages tailed like a stream, a local stand-in for
+    Kinesis. The position is the byte offset after the last complete line; a
+    file that shrinks is taken to be new and read from the start.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+
+    async def start(self, position: Optional[dict]):
+        self.offset = position.get("offset", 0) if position else 0
+
+    async def read(self, limit: int) -> Tuple[List[bytes], dict]:
+        records, self.offset = await asyncio.to_thread(self._read_lines, limit)
+        return records, {"offset": self.offset}
+
+    def _read_lines(self, limit: int) -> Tuple[List[bytes], int]:
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return [], self.offset
+        offset = self.offset if size >= self.offset else 0
+        records = []
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            while len(records) < limit:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break  # End of file, or a line still being written
+                offset += len(line)
+                if line.strip():
+                    records.append(line)
+        return records, offset
+
+class KinesisEventSource(EventSource):
+    """
+    Kinesis stream read shard by shard with GetRecords. The position is the last
+    sequence number read from each shard. Shards are polled concurrently, each at
+    most every min_interval seconds, leaving the per-shard read limit room for the
+    stream's other consumers. A throttled shard keeps its iterator and backs off,
+    doubling its interval up to max_backoff seconds until a read succeeds. Closed
+    shards are dropped and the shard list re-read to pick up their children.
+    """
+    def __init__(self, stream_name: str, region_name: Optional[str] = None,
+                 min_interval: float = TELEMATICS_SHARD_POLL_INTERVAL,
+                 max_backoff: float = TELEMATICS_THROTTLE_MAX_BACKOFF):
+        self.stream_name = stream_name
+        self.region_name = region_name
+        self.min_interval = min_interval
+        self.max_backoff = max_backoff
+        self.sequences: Dict[str, str] = {}
+        self._iterators: Dict[str, Optional[str]] = {}
+        self._next_poll: Dict[str, float] = {}
+        self._backoff: Dict[str, float] = {}
+        self._closed = set()
+        self.client = None
+        self._context = None
+
+    async def start(self, position: Optional[dict]):
+        from aiobotocore.session import get_session
+
+        self.sequences = dict(position.get("sequences", {})) if position else {}
+        self._context = get_session().create_client("kinesis", region_name = self.region_name)
+        self.client = await self._context.__aenter__()
+        await self._discover_shards()
+
+    async def _discover_shards(self):
+        request = {"StreamName": self.stream_name}
+        while True:
+            response = await self.client.list_shards(**request)
+            for shard in response["Shards"]:
+                shard_id = shard["ShardId"]
+                if shard_id not in self._iterators and shard_id not in self._closed:
+                    self._iterators[shard_id] = None
+                    self._next_poll[shard_id] = 0.0
+            if not response.get("NextToken"):
+                break
+            request = {"NextToken": response["NextToken"]}
+
+    async def read(self, limit: int) -> Tuple[List[bytes], dict]:
+        now = time.monotonic()
+        due = [shard_id for shard_id, next_poll in self._next_poll.items() if next_poll <= now]
+        batches = await asyncio.gather(*(self._read_shard(shard_id, limit) for shard_id in due))
+        if any(shard_id in self._closed for shard_id in due):
+            await self._discover_shards()
+        return [data for batch in batches for data in batch], {"sequences": dict(self.sequences)}
+
+    async def _read_shard(self, shard_id: str, limit: int) -> List[bytes]:
+        self._next_poll[shard_id] = time.monotonic() + self.min_interval
+        try:
+            iterator = self._iterators[shard_id]
+            if iterator is None:
+                iterator = await self._shard_iterator(shard_id)
+            response = await self.client.get_records(ShardIterator = iterator, Limit = limit)
+        except Exception as e:
+            if getattr(e, "response", {}).get("Error", {}).get("Code") == "ProvisionedThroughputExceededException":
+                backoff = min(self._backoff.get(shard_id, self.min_interval) * 2, self.max_backoff)
+                self._backoff[shard_id] = backoff
+                self._next_poll[shard_id] = time.monotonic() + backoff
+                TELEMATICS_ERRORS.labels(stage = "throttled").inc()
+                logging.warning(f"Kinesis shard {shard_id} throttled, next read in {backoff:.1f}s")
+                return []
+            # Expired iterators recover on a later poll from the last sequence read
+            self._iterators[shard_id] = None
+            TELEMATICS_ERRORS.labels(stage = "read").inc()
+            logging.error(f"Error reading Kinesis shard {shard_id}: {str(e)}")
+            return []
+
+        self._backoff.pop(shard_id, None)
+        records = response["Records"]
+        if records:
+            self.sequences[shard_id] = records[-1]["SequenceNumber"]
+        self._iterators[shard_id] = response.get("NextShardIterator")
+        if self._iterators[shard_id] is None:
+            # Shard closed by a split or merge and fully read
+            del self._iterators[shard_id]
+            del self._next_poll[shard_id]
+            self._closed.add(shard_id)
+        return [record["Data"] for record in records]
+
+    async def _shard_iterator(self, shard_id: str) -> str:
+        sequence = self.sequences.get(shard_id)
+        if sequence is not None:
+            start = {"ShardIteratorType": "AFTER_SEQUENCE_NUMBER", "StartingSequenceNumber": sequence}
+        else:
+            start = {"ShardIteratorType": TELEMATICS_KINESIS_START}
+        response = await self.client.get_shard_iterator(StreamName = self.stream_name, ShardId = shard_id, **start)
+        return response["ShardIterator"]
+
+    async def close(self):
+        if self._context is not None:
+            await self._context.__aexit__(None, None, None)
+            self._context = None
+
+class LocalCheckpointStore:
+    """
+    Checkpoints in a local file, written to a temporary name and renamed so a
+    crash never leaves a truncated one behind.
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    async def get(self) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read)
+
+    def _read(self) -> Optional[bytes]:
+        try:
+            with open(self.path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    async def put(self, data: bytes):
+        await asyncio.to_thread(self._write, data)
+
+    def _write(self, data: bytes):
+        temporary_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(data)
+        os.replace(temporary_path, self.path)
+
+    async def version(self) -> Optional[int]:
+        """Modification time of the file in nanoseconds, or None if there is none yet"""
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+class S3CheckpointStore:
+    """
+    Checkpoints as one object in S3, so the features outlive the task and its
+    ephemeral Fargate storage.
+    """
+    def __init__(self, bucket: str, key: str, region_name: Optional[str] = None):
+        self.bucket = bucket
+        self.key = key
+        self.region_name = region_name
+
+    async def get(self) -> Optional[bytes]:
+        from aiobotocore.session import get_session
+
+        async with get_session().create_client("s3", region_name = self.region_name) as client:
+            try:
+                response = await client.get_object(Bucket = self.bucket, Key = self.key)
+            except client.exceptions.ClientError as e:
+                if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                    return None
+                raise
+            async with response["Body"] as stream:
+                return await stream.read()
+
+    async def put(self, data: bytes):
+        from aiobotocore.session import get_session
+
+        async with get_session().create_client("s3", region_name = self.region_name) as client:
+            await client.put_object(Bucket = self.bucket, Key = self.key, Body = data)
+
+    async def version(self) -> Optional[str]:
+        """ETag of the object, or None if there is none yet"""
+        from aiobotocore.session import get_session
+
+        async with get_session().create_client("s3", region_name = self.region_name) as client:
+            try:
+                response = await client.head_object(Bucket = self.bucket, Key = self.key)
+            except client.exceptions.ClientError as e:
+                if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                    return None
+                raise
+            return response["ETag"]
+
+class DynamoDBLease:
+    """
+    Lease held by one task at a time, as an item in a DynamoDB table written with
+    conditional puts. The holder renews it every renew_interval seconds; another
+    task takes it once it has expired, so a task that dies without releasing it
+    is replaced within duration seconds.
+    """
+    def __init__(self, table: str, name: str, duration: float = TELEMATICS_LEASE_SECONDS,
+                 region_name: Optional[str] = None):
+        self.table = table
+        self.name = name
+        self.duration = duration
+        self.renew_interval = duration / 3
+        self.region_name = region_name
+        self.owner = uuid.uuid4().hex
+        self.expires_at = 0.0
+
+    async def acquire(self) -> bool:
+        """Take or renew the lease; False while another task holds it"""
+        from aiobotocore.session import get_session
+
+        now = time.time()
+        async with get_session().create_client("dynamodb", region_name = self.region_name) as client:
+            try:
+                await client.put_item(
+                    TableName = self.table,
+                    Item = {"lease_name": {"S": self.name}, "owner": {"S": self.owner},
+                            "expires_at": {"N": str(now + self.duration)}},
+                    ConditionExpression = "attribute_not_exists(lease_name) OR #owner = :owner OR expires_at < :now",
+                    ExpressionAttributeNames = {"#owner": "owner"},
+                    ExpressionAttributeValues = {":owner": {"S": self.owner}, ":now": {"N": str(now)}})
+            except client.exceptions.ConditionalCheckFailedException:
+                return False
+        self.expires_at = now + self.duration
+        return True
+
+    async def release(self):
+        from aiobotocore.session import get_session
+
+        self.expires_at = 0.0
+        async with get_session().create_client("dynamodb", region_name = self.region_name) as client:
+            try:
+                await client.delete_item(TableName = self.table, Key = {"lease_name": {"S": self.name}},
+                                         ConditionExpression = "#owner = :owner",
+                                         ExpressionAttributeNames = {"#owner": "owner"},
+                                         ExpressionAttributeValues = {":owner": {"S": self.owner}})
+            except client.exceptions.ConditionalCheckFailedException:
+                pass
+
+class TelematicsConsumer:
+    """
+    Consumes device messages from a source into a feature store. Each batch is
+    parsed and summed per policy-day off the event loop, then applied on it, so
+    request handlers read features without locking.
+
+    With a lease, one task per service consumes the stream and writes the
+    checkpoint: the task holding the lease, while the others load each new
+    checkpoint until one of them takes the lease over when it lapses. Without
+    one, every task consumes the whole stream.
+
+    With a shared_path, one worker process per task does the above: the worker
+    holding the lock on shared_path publishes its store and source position
+    there every share_interval seconds, and whenever it loads a new checkpoint,
+    and the others load each new copy until one of them takes over the lock when
+    that worker exits. Without one, every process consumes the whole stream into
+    its own store.
+
+    A checkpoint holds the store contents together with the source position
+    after the last applied batch, so a new task resumes where the features left
+    off. Stream retention (24 hours for the IoT stream) is shorter than the
+    feature window, so the 30-day features only survive a task replacement when
+    the checkpoint store does, as S3 does and Fargate's local storage doesn't.
+    """
+    def __init__(self, source: EventSource, store: TelematicsFeatureStore, batch_size: int = TELEMATICS_BATCH_SIZE,
+                 poll_interval: float = TELEMATICS_POLL_INTERVAL, checkpoint_store = None,
+                 checkpoint_interval: float = TELEMATICS_CHECKPOINT_INTERVAL, shared_path: Optional[str] = None,
+                 share_interval: float = TELEMATICS_SHARE_INTERVAL, lease: Optional[DynamoDBLease] = None):
+        self.source = source
+        self.store = store
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.checkpoint_store = checkpoint_store
+        self.checkpoint_interval = checkpoint_interval
+        self.shared = LocalCheckpointStore(shared_path) if shared_path else None
+        self.share_interval = share_interval
+        self.lease = lease
+        self.position: Optional[dict] = None
+        self._started = False
+        self._leading = False
+        self._shared_version = None
+        self._checkpoint_version = None
+        self._lock_file: Optional[IO] = None
+        self._task = None
+
+    async def start(self):
+        """Start consuming, or following the worker or task that does, in the background"""
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        if self.shared is not None:
+            await self._follow()
+        while True:
+            if self.lease is not None:
+                await self._await_lease()
+            await self._restore()
+            await self._consume()
+
+    async def _consume(self):
+        """Consume the source until this task loses its lease"""
+        # Keep retrying the source, so an unreachable stream never blocks the service
+        while not self._started:
+            try:
+                await self.source.start(self.position)
+                self._started = True
+            except Exception as e:
+                TELEMATICS_ERRORS.labels(stage = "start").inc()
+                logging.error(f"Error starting telematics source: {str(e)}")
+                await asyncio.sleep(max(self.poll_interval, 5))
+
+        last_checkpoint = last_share = last_renewal = time.monotonic()
+        while True:
+            if self.lease is not None and time.monotonic() - last_renewal >= self.lease.renew_interval:
+                last_renewal = time.monotonic()
+                if not await self._renew_lease():
+                    await self._step_down()
+                    return
+
+            try:
+                records, position = await self.source.read(self.batch_size)
+            except Exception as e:
+                TELEMATICS_ERRORS.labels(stage = "read").inc()
+                logging.error(f"Error reading telematics events: {str(e)}")
+                records, position = [], self.position
+
+            if records:
+                totals, newest, invalid = await asyncio.to_thread(aggregate_events, records)
+                applied, late = self.store.apply(totals)
+                TELEMATICS_EVENTS.labels(result = "applied").inc(applied)
+                TELEMATICS_EVENTS.labels(result = "late").inc(late)
+                TELEMATICS_EVENTS.labels(result = "invalid").inc(invalid)
+                if newest:
+                    TELEMATICS_LAG.set(max(time.time() - newest, 0.0))
+            self.position = position
+
+            if self.checkpoint_store is not None and time.monotonic() - last_checkpoint >= self.checkpoint_interval:
+                last_checkpoint = time.monotonic()
+                await self.checkpoint()
+            if self.shared is not None and time.monotonic() - last_share >= self.share_interval:
+                last_share = time.monotonic()
+                await self.publish()
+            if len(records) < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    async def _follow(self):
+        """Load the consuming worker's features until this worker takes over consuming"""
+        while not self._claim_consumer():
+            await self._load_shared()
+            await asyncio.sleep(self.share_interval)
+        # Pick up whatever the previous consumer published after the last load
+        await self._load_shared()
+
+    def _claim_consumer(self) -> bool:
+        lock_file = open(f"{self.shared.path}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    async def _await_lease(self):
+        """Load the lease holder's checkpoints until this task takes over the lease"""
+        while not await self._acquire_lease():
+            await self._load_checkpoint()
+            await asyncio.sleep(self.lease.renew_interval)
+        # Resume from the last checkpoint the previous holder wrote
+        await self._load_checkpoint()
+        self._leading = True
+        logging.info(f"Took the telematics lease {self.lease.name}")
+
+    async def _acquire_lease(self) -> bool:
+        try:
+            return await self.lease.acquire()
+        except Exception as e:
+            TELEMATICS_ERRORS.labels(stage = "lease").inc()
+            logging.error(f"Error taking telematics lease: {str(e)}")
+            return False
+
+    async def _renew_lease(self) -> bool:
+        """Renew the lease; an error keeps it only until it would have expired"""
+        try:
+            return await self.lease.acquire()
+        except Exception as e:
+            TELEMATICS_ERRORS.labels(stage = "lease").inc()
+            logging.error(f"Error renewing telematics lease: {str(e)}")
+            return time.time() < self.lease.expires_at
+
+    async def _step_down(self):
+        logging.warning(f"Lost the telematics lease {self.lease.name}, following its new holder")
+        self._leading = False
+        self._started = False
+        await self.source.close()
+
+    async def _load_shared(self):
+        self._shared_version = await self._load(self.shared, self._shared_version, "share")
+
+    async def _load_checkpoint(self):
+        version = await self._load(self.checkpoint_store, self._checkpoint_version, "restore")
+        if version != self._checkpoint_version:
+            self._checkpoint_version = version
+            # The other workers of this task follow this one
+            if self.shared is not None:
+                await self.publish()
+
+    async def _load(self, store, loaded_version, stage: str):
+        """Load the store's state if it changed since loaded_version; returns the version now loaded"""
+        try:
+            version = await store.version()
+            if version is None or version == loaded_version:
+                return loaded_version
+            state = await asyncio.to_thread(decode_checkpoint, await store.get())
+            self.store.restore_state(state["features"])
+            self.position = state["position"]
+            return version
+        except Exception as e:
+            TELEMATICS_ERRORS.labels(stage = stage).inc()
+            logging.error(f"Error loading telematics features: {str(e)}")
+            return loaded_version
+
+    async def _restore(self):
+        # Features shared by an earlier consumer in this task are newer than the checkpoint
+        if self.checkpoint_store is None or self.position is not None:
+            return
+        try:
+            data = await self.checkpoint_store.get()
+            if data is None:
+                return
+            state = await asyncio.to_thread(decode_checkpoint, data)
+            restored = self.store.restore_state(state["features"])
+            self.position = state["position"]
+            logging.info(f"Restored telematics features for {restored} policies from the checkpoint")
+        except Exception as e:
+            TELEMATICS_ERRORS.labels(stage = "restore").inc()
+            logging.error(f"Error restoring telematics checkpoint: {str(e)}")
+
+    async def checkpoint(self):
+        try:
+            await self.checkpoint_store.put(await self._encode_state())
+        except Exception as e:
+            TELEMATICS_ERRORS.labels(stage = "checkpoint").inc()
+            logging.error(f"Error writing telematics checkpoint: {str(e)}")
+
+    async def publish(self):
+        """Share the store with the other workers"""
+        try:
+            await self.shared.put(await self._encode_state())
+        except Exception as e:
+            TELEMATICS_ERRORS.labels(stage = "share").inc()
+            logging.error(f"Error publishing telematics features: {str(e)}")
+
+    async def _encode_state(self) -> bytes:
+        # Copy on the event loop so the store and position match, encode off it
+        state = {"format": CHECKPOINT_FORMAT_VERSION, "created_at": time.time(), "position": self.position,
+                 "features": self.store.snapshot_state()}
+        return await asyncio.to_thread(encode_checkpoint, state)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._started:
+            if self.checkpoint_store is not None:
+                await self.checkpoint()
+            if self.shared is not None:
+                await self.publish()
+        if self._leading:
+            try:
+                await self.lease.release()
+            except Exception as e:
+                logging.error(f"Error releasing telematics lease: {str(e)}")
+        if self._lock_file is not None:
+            self._lock_file.close()
+        await self.source.close()
+
+def encode_checkpoint(state: dict) -> bytes:
+    """
+    Arrow IPC stream with a row per policy holding its day buckets and totals;
+    the format version, creation time, source position and feature layout are
+    in the schema metadata.
+    """
+    import pyarrow as pa
+
+    features = state["features"]
+    indices = pa.array([row for _, row in features["rows"]], pa.int64())
+
+    def column(data: bytes, type, width: int = 1):
+        # Store arrays are row-major, so a policy's values are one list of width items
+        values = pa.Array.from_buffers(type, len(data) * 8 // type.bit_width, [None, pa.py_buffer(data)])
+        if width > 1:
+            values = pa.FixedSizeListArray.from_arrays(values, width)
+        return values.take(indices)
+
+    header = {"format": state["format"], "created_at": state["created_at"], "position": state["position"],
+              "days": features["days"], "metrics": list(features["metrics"])}
+    table = pa.table({
+        "policy_id": pa.array([policy_id for policy_id, _ in features["rows"]], pa.string()),
+        "head": column(features["heads"], pa.int64()),
+        "last_seen": column(features["last_seen"], pa.float64()),
+        "buckets": column(features["buckets"], pa.float32(), ROW_BUCKETS),
+        "totals": column(features["totals"], pa.float64(), len(METRICS))
+    }, metadata = {"telematics": json.dumps(header)})
+    sink = pa.BufferOutputStream()
+    # Most day buckets are zero, so the stream compresses well
+    with pa.ipc.new_stream(sink, table.schema, options = pa.ipc.IpcWriteOptions(compression = "zstd")) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def decode_checkpoint(data: bytes) -> dict:
+    """State written by encode_checkpoint; raises ValueError for one written in another format"""
+    import pyarrow as pa
+
+    try:
+        table = pa.ipc.open_stream(data).read_all()
+        header = json.loads(table.schema.metadata[b"telematics"])
+    except (pa.ArrowException, OSError, KeyError, TypeError, ValueError):
+        raise ValueError("Telematics checkpoint was written in another format")
+    if header.get("format") != CHECKPOINT_FORMAT_VERSION:
+        raise ValueError("Telematics checkpoint was written in another format")
+
+    def column_bytes(name: str) -> bytes:
+        values = table.column(name).combine_chunks()
+        if pa.types.is_fixed_size_list(values.type):
+            values = values.flatten()
+        if not len(values):
+            return b""
+        width = values.type.bit_width // 8
+        return values.buffers()[1].slice(values.offset * width, len(values) * width).to_pybytes()
+
+    # Policies are renumbered into consecutive rows in their LRU order
+    return {"format": header["format"], "created_at": header["created_at"], "position": header["position"],
+            "features": {
+                "days": header["days"],
+                "metrics": tuple(header["metrics"]),
+                "rows": [(policy_id, row) for row, policy_id in enumerate(table.column("policy_id").to_pylist())],
+                "free": [],
+                "heads": column_bytes("head"),
+                "last_seen": column_bytes("last_seen"),
+                "buckets": column_bytes("buckets"),
+                "totals": column_bytes("totals")
+            }}
+
+def create_checkpoint_store():
+    """Checkpoint store for TELEMATICS_CHECKPOINT_STORE, or None when TELEMATICS_CHECKPOINT_PATH is unset"""
+    if not TELEMATICS_CHECKPOINT_PATH:
+        return None
+    if TELEMATICS_CHECKPOINT_STORE == "s3":
+        return S3CheckpointStore(os.environ["S3_BUCKET"], TELEMATICS_CHECKPOINT_PATH, region_name = os.getenv("AWS_REGION"))
+    if TELEMATICS_CHECKPOINT_STORE == "local":
+        return LocalCheckpointStore(TELEMATICS_CHECKPOINT_PATH)
+    raise ValueError(f"Unknown TELEMATICS_CHECKPOINT_STORE {TELEMATICS_CHECKPOINT_STORE}")
+
+def create_consumer(store: TelematicsFeatureStore, service: str) -> Optional[TelematicsConsumer]:
+    """Build the consumer for TELEMATICS_SOURCE, or None when no source is configured"""
+    if not TELEMATICS_SOURCE:
+        return None
+    # Queued messages live in one process, so only file and Kinesis sources are shared between workers and tasks
+    shared_path = TELEMATICS_SHARED_PATH or os.path.join(tempfile.gettempdir(), f"{service}-telematics")
+    lease = DynamoDBLease(TELEMATICS_LEASE_TABLE, f"{service}-telematics",
+                          region_name = os.getenv("AWS_REGION")) if TELEMATICS_LEASE_TABLE else None
+    if TELEMATICS_SOURCE == "kinesis":
+        source = KinesisEventSource(TELEMATICS_STREAM_NAME)
+    elif TELEMATICS_SOURCE == "file":
+        source = FileEventSource(TELEMATICS_FILE_PATH)
+    elif TELEMATICS_SOURCE == "queue":
+        source = QueueEventSource()
+        shared_path = lease = None
+    else:
+        raise ValueError(f"Unknown TELEMATICS_SOURCE {TELEMATICS_SOURCE}")
+    checkpoint_store = create_checkpoint_store()
+    if lease is not None and checkpoint_store is None:
+        raise ValueError("TELEMATICS_LEASE_TABLE needs TELEMATICS_CHECKPOINT_PATH for the tasks without the lease to load")
+    return TelematicsConsumer(source, store, checkpoint_store = checkpoint_store, shared_path = shared_path,
+                              lease = lease)
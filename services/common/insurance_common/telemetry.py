@@ -0,0 +1,170 @@
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from opentelemetry import trace
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client.openmetrics.exposition import CONTENT_TYPE_LATEST as OPENMETRICS_CONTENT_TYPE
+from prometheus_client.openmetrics.exposition import generate_latest as generate_openmetrics
+from prometheus_client.samples import Exemplar
+from prometheus_client.utils import floatToGoString
+
+# Set by the dockerfile so the uvicorn workers write metrics to shared files
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+# Seconds between writes of a worker's exemplars to its file in MULTIPROC_DIR
+EXEMPLAR_FLUSH_INTERVAL = float(os.getenv("EXEMPLAR_FLUSH_INTERVAL", "1"))
+
+def init_tracing(app, service_name: str):
+    """
+    Install the OpenTelemetry SDK tracer provider and instrument the FastAPI app.
+    Sampling follows the standard OTEL_TRACES_SAMPLER settings. Spans are exported
+    when OTEL_TRACES_EXPORTER is "otlp" (needs the OTLP exporter package) or "console".
+    """
+    if os.getenv("OTEL_SDK_DISABLED", "false").lower() == "true":
+        # Nothing would be recorded, so skip importing the SDK and instrumentation
+        return
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    provider = TracerProvider(resource = Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", service_name)}))
+    exporter_name = os.getenv("OTEL_TRACES_EXPORTER", "none")
+    if exporter_name == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        except ImportError:
+            logging.error("OTEL_TRACES_EXPORTER is otlp but the OTLP exporter is not installed")
+    elif exporter_name == "console":
+        provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
+    trace.set_tracer_provider(provider)
+
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    FastAPIInstrumentor.instrument_app(app, excluded_urls = "health,ready,metrics")
+
+def trace_exemplar() -> Optional[dict]:
+    """
+    Exemplar labels linking an observation to the current sampled trace. Exemplars
+    are only exposed in the OpenMetrics format.
+    """
+    context = trace.get_current_span().get_span_context()
+    if not context.is_valid or not context.trace_flags.sampled:
+        return None
+    return {"trace_id": format(context.trace_id, "032x")}
+
+def observe(histogram, amount: float):
+    """Observe amount with the current trace as exemplar, kept in multiprocess mode too"""
+    exemplar = trace_exemplar()
+    histogram.observe(amount, exemplar = exemplar)
+    if exemplar and _exemplar_store is not None:
+        _exemplar_store.record(histogram, amount, exemplar)
+
+ExemplarKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+def exemplar_key(name: str, labels: Dict[str, str]) -> ExemplarKey:
+    return name, tuple(sorted(labels.items()))
+
+class ExemplarStore:
+    """
+    Latest exemplar per histogram bucket observed in this worker. prometheus_client
+    drops exemplars in multiprocess mode, so the store writes them to a file of
+    its own in the multiprocess directory, at most every flush_interval seconds,
+    for whichever worker serves the scrape to merge.
+    """
+    def __init__(self, directory: str, flush_interval: float = EXEMPLAR_FLUSH_INTERVAL):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._exemplars: Dict[ExemplarKey, Exemplar] = {}
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, histogram, amount: float, exemplar: dict):
+        # The bucket histogram.observe gave the exemplar to
+        bound = next(bound for bound in histogram._upper_bounds if amount <= bound)
+        labels = dict(zip(histogram._labelnames, histogram._labelvalues), le = floatToGoString(bound))
+        with self._lock:
+            self._exemplars[exemplar_key(f"{histogram._name}_bucket", labels)] = Exemplar(exemplar, amount, time.time())
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def flush(self):
+        """Write the exemplars to this worker's file; the caller holds the lock"""
+        self._last_flush = time.monotonic()
+        entries = [[name, list(labels), exemplar.labels, exemplar.value, exemplar.timestamp]
+                   for (name, labels), exemplar in self._exemplars.items()]
+        # Resolved on each write: gunicorn --preload imports this module before forking the workers
+        path = exemplar_path(self.directory, os.getpid())
+        try:
+            with open(f"{path}.tmp", "w") as f:
+                json.dump(entries, f)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logging.error(f"Error writing metric exemplars: {str(e)}")
+
+def exemplar_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"exemplars_{pid}.json")
+
+def read_exemplars(directory: str) -> Dict[ExemplarKey, Exemplar]:
+    """Newest exemplar per bucket across the workers' exemplar files"""
+    exemplars: Dict[ExemplarKey, Exemplar] = {}
+    for path in glob.glob(os.path.join(directory, "exemplars_*.json")):
+        try:
+            with open(path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            # Removed by a worker that exited since the glob
+            continue
+        for name, labels, exemplar_labels, value, timestamp in entries:
+            key = (name, tuple(tuple(label) for label in labels))
+            current = exemplars.get(key)
+            if current is None or current.timestamp < timestamp:
+                exemplars[key] = Exemplar(exemplar_labels, value, timestamp)
+    return exemplars
+
+class ExemplarCollector:
+    """Adds the workers' exemplars to the histogram buckets merged by another collector"""
+    def __init__(self, collector, directory: str):
+        self.collector = collector
+        self.directory = directory
+
+    def collect(self):
+        exemplars = read_exemplars(self.directory)
+        for metric in self.collector.collect():
+            if metric.type == "histogram" and exemplars:
+                metric.samples = [sample._replace(exemplar = exemplars.get(exemplar_key(sample.name, sample.labels),
+                                                                           sample.exemplar))
+                                  for sample in metric.samples]
+            yield metric
+
+_exemplar_store = ExemplarStore(MULTIPROC_DIR) if MULTIPROC_DIR else None
+
+def metrics_registry():
+    """Registry to expose: merged across worker processes in multiprocess mode"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        registry.register(ExemplarCollector(multiprocess.MultiProcessCollector(None), MULTIPROC_DIR))
+        return registry
+    return REGISTRY
+
+def metrics_response(request: Request) -> Response:
+    """Render metrics as OpenMetrics when the scraper asks for it, else Prometheus text"""
+    registry = metrics_registry()
+    if "application/openmetrics-text" in request.headers.get("accept", ""):
+        return Response(content = generate_openmetrics(registry), media_type = OPENMETRICS_CONTENT_TYPE)
+    return Response(content = generate_latest(registry), media_type = CONTENT_TYPE_LATEST)
+
+def mark_worker_dead():
+    """Drop this worker's live gauge files so merged gauges stop counting it"""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+        try:
+            os.remove(exemplar_path(MULTIPROC_DIR, os.getpid()))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from insurance_common import admission
+from insurance_common.admission import FAST_LANE, STANDARD_LANE, AdmissionController, AdmissionRejected, SaturationReporter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+def controller(**kwargs) -> AdmissionController:
+    settings = {"initial_limit": 10, "min_limit": 1, "max_limit": 10, "fast_reserve": 0.2, "max_queue": 10,
+                "queue_timeout_ms": 1000}
+    return AdmissionController("test", **{**settings, **kwargs})
+
+async def hold(controller: AdmissionController, lane: str, release: asyncio.Event, order: list, name: str,
+               requests: int = 1):
+    async with controller.admit(lane, requests = requests):
+        order.append(name)
+        await release.wait()
+
+def test_standard_lane_leaves_fast_reserve_free():
+    control = controller()
+
+    async def run():
+        release = asyncio.Event()
+        order = []
+        tasks = [asyncio.create_task(hold(control, STANDARD_LANE, release, order, f"standard-{i}")) for i in range(9)]
+        await asyncio.sleep(0)
+        # 8 of 10 slots go to standard requests; the ninth waits while a fast one gets in
+        assert control.inflight == 8
+        fast = asyncio.create_task(hold(control, FAST_LANE, release, order, "fast"))
+        await asyncio.sleep(0)
+        assert "fast" in order and "standard-8" not in order
+        release.set()
+        await asyncio.gather(*tasks, fast)
+
+    asyncio.run(run())
+
+def test_freed_slots_go_to_the_fast_lane_first():
+    control = controller(initial_limit = 1, fast_reserve = 0)
+
+    async def run():
+        release = asyncio.Event()
+        order = []
+        first = asyncio.create_task(hold(control, STANDARD_LANE, release, order, "first"))
+        await asyncio.sleep(0)
+        standard = asyncio.create_task(hold(control, STANDARD_LANE, release, order, "standard"))
+        await asyncio.sleep(0)
+        fast = asyncio.create_task(hold(control, FAST_LANE, release, order, "fast"))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(first, standard, fast)
+        return order
+
+    assert asyncio.run(run()) == ["first", "fast", "standard"]
+
+def test_full_queue_sheds_with_retry_after():
+    control = controller(initial_limit = 1, fast_reserve = 0, max_queue = 1)
+
+    async def run():
+        release = asyncio.Event()
+        order = []
+        held = asyncio.create_task(hold(control, STANDARD_LANE, release, order, "held"))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(hold(control, STANDARD_LANE, release, order, "queued"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with control.admit(STANDARD_LANE):
+                pass
+        assert rejected.value.retry_after >= 1
+        release.set()
+        await asyncio.gather(held, queued)
+
+    asyncio.run(run())
+    assert control.shed_count == 1
+
+def test_batch_holds_a_slot_per_request_up_to_capacity():
+    control = controller()
+
+    async def run():
+        release_small, release_large = asyncio.Event(), asyncio.Event()
+        small = asyncio.create_task(hold(control, STANDARD_LANE, release_small, [], "small", requests = 3))
+        await asyncio.sleep(0)
+        assert control.inflight == 3
+        large = asyncio.create_task(hold(control, STANDARD_LANE, release_large, [], "large", requests = 100))
+        await asyncio.sleep(0)
+        # The large batch needs the whole standard capacity, so it waits for the small one
+        assert control.inflight == 3
+        release_small.set()
+        await small
+        await asyncio.sleep(0)
+        assert control.inflight == 8
+        release_large.set()
+        await large
+
+    asyncio.run(run())
+    assert control.inflight == 0
+
+def test_batch_latency_counts_per_request(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(admission, "time", clock)
+    control = controller(latency_target_ms = 100)
+
+    async def run():
+        async with control.admit(STANDARD_LANE, requests = 80):
+            # 80 claims on 8 slots in 0.5s is 50ms per claim, within the target
+            clock.now += 0.5
+
+    asyncio.run(run())
+    assert control.limit == 10
+
+def test_saturation_reports_time_averaged_and_peak_inflight(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(admission, "time", clock)
+    control = controller()
+    reporter = SaturationReporter(control, "test-service", "Test")
+
+    async def run():
+        async with control.admit(STANDARD_LANE, requests = 4):
+            clock.now += 15
+        clock.now += 45
+
+    asyncio.run(run())
+    metrics = {metric["MetricName"]: metric["Value"] for metric in reporter.metric_data()}
+    # 4 slots for 15 of the 60 seconds
+    assert metrics["AdmissionInflight"] == pytest.approx(1.0)
+    assert metrics["AdmissionPeakInflight"] == 4
+    clock.now += 60
+    metrics = {metric["MetricName"]: metric["Value"] for metric in reporter.metric_data()}
+    assert metrics["AdmissionInflight"] == 0
+    assert metrics["AdmissionPeakInflight"] == 0
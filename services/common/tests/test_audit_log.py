@@ -0,0 +1,159 @@
+import asyncio
+import io
+
+import pyarrow.parquet as pq
+
+from insurance_common.audit_log import AuditLog
+
+COLUMNS = {"claim_id": "string", "claim_amount": "float64", "reasons": "list<string>"}
+
+class MemoryStore:
+    """Audit files kept in memory; fails the next writes while failures is set"""
+    def __init__(self):
+        self.files = {}
+        self.failures = 0
+
+    async def put(self, key: str, data: bytes):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("store unavailable")
+        self.files[key] = data
+
+    async def close(self):
+        pass
+
+    def rows(self) -> list:
+        return [row for data in self.files.values() for row in pq.read_table(io.BytesIO(data)).to_pylist()]
+
+async def wait_for_files(store: MemoryStore, timeout: float = 2.0) -> int:
+    """Number of files once the background flush has written one, or 0 after the timeout"""
+    for _ in range(int(timeout / 0.01)):
+        if store.files:
+            break
+        await asyncio.sleep(0.01)
+    return len(store.files)
+
+def audit_log(store: MemoryStore, **options) -> AuditLog:
+    return AuditLog("claims-processing", COLUMNS, store, prefix = "audit/", **options)
+
+def test_flushes_once_flush_records_are_buffered():
+    store = MemoryStore()
+    log = audit_log(store, flush_records = 3, flush_interval = 60)
+
+    async def run():
+        await log.start()
+        for index in range(3):
+            await log.record(claim_id = f"CLM-{index}", claim_amount = 100 * index, reasons = ["late"])
+        files = await wait_for_files(store)
+        await log.stop()
+        return files
+
+    assert asyncio.run(run()) == 1
+    rows = store.rows()
+    assert [row["claim_id"] for row in rows] == ["CLM-0", "CLM-1", "CLM-2"]
+    assert rows[1]["claim_amount"] == 100.0
+    assert rows[0]["decided_at"] is not None
+    assert next(iter(store.files)).startswith("audit/claims-processing/date=")
+
+def test_flushes_after_flush_interval():
+    store = MemoryStore()
+    log = audit_log(store, flush_records = 100, flush_interval = 0.05)
+
+    async def run():
+        await log.start()
+        await log.record(claim_id = "CLM-1")
+        files = await wait_for_files(store)
+        await log.stop()
+        return files
+
+    assert asyncio.run(run()) == 1
+
+def test_unencodable_record_is_rejected_alone():
+    store = MemoryStore()
+    log = audit_log(store)
+
+    async def run():
+        await log.record(claim_id = "CLM-1", claim_amount = 10.0)
+        await log.record(claim_id = "CLM-2", claim_amount = "ten")
+        await log.record(claim_id = "CLM-3", reasons = [{"code": "late"}])
+        await log.record(claim_id = 4, claim_amount = 40, reasons = ("late",))
+        await log.stop()
+
+    asyncio.run(run())
+    rows = store.rows()
+    assert [row["claim_id"] for row in rows] == ["CLM-1", "4"]
+    assert rows[1]["claim_amount"] == 40.0
+    assert rows[1]["reasons"] == ["late"]
+
+def test_record_many_keeps_every_encodable_record():
+    store = MemoryStore()
+    log = audit_log(store)
+
+    async def run():
+        await log.record_many(4, claim_id = ["CLM-1", float("nan"), "CLM-3", "CLM-4"],
+                              claim_amount = [1.0, 2.0, object(), 4])
+        await log.stop()
+
+    asyncio.run(run())
+    rows = store.rows()
+    assert [row["claim_id"] for row in rows] == ["CLM-1", None, "CLM-4"]
+    assert [row["claim_amount"] for row in rows] == [1.0, 2.0, 4.0]
+    assert log._held == 0
+
+def test_full_log_drops_new_records():
+    store = MemoryStore()
+    log = audit_log(store, max_records = 2, overflow = "drop")
+
+    async def run():
+        for index in range(3):
+            await log.record(claim_id = f"CLM-{index}")
+        await log.record_many(2, claim_id = ["CLM-3", "CLM-4"])
+        await log.stop()
+
+    asyncio.run(run())
+    assert [row["claim_id"] for row in store.rows()] == ["CLM-0", "CLM-1"]
+
+def test_full_log_blocks_until_a_flush_makes_room():
+    store = MemoryStore()
+    log = audit_log(store, max_records = 2, overflow = "block", block_timeout_ms = 1000, flush_interval = 60)
+
+    async def run():
+        await log.start()
+        for index in range(3):
+            await log.record(claim_id = f"CLM-{index}")
+        await log.stop()
+
+    asyncio.run(run())
+    assert [row["claim_id"] for row in store.rows()] == ["CLM-0", "CLM-1", "CLM-2"]
+
+def test_blocked_record_is_dropped_after_the_timeout():
+    store = MemoryStore()
+    store.failures = 100
+    log = audit_log(store, max_records = 1, overflow = "block", block_timeout_ms = 50, flush_interval = 60)
+
+    async def run():
+        await log.start()
+        await log.record(claim_id = "CLM-1")
+        await log.record(claim_id = "CLM-2")
+        held = log._held
+        store.failures = 0
+        await log.stop()
+        return held
+
+    assert asyncio.run(run()) == 1
+    assert [row["claim_id"] for row in store.rows()] == ["CLM-1"]
+
+def test_failed_write_is_retried_on_the_next_flush():
+    store = MemoryStore()
+    store.failures = 1
+    log = audit_log(store)
+
+    async def run():
+        await log.record(claim_id = "CLM-1")
+        await log.flush()
+        assert not store.files and log._held == 1
+        await log.flush()
+
+    asyncio.run(run())
+    assert [row["claim_id"] for row in store.rows()] == ["CLM-1"]
+    assert log._held == 0
@@ -0,0 +1,64 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from insurance_common.executor import ExecutorOverloaded, ScoringExecutor
+
+def blocking_task(release: threading.Event) -> str:
+    release.wait(5)
+    return threading.current_thread().name
+
+def test_saturated_executor_sheds_tasks_after_the_queue_timeout():
+    executor = ScoringExecutor("test", mode = "thread", workers = 1, max_queue = 2, queue_timeout_ms = 20)
+    release = threading.Event()
+
+    async def run():
+        await executor.start()
+        try:
+            running = [asyncio.create_task(executor.run(blocking_task, release)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            start_time = time.perf_counter()
+            with pytest.raises(ExecutorOverloaded):
+                await executor.run(blocking_task, release)
+            waited = time.perf_counter() - start_time
+            release.set()
+            return waited, await asyncio.gather(*running)
+        finally:
+            executor.shutdown()
+
+    waited, names = asyncio.run(run())
+    assert waited >= 0.02
+    assert all(name.startswith("test-scoring") for name in names)
+
+def test_queued_task_runs_once_a_slot_frees_within_the_timeout():
+    executor = ScoringExecutor("test", mode = "thread", workers = 1, max_queue = 1, queue_timeout_ms = 1000)
+    release = threading.Event()
+
+    async def run():
+        await executor.start()
+        try:
+            first = asyncio.create_task(executor.run(blocking_task, release))
+            await asyncio.sleep(0.01)
+            second = asyncio.create_task(executor.run(blocking_task, release))
+            await asyncio.sleep(0.01)
+            release.set()
+            return await asyncio.gather(first, second)
+        finally:
+            executor.shutdown()
+
+    assert len(asyncio.run(run())) == 2
+
+def test_inline_mode_runs_on_the_event_loop():
+    executor = ScoringExecutor("test", mode = "inline")
+
+    async def run():
+        await executor.start()
+        return await executor.run(threading.current_thread)
+
+    assert asyncio.run(run()) is threading.main_thread()
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        ScoringExecutor("test", mode = "fork")
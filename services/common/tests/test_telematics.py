@@ -0,0 +1,96 @@
+import asyncio
+import json
+import pickle
+import time
+
+import pytest
+
+from insurance_common.telematics import (DAY_SECONDS, FileEventSource, LocalCheckpointStore, TelematicsConsumer,
+                                         TelematicsFeatureStore, aggregate_events, decode_checkpoint,
+                                         encode_checkpoint)
+
+def event(policy_id: str, miles: float, days_ago: int = 0) -> bytes:
+    return json.dumps({"policy_id": policy_id, "timestamp": time.time() - days_ago * DAY_SECONDS,
+                       "distance_miles": miles, "harsh_braking_events": 1}).encode() + b"\n"
+
+def checkpoint_state(store: TelematicsFeatureStore) -> dict:
+    return {"format": 2, "created_at": time.time(), "position": {"offset": 42}, "features": store.snapshot_state()}
+
+def test_checkpoint_round_trip_keeps_features_and_drops_free_rows():
+    store = TelematicsFeatureStore(max_policies = 3)
+    store.apply(aggregate_events([event("POL-1", 10, days_ago = 40), event("POL-2", 20, days_ago = 2),
+                                  event("POL-3", 30), event("POL-3", 5, days_ago = 1)])[0])
+    # POL-4 reuses the row of POL-1, whose only event is outside the window
+    store.apply(aggregate_events([event("POL-4", 7)])[0])
+
+    state = decode_checkpoint(encode_checkpoint(checkpoint_state(store)))
+    restored = TelematicsFeatureStore(max_policies = 3)
+    assert restored.restore_state(state["features"]) == 3
+    assert state["position"] == {"offset": 42}
+    for policy_id in ("POL-1", "POL-2", "POL-3", "POL-4"):
+        assert restored.features(policy_id) == store.features(policy_id)
+    assert restored.features("POL-3")["telematics_miles_30d"] == 35.0
+
+def test_checkpoint_in_another_format_is_rejected():
+    store = TelematicsFeatureStore()
+    with pytest.raises(ValueError):
+        decode_checkpoint(pickle.dumps(checkpoint_state(store)))
+    with pytest.raises(ValueError):
+        decode_checkpoint(encode_checkpoint(dict(checkpoint_state(store), format = 1)))
+
+class FakeLease:
+    """Lease on a dict shared by the consumers of one test"""
+    def __init__(self, holders: dict, duration: float = 0.06):
+        self.holders = holders
+        self.name = "test-telematics"
+        self.owner = object()
+        self.duration = duration
+        self.renew_interval = duration / 3
+        self.expires_at = 0.0
+
+    async def acquire(self) -> bool:
+        if self.holders.get(self.name, self.owner) is not self.owner:
+            return False
+        self.holders[self.name] = self.owner
+        self.expires_at = time.time() + self.duration
+        return True
+
+    async def release(self):
+        if self.holders.get(self.name) is self.owner:
+            del self.holders[self.name]
+
+def consumer(tmp_path, holders: dict) -> TelematicsConsumer:
+    return TelematicsConsumer(FileEventSource(str(tmp_path / "events.ndjson")), TelematicsFeatureStore(),
+                              poll_interval = 0.01, checkpoint_store = LocalCheckpointStore(str(tmp_path / "checkpoint")),
+                              checkpoint_interval = 0, lease = FakeLease(holders))
+
+async def wait_for(condition, timeout: float = 2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+def test_lease_holder_consumes_and_the_other_task_takes_over(tmp_path):
+    events = tmp_path / "events.ndjson"
+    events.write_bytes(event("POL-1", 10))
+    holders = {}
+
+    async def run():
+        leader, follower = consumer(tmp_path, holders), consumer(tmp_path, holders)
+        await leader.start()
+        await wait_for(lambda: leader._leading)
+        await follower.start()
+
+        # The follower never reads the stream, only the leader's checkpoints
+        await wait_for(lambda: follower.store.features("POL-1")["telematics_miles_30d"] == 10.0)
+        assert not follower._started
+
+        await leader.stop()
+        with open(events, "ab") as f:
+            f.write(event("POL-1", 5))
+        await wait_for(lambda: follower.store.features("POL-1")["telematics_miles_30d"] == 15.0)
+        assert follower._leading
+        await follower.stop()
+
+    asyncio.run(run())
+    assert not holders
@@ -0,0 +1,44 @@
+from prometheus_client import CollectorRegistry, Histogram
+from prometheus_client.metrics_core import HistogramMetricFamily
+from prometheus_client.openmetrics.exposition import generate_latest
+
+from insurance_common import telemetry
+from insurance_common.telemetry import ExemplarCollector, ExemplarStore
+
+class MergedHistogram:
+    """Stands in for the multiprocess collector, which merges bucket counts without exemplars"""
+    def collect(self):
+        metric = HistogramMetricFamily("stage_seconds", "Stage latency", labels = ["stage"])
+        metric.add_metric(["decide"], [("0.1", 1.0), ("1.0", 2.0), ("+Inf", 2.0)], 0.6)
+        yield metric
+
+def histogram() -> Histogram:
+    return Histogram("stage_seconds", "Stage latency", ["stage"], buckets = (0.1, 1.0),
+                     registry = CollectorRegistry()).labels(stage = "decide")
+
+def test_workers_exemplars_are_merged_into_buckets(tmp_path, monkeypatch):
+    monkeypatch.setattr(telemetry.os, "getpid", lambda: 101)
+    ExemplarStore(str(tmp_path), flush_interval = 0).record(histogram(), 0.05, {"trace_id": "a" * 32})
+    monkeypatch.setattr(telemetry.os, "getpid", lambda: 102)
+    store = ExemplarStore(str(tmp_path), flush_interval = 0)
+    store.record(histogram(), 0.5, {"trace_id": "b" * 32})
+
+    registry = CollectorRegistry()
+    registry.register(ExemplarCollector(MergedHistogram(), str(tmp_path)))
+    lines = generate_latest(registry).decode().splitlines()
+
+    assert any(line.startswith('stage_seconds_bucket{le="0.1",stage="decide"} 1.0 # {trace_id="' + "a" * 32)
+               for line in lines)
+    assert any(line.startswith('stage_seconds_bucket{le="1.0",stage="decide"} 2.0 # {trace_id="' + "b" * 32)
+               for line in lines)
+
+def test_newest_exemplar_wins_and_flushes_are_throttled(tmp_path, monkeypatch):
+    store = ExemplarStore(str(tmp_path), flush_interval = 3600)
+    store.record(histogram(), 0.05, {"trace_id": "a" * 32})
+    store.record(histogram(), 0.06, {"trace_id": "b" * 32})
+    # Only the first observation was written; the second waits for the next flush
+    assert [exemplar.labels["trace_id"] for exemplar in telemetry.read_exemplars(str(tmp_path)).values()] == ["a" * 32]
+
+    with store._lock:
+        store.flush()
+    assert [exemplar.value for exemplar in telemetry.read_exemplars(str(tmp_path)).values()] == [0.06]
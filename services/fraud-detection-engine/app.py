@@ -1,24 +1,46 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel, Field
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from contextlib import nullcontext
+import asyncio
 import logging
 from prometheus_client import Counter, Histogram
 import time
 from typing import List, Optional
 import numpy as np
 
+from insurance_common.admission import (FAST_LANE, STANDARD_LANE, AdmissionRejected, create_admission_controller,
+                                        create_saturation_reporter)
+from insurance_common.audit_log import create_audit_log, warm_parquet_writer
+from insurance_common.executor import ExecutorOverloaded, ScoringExecutor
+from insurance_common.fastcodec import FastDecodeRoute, fast_decode, fast_record
+from insurance_common.microbatch import BatcherOverloaded, create_batcher
+from insurance_common.startup import StartupTracker
+from insurance_common.telematics import TELEMATICS_FEATURES, TelematicsFeatureStore, create_consumer
+from insurance_common.telemetry import init_tracing, mark_worker_dead, metrics_response, observe
+
+from fraud_model import MODEL_PATH, FraudModel, blend_scores
+from fraud_rules import CompiledRuleSet, RuleRegistry
+from velocity_index import (VELOCITY_FEATURES, VELOCITY_SNAPSHOT_INTERVAL, VELOCITY_SNAPSHOT_PATH, VELOCITY_SYNC_INTERVAL,
+                            VelocityIndex, VelocityJournal, claim_snapshot_slot, read_latest_snapshot, write_snapshot)
+
 # Metrics
 FRAUD_CHECKS = Counter('fraud_checks_total', 'Total Fraud Checks performed')
 FRAUD_SCORE = Histogram('fraud_risk_score', 'Distribution of Fraud Risk Scores')
 PROCESSING_TIME = Histogram('fraud_check_processing_seconds', 'Time spent processing Fraud Checks')
+BATCH_SIZE = Histogram('fraud_batch_size', 'Number of claims per batch fraud check',
+                       buckets = (1, 10, 100, 500, 1000, 5000, 10000, 50000))
+BATCH_THROUGHPUT = Histogram('fraud_batch_claims_per_second', 'Claims scored per second in batch fraud checks',
+                             buckets = (1e2, 1e3, 1e4, 5e4, 1e5, 5e5, 1e6))
 
 app = FastAPI(title = 'FraudDetectionEngine',
               description = "Fraud Detection for Insurance Claims",
               version = "1.0.0")
+# Endpoints marked @fast_decode read JSON and msgpack bodies into slotted records
+app.router.route_class = FastDecodeRoute
 
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
+init_tracing(app, "fraud-detection-engine")
+STARTUP = StartupTracker("fraud-detection")
 
 class ClaimData(BaseModel):
     claim_id: str = Field(..., description = "Unique identifier for the claim")
@@ -32,7 +54,10 @@ class ClaimData(BaseModel):
     location : str = Field(..., description = "Claim Location")
     device_ip: Optional[str] = Field(None, description = "IP Address of submission device")
 
+ClaimDataRecord = fast_record(ClaimData)
+
 @app.post("/api/v1/detect", response_model = dict, tags = ["Fraud Detection"])
+@fast_decode(ClaimDataRecord)
 async def detect_fraud(claim:ClaimData):
     """
     Detect Potential Fraud in Insurance Claims using multiple risk factors and ML-based scoring.
@@ -41,61 +66,407 @@ async def detect_fraud(claim:ClaimData):
     FRAUD_CHECKS.inc()
 
     try:
-        # Fraud Detection Logic
-        risk_factors = []
-        risk_scores = []
-
-        # Time-based analysis
-        days_since_policy_start = (claim.claim_date - claim.policy_start_date).days
-        if days_since_policy_start < 30:
-            risk_factors.append("Very Recent Policy")
-            risk_scores.append(35)
-
-        # Amount analysis with statistical thresholds
-        if claim.claim_amount > 50000:
-            risk_factors.append("High Claim Amount")
-            risk_scores.append(25)
-
-        # Frequency Analysis
-        if claim.previous_claims > 3:
-            risk_factors.append("Multiple Previous Claims")
-            risk_scores.append(30)
-
-        # Location-based risk
-        high_risk_locations = ['NK', 'IR', 'CU']
-        if claim.location in high_risk_locations:
-            risk_factors.append('High Risk Location Detected')
-            risk_scores.append(40)
-
-        # Age-based risk assessment
-        if claim.claimant_age < 25:
-            risk_factors.append("High Risk Age Group")
-            risk_scores.append(10)
-
-        # Composite Risk Score Calculation
-        base_risk_score = sum(risk_scores)
-        weighted_score = base_risk_score * (1 + (claim.previous_claims * 0.1))
-        final_score = min(100, weighted_score)
-
-        FRAUD_SCORE.observe(final_score)
+        async with admission(FAST_LANE if claim.claim_amount <= FAST_LANE_MAX_CLAIM_AMOUNT else STANDARD_LANE):
+            signals = record_stream_features(claim)
 
-        response = {
-            "claim_id": claim.claim_id,
-            "risk_score": final_score,
-            "risk_factors": risk_factors,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "status": "high_risk" if final_score > 70 else "medium_risk" if final_score > 30 else "low_risk",
-            "confidence": "high" if len(risk_factors) > 3 else "medium" if len(risk_factors) > 1 else "low"
-        }
+            # Fraud Detection Logic, micro-batched with concurrent requests when enabled
+            if DETECT_BATCHER is not None:
+                response = await DETECT_BATCHER.submit((claim, signals))
+            else:
+                response = await SCORING_EXECUTOR.run(score_claim_task, FRAUD_RULES.current().reference, claim, signals)
+            await audit_fraud_decisions([claim], [response])
 
         processing_time = time.time() - start_time
-        PROCESSING_TIME.observe(processing_time)
+        observe(PROCESSING_TIME, processing_time)
 
         return response
-    
+
+    except AdmissionRejected as e:
+        raise HTTPException(status_code = 429, detail = str(e), headers = {"Retry-After": str(e.retry_after)})
+    except (BatcherOverloaded, ExecutorOverloaded) as e:
+        raise HTTPException(status_code = 503, detail = str(e), headers = {"Retry-After": "1"})
     except Exception as e:
         logging.error(f"Error in Fraud Detection: {str(e)}")
         raise HTTPException(status_code = 500, detail = str(e))
+
+class ClaimBatch(BaseModel):
+    claims: List[ClaimData] = Field(..., description = "Claims to score in a single batch")
+
+ClaimBatchRecord = fast_record(ClaimBatch)
+
+@app.post("/api/v1/detect/batch", response_model = dict, tags = ["Fraud Detection"])
+@fast_decode(ClaimBatchRecord)
+async def detect_fraud_batch(batch:ClaimBatch):
+    """
+    Score a batch of claims at once using column arrays. Results match /api/v1/detect per claim.
+    """
+    start_time = time.perf_counter()
+    claims = batch.claims
+    FRAUD_CHECKS.inc(len(claims))
+    BATCH_SIZE.observe(len(claims))
+
+    try:
+        # Batches wait behind single claims and hold a slot per claim, so they count against the limit
+        # like the single requests they replace
+        async with admission(STANDARD_LANE, requests = len(claims)):
+            now = time.time()
+            results = await score_claims_offloaded([(claim, record_stream_features(claim, now)) for claim in claims])
+            await audit_fraud_decisions(claims, results)
+
+        processing_time = time.perf_counter() - start_time
+        throughput = len(claims) / processing_time if processing_time > 0 else 0.0
+        observe(PROCESSING_TIME, processing_time)
+        BATCH_THROUGHPUT.observe(throughput)
+
+        return {
+            "results": results,
+            "batch_size": len(claims),
+            "processing_time": processing_time,
+            "claims_per_second": throughput,
+            "rules_version": results[0]["rules_version"] if results else FRAUD_RULES.current().version
+        }
+
+    except AdmissionRejected as e:
+        raise HTTPException(status_code = 429, detail = str(e), headers = {"Retry-After": str(e.retry_after)})
+    except ExecutorOverloaded as e:
+        raise HTTPException(status_code = 503, detail = str(e), headers = {"Retry-After": "1"})
+    except Exception as e:
+        logging.error(f"Error in Batch Fraud Detection: {str(e)}")
+        raise HTTPException(status_code = 500, detail = str(e))
+
+def score_claim(claim: ClaimData, signals: Optional[dict] = None, rule_set: Optional[CompiledRuleSet] = None) -> dict:
+    """
+    Apply the detect_fraud rules and model to a single claim.
+    Uses the live rule set unless another compiled rule set is given.
+    """
+    rule_set = rule_set or FRAUD_RULES.current()
+    features = claim_features(claim, signals)
+    risk_factors, final_score = rule_set.evaluate(features)
+
+    # ML-based scoring
+    ml_score = None
+    if FRAUD_MODEL is not None:
+        ml_score = FRAUD_MODEL.predict(np.array([FRAUD_MODEL.feature_row(features)], dtype = np.float64)).tolist()[0]
+        final_score = blend_scores(final_score, ml_score)
+
+    FRAUD_SCORE.observe(final_score)
+
+    return {
+        "claim_id": claim.claim_id,
+        "risk_score": final_score,
+        "risk_factors": risk_factors,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "status": "high_risk" if final_score > 70 else "medium_risk" if final_score > 30 else "low_risk",
+        "confidence": "high" if len(risk_factors) > 3 else "medium" if len(risk_factors) > 1 else "low",
+        "rules_version": rule_set.version,
+        "ml_score": ml_score
+    }
+
+def score_claims_vectorized(claims: List[ClaimData], rule_set: Optional[CompiledRuleSet] = None,
+                            signals: Optional[List[dict]] = None) -> List[dict]:
+    """
+    Apply the detect_fraud rules to a list of claims with NumPy column arrays.
+    Uses the live rule set unless another compiled rule set is given.
+    """
+    if not claims:
+        return []
+
+    # Composite Risk Score Calculation over feature columns
+    rule_set = rule_set or FRAUD_RULES.current()
+    columns = claim_feature_columns(claims, signals)
+    rule_masks, weighted_scores = rule_set.evaluate_columns(columns)
+
+    # ML-based scoring in a single predict_proba call for the whole batch
+    ml_scores = [None] * len(claims)
+    if FRAUD_MODEL is not None:
+        ml_scores = FRAUD_MODEL.predict(FRAUD_MODEL.feature_matrix(columns)).tolist()
+
+    timestamp = datetime.now(timezone.utc).isoformat()
+    results = []
+    for claim, mask, weighted_score, ml_score in zip(claims, rule_masks.tolist(), weighted_scores.tolist(), ml_scores):
+        risk_factors = rule_set.factors_for_mask(mask)[0]
+        final_score = min(rule_set.max_score, weighted_score)
+        if ml_score is not None:
+            final_score = blend_scores(final_score, ml_score)
+        FRAUD_SCORE.observe(final_score)
+        results.append({
+            "claim_id": claim.claim_id,
+            "risk_score": final_score,
+            "risk_factors": list(risk_factors),
+            "timestamp": timestamp,
+            "status": "high_risk" if final_score > 70 else "medium_risk" if final_score > 30 else "low_risk",
+            "confidence": "high" if len(risk_factors) > 3 else "medium" if len(risk_factors) > 1 else "low",
+            "rules_version": rule_set.version,
+            "ml_score": ml_score
+        })
+
+    return results
+
+def record_stream_features(claim: ClaimData, timestamp: Optional[float] = None) -> dict:
+    """
+    Count the claim in the velocity index, then read its stream features, so
+    they include the claim and the ones before it but never a later claim. A
+    resubmitted claim_id is not counted again.
+    """
+    timestamp = time.time() if timestamp is None else timestamp
+    keys = claim_velocity_keys(claim)
+    if VELOCITY_INDEX.record(claim.claim_id, keys, claim.claim_amount, timestamp) and _velocity_journal is not None:
+        _velocity_journal.append(claim.claim_id, keys, claim.claim_amount, timestamp)
+    return stream_features(claim, timestamp)
+
+async def score_claims_offloaded(items: List[tuple]) -> List[dict]:
+    """
+    score_claims_vectorized on the scoring executor for (claim, stream features)
+    pairs. Features are read in this process, where the index and store live,
+    as each claim is recorded.
+    """
+    claims = [claim for claim, _ in items]
+    signals = [signals for _, signals in items]
+    return await SCORING_EXECUTOR.run(score_claims_task, FRAUD_RULES.current().reference, claims, signals)
+
+# Executor tasks take the caller's rule set reference: a process-pool worker has its own
+# registry, which would otherwise lag (or lead) a reload in the process serving the request
+def score_claim_task(rules: tuple, claim: ClaimData, signals: Optional[dict]) -> dict:
+    return score_claim(claim, signals, FRAUD_RULES.adopt(*rules))
+
+def score_claims_task(rules: tuple, claims: List[ClaimData], signals: Optional[List[dict]]) -> List[dict]:
+    return score_claims_vectorized(claims, FRAUD_RULES.adopt(*rules), signals)
+
+def claim_features(claim: ClaimData, signals: Optional[dict] = None) -> dict:
+    """Features referenced by the fraud rules for a single claim"""
+    return {
+        "days_since_policy_start": (claim.claim_date - claim.policy_start_date).days,
+        "claim_amount": claim.claim_amount,
+        "previous_claims": claim.previous_claims,
+        "location": claim.location,
+        "claimant_age": claim.claimant_age,
+        "claim_type": claim.claim_type,
+        **(signals if signals is not None else stream_features(claim))
+    }
+
+def claim_feature_columns(claims: List[ClaimData], signals: Optional[List[dict]] = None) -> dict:
+    """Feature columns for a batch of claims (timedelta.days floors like the single-claim path)"""
+    count = len(claims)
+    if signals is None:
+        now = time.time()
+        signals = [stream_features(c, now) for c in claims]
+    return {
+        "days_since_policy_start": np.fromiter(((c.claim_date - c.policy_start_date).days for c in claims),
+                                               dtype = np.int64, count = count),
+        "claim_amount": np.fromiter((c.claim_amount for c in claims), dtype = np.float64, count = count),
+        "previous_claims": np.fromiter((c.previous_claims for c in claims), dtype = np.int64, count = count),
+        "location": np.array([c.location for c in claims], dtype = object),
+        "claimant_age": np.fromiter((c.claimant_age for c in claims), dtype = np.int64, count = count),
+        "claim_type": np.array([c.claim_type for c in claims], dtype = object),
+        **{name: np.fromiter((v[name] for v in signals), dtype = np.int64 if "_claims_" in name else np.float64, count = count)
+           for name in STREAM_FEATURES}
+    }
+
+def stream_features(claim: ClaimData, timestamp: Optional[float] = None) -> dict:
+    """Velocity and telematics features for a claim, from the index and store in this process"""
+    return {**VELOCITY_INDEX.features(claim_velocity_keys(claim), timestamp),
+            **TELEMATICS_STORE.features(claim.policy_id, timestamp)}
+
+def claim_velocity_keys(claim: ClaimData) -> dict:
+    """Keys the velocity index counts a claim under"""
+    return {"policy_id": claim.policy_id, "device_ip": claim.device_ip, "location": claim.location}
+
+# Features available to rule definitions
+STREAM_FEATURES = (*VELOCITY_FEATURES, *TELEMATICS_FEATURES)
+RULE_FEATURES = ("days_since_policy_start", "claim_amount", "previous_claims", "location", "claimant_age", "claim_type",
+                 *STREAM_FEATURES)
+FRAUD_RULES = RuleRegistry(RULE_FEATURES)
+
+# Optional ML model, loaded once per process: before the fork when preloading, else at worker startup
+FRAUD_MODEL = None
+
+def load_fraud_model_once():
+    """Load the model unless this process already holds it"""
+    global FRAUD_MODEL
+    if MODEL_PATH and FRAUD_MODEL is None:
+        FRAUD_MODEL = FraudModel.load(MODEL_PATH)
+
+@app.on_event("startup")
+async def load_fraud_model():
+    load_fraud_model_once()
+
+def warm_scoring_path():
+    """Score a synthetic claim once so the first request doesn't pay NumPy and model first-call costs"""
+    now = datetime.now(timezone.utc)
+    claim = ClaimData(claim_id = "warmup", policy_id = "warmup", claim_amount = 1000.0, claim_type = "auto",
+                      claimant_age = 40, claim_date = now, previous_claims = 0,
+                      policy_start_date = now - timedelta(days = 365), location = "warmup")
+    # Bypasses score_claims_vectorized so the warm-up isn't counted in scoring metrics
+    columns = claim_feature_columns([claim], [dict.fromkeys(STREAM_FEATURES, 0)])
+    FRAUD_RULES.current().evaluate_columns(columns)
+    if FRAUD_MODEL is not None:
+        FRAUD_MODEL.estimator.predict_proba(FRAUD_MODEL.feature_matrix(columns))
+
+STARTUP.step("model", load_fraud_model_once)
+STARTUP.step("scoring", warm_scoring_path, preload = False)
+
+# CPU-bound scoring runs here so the event loop stays free for requests and health checks.
+# Scoring worker processes load their own copy of the model; threads share this process's.
+SCORING_EXECUTOR = ScoringExecutor("fraud", initializer = load_fraud_model_once)
+
+@app.on_event("startup")
+async def start_scoring_executor():
+    await SCORING_EXECUTOR.start()
+
+@app.on_event("shutdown")
+async def stop_scoring_executor():
+    SCORING_EXECUTOR.shutdown()
+
+# Recent claims per policy, device IP and location, shared between the workers of a task
+# through their journals under VELOCITY_SNAPSHOT_PATH
+VELOCITY_INDEX = VelocityIndex()
+_velocity_journal = None
+_velocity_tasks = []
+_velocity_snapshot_path = None
+_velocity_snapshot_slot = None
+
+@app.on_event("startup")
+async def restore_velocity_index():
+    global _velocity_journal, _velocity_snapshot_path, _velocity_snapshot_slot
+    if not VELOCITY_SNAPSHOT_PATH:
+        return
+    _velocity_snapshot_path, _velocity_snapshot_slot = await asyncio.to_thread(claim_snapshot_slot,
+                                                                               VELOCITY_SNAPSHOT_PATH)
+    path, state = await asyncio.to_thread(read_latest_snapshot, VELOCITY_SNAPSHOT_PATH)
+    if state is not None:
+        try:
+            logging.info(f"Restored {VELOCITY_INDEX.restore_state(state)} velocity keys from {path}")
+        except Exception as e:
+            logging.error(f"Error restoring velocity snapshot: {str(e)}")
+    # Catch up on the claims counted since that snapshot before serving
+    _velocity_journal = VelocityJournal(VELOCITY_SNAPSHOT_PATH, _velocity_snapshot_path)
+    await sync_velocity_journal()
+    _velocity_tasks.append(asyncio.create_task(run_periodically(sync_velocity_journal, VELOCITY_SYNC_INTERVAL)))
+    _velocity_tasks.append(asyncio.create_task(run_periodically(snapshot_velocity_index, VELOCITY_SNAPSHOT_INTERVAL)))
+
+async def sync_velocity_journal():
+    try:
+        await _velocity_journal.sync(VELOCITY_INDEX)
+    except Exception as e:
+        logging.error(f"Error syncing velocity journal: {str(e)}")
+
+async def snapshot_velocity_index():
+    # Copy on the event loop so no request mutates the index mid-copy, write off it
+    state = VELOCITY_INDEX.snapshot_state()
+    try:
+        await asyncio.to_thread(write_snapshot, state, _velocity_snapshot_path)
+    except Exception as e:
+        logging.error(f"Error writing velocity snapshot: {str(e)}")
+
+async def run_periodically(job, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        await job()
+
+@app.on_event("shutdown")
+async def save_velocity_index():
+    if _velocity_journal is None:
+        return
+    for task in _velocity_tasks:
+        task.cancel()
+    # Hand this worker's last claims to the others, then leave a snapshot for its replacement
+    await sync_velocity_journal()
+    await snapshot_velocity_index()
+    _velocity_snapshot_slot.close()
+
+# Per-policy vehicle telematics and home sensor features, fed from the IoT stream when TELEMATICS_SOURCE is set
+# by one worker per task, which shares them with the others
+TELEMATICS_STORE = TelematicsFeatureStore()
+TELEMATICS_CONSUMER = create_consumer(TELEMATICS_STORE, "fraud-detection-engine")
+
+@app.on_event("startup")
+async def start_telematics_consumer():
+    if TELEMATICS_CONSUMER is not None:
+        await TELEMATICS_CONSUMER.start()
+
+@app.on_event("shutdown")
+async def stop_telematics_consumer():
+    if TELEMATICS_CONSUMER is not None:
+        await TELEMATICS_CONSUMER.stop()
+
+# Every fraud score is recorded for compliance when AUDIT_STORE is set
+AUDIT_LOG = create_audit_log("fraud-detection", {
+    "claim_id": "string",
+    "policy_id": "string",
+    "claim_type": "string",
+    "claim_amount": "float64",
+    "risk_score": "float64",
+    "ml_score": "float64",
+    "status": "string",
+    "confidence": "string",
+    "risk_factors": "list<string>",
+    "rules_version": "string"
+})
+
+async def audit_fraud_decisions(claims: List[ClaimData], results: List[dict]):
+    if AUDIT_LOG is None:
+        return
+    for claim, result in zip(claims, results):
+        await AUDIT_LOG.record(
+            claim_id = claim.claim_id,
+            policy_id = claim.policy_id,
+            claim_type = claim.claim_type,
+            claim_amount = claim.claim_amount,
+            risk_score = result["risk_score"],
+            ml_score = result["ml_score"],
+            status = result["status"],
+            confidence = result["confidence"],
+            risk_factors = result["risk_factors"],
+            rules_version = result["rules_version"]
+        )
+
+if AUDIT_LOG is not None:
+    STARTUP.step("audit_writer", warm_parquet_writer, preload = False)
+
+@app.on_event("startup")
+async def start_audit_log():
+    if AUDIT_LOG is not None:
+        await AUDIT_LOG.start()
+
+@app.on_event("shutdown")
+async def flush_audit_log():
+    if AUDIT_LOG is not None:
+        await AUDIT_LOG.stop()
+
+# Concurrent requests are bounded by a latency-driven limit. Claims small enough for
+# the claims service to auto-approve are admitted first, so they aren't held behind large ones
+ADMISSION = create_admission_controller("fraud_detect")
+SATURATION_REPORTER = create_saturation_reporter(ADMISSION, "fraud-detection-engine")
+FAST_LANE_MAX_CLAIM_AMOUNT = 5000
+
+def admission(lane: str, requests: int = 1):
+    """Hold admission slots in lane for requests claims, or nothing when admission control is disabled"""
+    return ADMISSION.admit(lane, requests = requests) if ADMISSION is not None else nullcontext()
+
+@app.on_event("startup")
+async def start_saturation_reporter():
+    if SATURATION_REPORTER is not None:
+        await SATURATION_REPORTER.start()
+
+@app.on_event("shutdown")
+async def stop_saturation_reporter():
+    if SATURATION_REPORTER is not None:
+        await SATURATION_REPORTER.stop()
+
+# Concurrent detect_fraud requests are scored together through the vectorized path
+DETECT_BATCHER = create_batcher("fraud_detect", score_claims_offloaded)
+
+@app.post("/admin/rules/reload", tags = ["Administration"])
+async def reload_fraud_rules():
+    """
+    Force this worker to recompile fraud rules from the rule file
+    """
+    try:
+        rule_set = FRAUD_RULES.reload()
+    except Exception as e:
+        logging.error(f"Error reloading fraud rules: {str(e)}")
+        raise HTTPException(status_code = 400, detail = str(e))
+    return {"status": "reloaded", "version": rule_set.version, "rules": len(rule_set.rules)}
     
 @app.get("/health")
 async def health_check():
@@ -105,11 +476,25 @@ async def health_check():
 
     return {"status": "healthy", "service": "fraud-detection"}
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness Endpoint for Load Balancer Routing, 503 until the model and rules are warm
+    """
+    report = STARTUP.report()
+    if not STARTUP.ready:
+        raise HTTPException(status_code = 503, detail = report)
+    return report
+
 @app.get("/metrics")
-async def metrics():
+async def metrics(request: Request):
     """
     Prometheus Metrics Endpoint
     """
-    from prometheus_client import generate_latest
-    return generate_latest()
+    return metrics_response(request)
+
+@app.on_event("shutdown")
+async def release_worker_metrics():
+    mark_worker_dead()
 
+STARTUP.finish_imports(app)
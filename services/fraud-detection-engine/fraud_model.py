@@ -0,0 +1,58 @@
+import logging
+import os
+import time
+from typing import List, Optional
+
+import numpy as np
+from prometheus_client import Histogram
+
+# Metrics
+MODEL_BATCH_SIZE = Histogram('fraud_model_batch_size', 'Rows per fraud model predict_proba call',
+                             buckets = (1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 10000))
+MODEL_INFERENCE_TIME = Histogram('fraud_model_inference_seconds', 'Time spent in fraud model predict_proba')
+
+MODEL_PATH = os.getenv("FRAUD_MODEL_PATH")
+MODEL_WEIGHT = float(os.getenv("FRAUD_MODEL_WEIGHT", "0.5"))
+
+# Numeric claim features fed to models that don't record feature_names_in_
+DEFAULT_MODEL_FEATURES = ("days_since_policy_start", "claim_amount", "previous_claims", "claimant_age")
+
+class FraudModel:
+    """
+    Serialized scikit-learn classifier loaded with memory-mapped arrays, so the
+    uvicorn workers share the model's pages instead of each holding a copy.
+    """
+    def __init__(self, estimator, feature_names: Optional[List[str]] = None):
+        self.estimator = estimator
+        names = getattr(estimator, "feature_names_in_", None)
+        self.feature_names = list(feature_names or (names if names is not None else DEFAULT_MODEL_FEATURES))
+        # Column of predict_proba holding the fraud class
+        classes = list(getattr(estimator, "classes_", [0, 1]))
+        self.positive_index = classes.index(1) if 1 in classes else len(classes) - 1
+
+    @classmethod
+    def load(cls, path: str) -> "FraudModel":
+        import joblib
+
+        start_time = time.perf_counter()
+        estimator = joblib.load(path, mmap_mode = "r")
+        logging.info(f"Loaded fraud model from {path} in {time.perf_counter() - start_time:.3f}s")
+        return cls(estimator)
+
+    def feature_row(self, features: dict) -> List[float]:
+        return [float(features[name]) for name in self.feature_names]
+
+    def feature_matrix(self, columns: dict) -> np.ndarray:
+        return np.column_stack([np.asarray(columns[name], dtype = np.float64) for name in self.feature_names])
+
+    def predict(self, matrix: np.ndarray) -> np.ndarray:
+        """Fraud probability per row, from a single predict_proba call"""
+        MODEL_BATCH_SIZE.observe(len(matrix))
+        start_time = time.perf_counter()
+        probabilities = self.estimator.predict_proba(matrix)[:, self.positive_index]
+        MODEL_INFERENCE_TIME.observe(time.perf_counter() - start_time)
+        return probabilities
+
+def blend_scores(rule_score, model_probability, weight: float = MODEL_WEIGHT):
+    """Blend the rule score (0-100) with the model's fraud probability scaled to 0-100"""
+    return (1 - weight) * rule_score + weight * (model_probability * 100)
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import logging
+import operator
+import os
+import time
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# Built-in rule set, used when FRAUD_RULES_PATH is not configured
+DEFAULT_RULES = {
+    "version": "default",
+    "rules": [
+        {"name": "Very Recent Policy", "feature": "days_since_policy_start", "op": "lt", "value": 30, "score": 35},
+        {"name": "High Claim Amount", "feature": "claim_amount", "op": "gt", "value": 50000, "score": 25},
+        {"name": "Multiple Previous Claims", "feature": "previous_claims", "op": "gt", "value": 3, "score": 30},
+        {"name": "High Risk Location Detected", "feature": "location", "op": "in", "value": ["NK", "IR", "CU"], "score": 40},
+        {"name": "High Risk Age Group", "feature": "claimant_age", "op": "lt", "value": 25, "score": 10}
+    ],
+    "frequency_weight": 0.1,
+    "max_score": 100
+}
+
+# Rule comparison operators: (scalar, vectorized)
+OPERATORS = {
+    "lt": (operator.lt, np.less),
+    "le": (operator.le, np.less_equal),
+    "gt": (operator.gt, np.greater),
+    "ge": (operator.ge, np.greater_equal),
+    "eq": (operator.eq, np.equal),
+    "ne": (operator.ne, np.not_equal),
+}
+SET_OPERATORS = ("in", "not_in")
+
+RULES_PATH = os.getenv("FRAUD_RULES_PATH")
+RULES_RELOAD_INTERVAL = float(os.getenv("FRAUD_RULES_RELOAD_INTERVAL", "30"))
+
+class CompiledRule(NamedTuple):
+    name: str
+    feature: str
+    bit: int
+    score: float
+    predicate: object  # feature value -> bool
+    vector_predicate: object  # feature column -> bool array
+
+class CompiledRuleSet:
+    """
+    Fraud rules compiled into an evaluation plan. Triggered rules are packed into
+    a bitmask; risk factors and base scores are looked up per distinct mask, so
+    the per-claim cost beyond the predicates does not grow with the rule count.
+    """
+    def __init__(self, version: str, rules: List[CompiledRule], frequency_weight: float, max_score: float,
+                 definition: Optional[dict] = None):
+        self.version = version
+        self.rules = rules
+        # Source of the rule set and its digest, for compiling the same rule set in scoring worker processes
+        self.definition = definition
+        self.fingerprint = rule_fingerprint(definition) if definition is not None else None
+        self.frequency_weight = frequency_weight
+        self.max_score = max_score
+        self.features = frozenset(rule.feature for rule in rules)
+        self.score_dtype = np.float64 if any(isinstance(rule.score, float) for rule in rules) else np.int64
+        # Masks are resolved on demand, bounded for large rule sets
+        self.factors_for_mask = lru_cache(maxsize = 4096)(self._factors_for_mask)
+
+    def _factors_for_mask(self, mask: int) -> Tuple[Tuple[str, ...], float]:
+        names = []
+        base_score = 0
+        for rule in self.rules:
+            if mask & (1 << rule.bit):
+                names.append(rule.name)
+                base_score += rule.score
+        return tuple(names), base_score
+
+    @property
+    def reference(self) -> Tuple[Optional[str], Optional[dict]]:
+        """(fingerprint, definition) to pass to RuleRegistry.adopt in another process"""
+        return self.fingerprint, self.definition
+
+    def evaluate(self, features: dict) -> Tuple[List[str], float]:
+        """Return (risk factors, final score) for one claim's features"""
+        mask = 0
+        for rule in self.rules:
+            if rule.predicate(features[rule.feature]):
+                mask |= 1 << rule.bit
+        risk_factors, base_score = self.factors_for_mask(mask)
+        weighted_score = base_score * (1 + (features["previous_claims"] * self.frequency_weight))
+        return list(risk_factors), min(self.max_score, weighted_score)
+
+    def evaluate_columns(self, columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (rule bitmasks, weighted scores before the cap) for feature columns"""
+        size = len(columns["previous_claims"])
+        masks = np.zeros(size, dtype = np.int64)
+        base_scores = np.zeros(size, dtype = self.score_dtype)
+        for rule in self.rules:
+            triggered = rule.vector_predicate(columns[rule.feature])
+            masks |= triggered.astype(np.int64) << rule.bit
+            base_scores += triggered * rule.score
+        weighted_scores = base_scores * (1 + (columns["previous_claims"] * self.frequency_weight))
+        return masks, weighted_scores
+
+def compile_rule(spec: dict, bit: int, known_features) -> CompiledRule:
+    """Compile one rule definition into scalar and vectorized predicates"""
+    name, feature, op, value = spec["name"], spec["feature"], spec["op"], spec["value"]
+    if feature not in known_features:
+        raise ValueError(f"Rule {name} uses unknown feature {feature}")
+
+    if op in SET_OPERATORS:
+        values = frozenset(value)
+        value_list = list(values)
+        if op == "in":
+            predicate = values.__contains__
+            vector_predicate = lambda column: np.isin(column, value_list)
+        else:
+            predicate = lambda x: x not in values
+            vector_predicate = lambda column: ~np.isin(column, value_list)
+    elif op in OPERATORS:
+        scalar_op, vector_op = OPERATORS[op]
+        predicate = lambda x: scalar_op(x, value)
+        vector_predicate = lambda column: vector_op(column, value)
+    else:
+        raise ValueError(f"Rule {name} uses unknown operator {op}")
+
+    return CompiledRule(name, feature, bit, spec["score"], predicate, vector_predicate)
+
+def compile_rules(definition: dict, known_features) -> CompiledRuleSet:
+    """Compile a rule set definition, validating it before it can go live"""
+    rules = [compile_rule(spec, bit, known_features) for bit, spec in enumerate(definition["rules"])]
+    if len(rules) > 62:
+        raise ValueError("Rule sets are limited to 62 rules")
+    return CompiledRuleSet(
+        version = str(definition.get("version", "unversioned")),
+        rules = rules,
+        frequency_weight = definition.get("frequency_weight", 0.1),
+        max_score = definition.get("max_score", 100),
+        definition = definition
+    )
+
+def rule_fingerprint(definition: dict) -> str:
+    """Digest of a rule set definition; edits that keep the version string still change it"""
+    return hashlib.sha256(json.dumps(definition, sort_keys = True, default = str).encode()).hexdigest()
+
+def load_rule_definition(path: str) -> dict:
+    """Read a rule set from a JSON or YAML file"""
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            return yaml.safe_load(f)
+        return json.load(f)
+
+class RuleRegistry:
+    """
+    Holds the active rule set and swaps it atomically on reload, so in-flight
+    evaluations keep using the rule set they started with.
+    """
+    def __init__(self, known_features, path: Optional[str] = RULES_PATH,
+                 reload_interval: float = RULES_RELOAD_INTERVAL):
+        self.known_features = frozenset(known_features)
+        self.path = path
+        self.reload_interval = reload_interval
+        self._mtime = None
+        self._checked_at = time.monotonic()
+        self.active = None
+        self.reload()
+
+    def reload(self) -> CompiledRuleSet:
+        if self.path and os.path.exists(self.path):
+            mtime = os.path.getmtime(self.path)
+            rule_set = compile_rules(load_rule_definition(self.path), self.known_features)
+            self._mtime = mtime
+        else:
+            rule_set = compile_rules(DEFAULT_RULES, self.known_features)
+        self.active = rule_set
+        logging.info(f"Loaded fraud rule set {rule_set.version} with {len(rule_set.rules)} rules")
+        return rule_set
+
+    def adopt(self, fingerprint: str, definition: dict) -> CompiledRuleSet:
+        """
+        Rule set from another process's reference, compiled here once per fingerprint.
+        Scoring worker processes get the parent's rule set with each task, so they
+        never score with rules older or newer than the parent's.
+        """
+        rule_set = self.active
+        if rule_set.fingerprint != fingerprint:
+            rule_set = self.active = compile_rules(definition, self.known_features)
+        return rule_set
+
+    def current(self) -> CompiledRuleSet:
+        """Return the active rule set, picking up config file changes once per interval"""
+        if self.path:
+            now = time.monotonic()
+            if now - self._checked_at >= self.reload_interval:
+                self._checked_at = now
+                try:
+                    if os.path.getmtime(self.path) != self._mtime:
+                        self.reload()
+                except Exception as e:
+                    # Keep serving the current rule set if the new file is missing or invalid
+                    logging.error(f"Error reloading fraud rules: {str(e)}")
+        return self.active
@@ -0,0 +1,95 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import numpy as np
+import pytest
+
+import app
+from fraud_model import FraudModel
+from fraud_rules import compile_rules
+
+NOW = datetime(2026, 1, 15, tzinfo = timezone.utc)
+
+# The built-in rules plus rules on a categorical and a stream feature
+RULES = {"version": "parity", "rules": [
+    {"name": "Very Recent Policy", "feature": "days_since_policy_start", "op": "lt", "value": 30, "score": 35},
+    {"name": "High Claim Amount", "feature": "claim_amount", "op": "gt", "value": 50000, "score": 25},
+    {"name": "Multiple Previous Claims", "feature": "previous_claims", "op": "gt", "value": 3, "score": 30},
+    {"name": "High Risk Location Detected", "feature": "location", "op": "in", "value": ["NK", "IR", "CU"], "score": 40},
+    {"name": "High Risk Age Group", "feature": "claimant_age", "op": "lt", "value": 25, "score": 10},
+    {"name": "Theft Claim", "feature": "claim_type", "op": "in", "value": ["theft"], "score": 15},
+    {"name": "Policy Claim Burst", "feature": app.VELOCITY_FEATURES[0], "op": "gt", "value": 2, "score": 20}
+]}
+
+class LinearEstimator:
+    """Stands in for a fitted classifier: fraud probability from a fixed weighting of the features"""
+    classes_ = [0, 1]
+
+    def predict_proba(self, matrix: np.ndarray) -> np.ndarray:
+        fraud = 1 / (1 + np.exp(-(matrix @ np.array([-0.01, 0.00005, 0.3, -0.02]))))
+        return np.column_stack([1 - fraud, fraud])
+
+def random_claim(rng: random.Random, index: int) -> app.ClaimData:
+    # Policy starts at sub-day offsets, so timedelta.days flooring is compared too
+    return app.ClaimData(claim_id = f"CLM-{index}", policy_id = f"POL-{index}",
+                         claim_amount = rng.choice([rng.uniform(100, 120000), 50000.0]),
+                         claim_type = rng.choice(["auto", "home", "theft"]), claimant_age = rng.randint(18, 80),
+                         claim_date = NOW, previous_claims = rng.randint(0, 6),
+                         policy_start_date = NOW - timedelta(days = rng.randint(0, 400), hours = rng.randint(0, 23)),
+                         location = rng.choice(["UK", "NK", "IR", "US", "CU"]))
+
+def random_signals(rng: random.Random) -> dict:
+    return {name: rng.randint(0, 5) if "_claims_" in name else rng.uniform(0, 1000) for name in app.STREAM_FEATURES}
+
+@pytest.mark.parametrize("model", [None, FraudModel(LinearEstimator())])
+def test_vectorized_scores_match_single_claim_scores(monkeypatch, model):
+    monkeypatch.setattr(app, "FRAUD_MODEL", model)
+    rule_set = compile_rules(RULES, app.RULE_FEATURES)
+    rng = random.Random(7)
+    claims = [random_claim(rng, index) for index in range(500)]
+    signals = [random_signals(rng) for _ in claims]
+
+    batch = app.score_claims_vectorized(claims, rule_set, signals)
+    for claim, claim_signals, result in zip(claims, signals, batch):
+        single = app.score_claim(claim, claim_signals, rule_set)
+        assert result["claim_id"] == claim.claim_id
+        assert result["risk_score"] == pytest.approx(single["risk_score"])
+        for field in ("risk_factors", "status", "confidence", "rules_version"):
+            assert result[field] == single[field]
+        assert (result["ml_score"] is None) == (model is None)
+        if model is not None:
+            assert result["ml_score"] == pytest.approx(single["ml_score"])
+
+def test_empty_batch_scores_nothing():
+    assert app.score_claims_vectorized([]) == []
+
+def test_batch_endpoint_matches_detect_endpoint(monkeypatch):
+    monkeypatch.setattr(app, "AUDIT_LOG", None)
+    monkeypatch.setattr(app, "DETECT_BATCHER", None)
+    rng = random.Random(11)
+    claims = [random_claim(rng, index) for index in range(20)]
+
+    def payload(claim: app.ClaimData, prefix: str) -> dict:
+        # Fresh velocity keys per request, so both endpoints see each claim as the first of its kind
+        return {**claim.model_dump(mode = "json"), "claim_id": f"{prefix}-{claim.claim_id}",
+                "policy_id": f"{prefix}-{claim.policy_id}", "device_ip": f"{prefix}-{claim.claim_id}"}
+
+    async def run():
+        async with httpx.AsyncClient(transport = httpx.ASGITransport(app = app.app), base_url = "http://test") as client:
+            batch = await client.post("/api/v1/detect/batch", json = {"claims": [payload(c, "batch") for c in claims]})
+            singles = [await client.post("/api/v1/detect", json = payload(c, "single")) for c in claims]
+            return batch, singles
+
+    batch, singles = asyncio.run(run())
+    assert batch.status_code == 200
+    body = batch.json()
+    assert body["batch_size"] == len(claims)
+    assert [result["claim_id"] for result in body["results"]] == [f"batch-{c.claim_id}" for c in claims]
+    for result, single in zip(body["results"], singles):
+        assert single.status_code == 200
+        single = single.json()
+        assert result["risk_score"] == pytest.approx(single["risk_score"])
+        assert result["risk_factors"] == single["risk_factors"]
+        assert result["status"] == single["status"]
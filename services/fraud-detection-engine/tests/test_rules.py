@@ -0,0 +1,75 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import app
+from fraud_rules import RuleRegistry, compile_rules
+from insurance_common.executor import ScoringExecutor
+
+NOW = datetime(2026, 1, 15, tzinfo = timezone.utc)
+
+def claim(claim_id: str = "CLM-1", claim_amount: float = 60000.0, **fields) -> app.ClaimData:
+    values = {"claim_id": claim_id, "policy_id": "POL-1", "claim_amount": claim_amount, "claim_type": "auto",
+              "claimant_age": 40, "claim_date": NOW, "previous_claims": 1,
+              "policy_start_date": NOW - timedelta(days = 365), "location": "UK"}
+    return app.ClaimData(**{**values, **fields})
+
+def rules(version: str, threshold: float) -> dict:
+    return {"version": version, "rules": [
+        {"name": "High Claim Amount", "feature": "claim_amount", "op": "gt", "value": threshold, "score": 50}
+    ]}
+
+def write_rules(path, definition: dict, mtime: float):
+    path.write_text(json.dumps(definition))
+    os.utime(path, (mtime, mtime))
+
+def test_registry_picks_up_rule_file_changes_and_keeps_serving_on_a_bad_file(tmp_path):
+    path = tmp_path / "rules.json"
+    write_rules(path, rules("v1", 50000), 1000)
+    registry = RuleRegistry(app.RULE_FEATURES, path = str(path), reload_interval = 0)
+    assert registry.current().version == "v1"
+
+    write_rules(path, rules("v2", 10000), 2000)
+    assert registry.current().version == "v2"
+
+    path.write_text("{not json")
+    os.utime(path, (3000, 3000))
+    assert registry.current().version == "v2"
+    with pytest.raises(ValueError):
+        registry.reload()
+
+def test_edited_rules_with_the_same_version_are_adopted():
+    parent = RuleRegistry(app.RULE_FEATURES, path = None)
+    worker = RuleRegistry(app.RULE_FEATURES, path = None)
+    parent.active = compile_rules(rules("v1", 50000), app.RULE_FEATURES)
+
+    adopted = worker.adopt(*parent.current().reference)
+    assert adopted.fingerprint == parent.current().fingerprint
+    assert worker.adopt(*parent.current().reference) is adopted
+
+    parent.active = compile_rules(rules("v1", 70000), app.RULE_FEATURES)
+    assert worker.adopt(*parent.current().reference).rules[0].predicate(60000) is False
+
+def test_process_workers_score_with_the_parent_rule_set(monkeypatch):
+    # The spawned workers import the app with the built-in rules; the parent has reloaded others
+    monkeypatch.setattr(app.FRAUD_RULES, "active", compile_rules(rules("reloaded", 10000), app.RULE_FEATURES))
+    executor = ScoringExecutor("test", mode = "process", workers = 1)
+    signals = dict.fromkeys(app.STREAM_FEATURES, 0)
+
+    async def run():
+        await executor.start()
+        try:
+            single = await executor.run(app.score_claim_task, app.FRAUD_RULES.current().reference,
+                                        claim(claim_amount = 20000.0), signals)
+            batch = await executor.run(app.score_claims_task, app.FRAUD_RULES.current().reference,
+                                       [claim(claim_amount = 20000.0)], [signals])
+            return single, batch[0]
+        finally:
+            executor.shutdown()
+
+    for result in asyncio.run(run()):
+        assert result["rules_version"] == "reloaded"
+        assert result["risk_factors"] == ["High Claim Amount"]
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+import velocity_index
+from velocity_index import VelocityIndex, VelocityJournal, claim_snapshot_slot, read_latest_snapshot, write_snapshot
+
+KEYS = {"policy_id": "POL-1", "device_ip": "10.0.0.1", "location": "UK"}
+HOUR = 3600
+DAY = 86400
+# Aligned to every bucket width, so window edges fall on round offsets
+START = 1000 * 30 * DAY
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock(START)
+    monkeypatch.setattr(velocity_index, "time", clock)
+    return clock
+
+def test_windows_count_claims_and_amounts(clock):
+    index = VelocityIndex()
+    index.record("CLM-1", KEYS, 100.0, START)
+    index.record("CLM-2", KEYS, 250.0, START + 600)
+
+    features = index.features(KEYS, START + 600)
+    assert features["policy_claims_1h"] == 2
+    assert features["policy_amount_1h"] == 350.0
+    assert features["ip_claims_24h"] == 2
+    assert features["location_claims_30d"] == 2
+
+def test_claims_leave_each_window_as_it_slides(clock):
+    index = VelocityIndex()
+    index.record("CLM-1", KEYS, 100.0, START)
+
+    # The 1h window spans the current 5-minute bucket and the 11 before it
+    assert index.features(KEYS, START + HOUR - 1)["policy_claims_1h"] == 1
+    features = index.features(KEYS, START + HOUR)
+    assert features["policy_claims_1h"] == 0
+    assert features["policy_claims_24h"] == 1
+    features = index.features(KEYS, START + DAY)
+    assert features["policy_claims_24h"] == 0
+    assert features["policy_claims_30d"] == 1
+    assert index.features(KEYS, START + 30 * DAY)["policy_claims_30d"] == 0
+
+def test_unseen_and_missing_keys_read_zero(clock):
+    index = VelocityIndex()
+    index.record("CLM-1", {**KEYS, "device_ip": None}, 100.0, START)
+
+    features = index.features({**KEYS, "policy_id": "POL-2"}, START)
+    assert features["policy_claims_1h"] == 0
+    assert features["ip_claims_1h"] == 0
+    assert features["location_claims_1h"] == 1
+
+def test_retried_claim_is_counted_once(clock):
+    index = VelocityIndex()
+    assert index.record("CLM-1", KEYS, 100.0, START)
+    assert not index.record("CLM-1", KEYS, 100.0, START + 5)
+    assert index.features(KEYS, START + 5)["policy_claims_1h"] == 1
+
+def test_claim_ids_expire_after_their_ttl(clock):
+    index = VelocityIndex(claim_id_ttl = HOUR)
+    index.record("CLM-1", KEYS, 100.0, START)
+    clock.now += HOUR
+    index.record("CLM-2", KEYS, 100.0, clock.now)
+    assert index.record("CLM-1", KEYS, 100.0, clock.now)
+
+def test_snapshot_keeps_counted_claim_ids(clock, tmp_path):
+    index = VelocityIndex()
+    index.record("CLM-1", KEYS, 100.0, START)
+    path = str(tmp_path / "index")
+    write_snapshot(index.snapshot_state(), f"{path}.0")
+
+    restored = VelocityIndex()
+    _, state = read_latest_snapshot(path)
+    assert restored.restore_state(state) == 3
+    assert not restored.record("CLM-1", KEYS, 100.0, START)
+    assert restored.features(KEYS, START)["policy_claims_1h"] == 1
+
+def test_journal_shares_claims_between_workers(clock, tmp_path):
+    path = str(tmp_path / "index")
+    slots = [claim_snapshot_slot(path) for _ in range(2)]
+    indexes = [VelocityIndex(), VelocityIndex()]
+    journals = [VelocityJournal(path, slot_path) for slot_path, _ in slots]
+
+    async def run():
+        for worker, claim_id in ((0, "CLM-1"), (1, "CLM-2"), (1, "CLM-1")):
+            # A retry landing on another worker before the journals sync is still counted once there
+            if indexes[worker].record(claim_id, KEYS, 100.0, START):
+                journals[worker].append(claim_id, KEYS, 100.0, START)
+        for _ in range(2):
+            for index, journal in zip(indexes, journals):
+                await journal.sync(index)
+
+    asyncio.run(run())
+    assert [index.features(KEYS, START)["policy_claims_1h"] for index in indexes] == [2, 2]
+    for _, lock_file in slots:
+        lock_file.close()
+
+def test_replacement_worker_catches_up_from_its_slot_journal(clock, tmp_path):
+    path = str(tmp_path / "index")
+    slot_path, lock_file = claim_snapshot_slot(path)
+    index, journal = VelocityIndex(), VelocityJournal(path, slot_path)
+
+    async def run():
+        await journal.sync(index)
+        index.record("CLM-1", KEYS, 100.0, START)
+        journal.append("CLM-1", KEYS, 100.0, START)
+        await journal.sync(index)
+        lock_file.close()
+
+        # The replacement takes over the free slot and reads what its predecessor journalled
+        replacement_path, replacement_lock = claim_snapshot_slot(path)
+        assert replacement_path == slot_path
+        replacement = VelocityIndex()
+        assert await VelocityJournal(path, replacement_path).sync(replacement) == 1
+        replacement_lock.close()
+        return replacement
+
+    assert asyncio.run(run()).features(KEYS, START)["policy_claims_1h"] == 1
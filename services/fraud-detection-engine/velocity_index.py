@@ -0,0 +1,376 @@
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+import pickle
+import tempfile
+import time
+from array import array
+from collections import OrderedDict
+from typing import IO, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+# Metrics
+VELOCITY_KEYS = Gauge('fraud_velocity_keys', 'Keys tracked by the claim velocity index', ['dimension'],
+                      multiprocess_mode = 'livesum')
+VELOCITY_EVICTIONS = Counter('fraud_velocity_evictions_total', 'Keys dropped from the claim velocity index', ['reason'])
+VELOCITY_CLAIMS = Counter('fraud_velocity_claims_total', 'Claims offered to the velocity index by source and result',
+                          ['source', 'result'])
+VELOCITY_JOURNAL_ERRORS = Counter('fraud_velocity_journal_errors_total', 'Velocity journal failures by stage', ['stage'])
+
+VELOCITY_MAX_KEYS = int(os.getenv("VELOCITY_MAX_KEYS", "20000"))  # Per dimension
+# Counted claim_ids remembered so a retried claim is counted once
+VELOCITY_MAX_CLAIM_IDS = int(os.getenv("VELOCITY_MAX_CLAIM_IDS", "200000"))
+VELOCITY_CLAIM_ID_TTL = float(os.getenv("VELOCITY_CLAIM_ID_TTL", "86400"))
+# Base path shared by the gunicorn workers of a task: each worker claims a slot, snapshots its index to
+# <path>.<slot> and journals the claims it counts to <path>.<slot>.<segment>.events. Empty keeps every
+# worker's index to itself.
+VELOCITY_SNAPSHOT_PATH = os.getenv("VELOCITY_SNAPSHOT_PATH",
+                                   os.path.join(tempfile.gettempdir(), "fraud-detection-engine-velocity", "index"))
+VELOCITY_SNAPSHOT_INTERVAL = float(os.getenv("VELOCITY_SNAPSHOT_INTERVAL", "300"))
+# How often each worker applies the claims the other workers counted
+VELOCITY_SYNC_INTERVAL = float(os.getenv("VELOCITY_SYNC_INTERVAL", "1"))
+
+# Window name, bucket width in seconds and bucket count. A window holds the current
+# partial bucket plus the full buckets before it, so "1h" spans 55 to 60 minutes.
+VELOCITY_WINDOWS = (("1h", 300, 12), ("24h", 3600, 24), ("30d", 86400, 30))
+
+# Claim fields the index is keyed on, and the prefix of their features
+VELOCITY_DIMENSIONS = {"policy_id": "policy", "device_ip": "ip", "location": "location"}
+
+VELOCITY_FEATURES = tuple(
+    f"{prefix}_{measure}_{window}"
+    for prefix in VELOCITY_DIMENSIONS.values()
+    for measure in ("claims", "amount")
+    for window, _, _ in VELOCITY_WINDOWS
+)
+
+# (claim count feature, amount feature) per window, for each dimension
+FEATURE_NAMES = {
+    dimension: [(f"{prefix}_claims_{window}", f"{prefix}_amount_{window}") for window, _, _ in VELOCITY_WINDOWS]
+    for dimension, prefix in VELOCITY_DIMENSIONS.items()
+}
+
+# (bucket width, bucket count, offset into a counter's flat bucket arrays) per window
+WINDOW_LAYOUT = []
+_offset = 0
+for _, _width, _size in VELOCITY_WINDOWS:
+    WINDOW_LAYOUT.append((_width, _size, _offset))
+    _offset += _size
+TOTAL_BUCKETS = _offset
+MAX_WINDOW_SECONDS = max(width * size for _, width, size in VELOCITY_WINDOWS)
+
+SNAPSHOT_FORMAT_VERSION = 2
+# Journal segments kept per worker; together they outlast a snapshot interval, so a
+# worker restoring the newest snapshot finds every claim counted after it
+JOURNAL_SEGMENTS = 3
+
+class VelocityCounter:
+    """
+    Claim counts and amounts for one key in fixed rings of time buckets, one ring
+    per window, with running window totals. Buckets that fall out of a window are
+    subtracted when the ring advances, so updates and reads are amortized O(1).
+    """
+    __slots__ = ("heads", "counts", "amounts", "window_counts", "window_amounts", "last_seen")
+
+    def __init__(self):
+        self.heads = [-1] * len(WINDOW_LAYOUT)  # Latest bucket number per window
+        self.counts = array("i", [0]) * TOTAL_BUCKETS
+        self.amounts = array("d", [0.0]) * TOTAL_BUCKETS
+        self.window_counts = [0] * len(WINDOW_LAYOUT)
+        self.window_amounts = [0.0] * len(WINDOW_LAYOUT)
+        self.last_seen = 0.0
+
+    def _advance(self, window: int, bucket: int):
+        head = self.heads[window]
+        if bucket <= head:
+            return
+        _, size, offset = WINDOW_LAYOUT[window]
+        if head < 0 or bucket - head >= size:
+            self.counts[offset:offset + size] = array("i", [0]) * size
+            self.amounts[offset:offset + size] = array("d", [0.0]) * size
+            self.window_counts[window] = 0
+            self.window_amounts[window] = 0.0
+        else:
+            for expired in range(head + 1, bucket + 1):
+                slot = offset + expired % size
+                self.window_counts[window] -= self.counts[slot]
+                self.window_amounts[window] -= self.amounts[slot]
+                self.counts[slot] = 0
+                self.amounts[slot] = 0.0
+        self.heads[window] = bucket
+
+    def add(self, timestamp: float, amount: float):
+        for window, (width, size, offset) in enumerate(WINDOW_LAYOUT):
+            bucket = int(timestamp // width)
+            self._advance(window, bucket)
+            if bucket <= self.heads[window] - size:
+                continue  # Late event, already outside this window
+            slot = offset + bucket % size
+            self.counts[slot] += 1
+            self.amounts[slot] += amount
+            self.window_counts[window] += 1
+            self.window_amounts[window] += amount
+        self.last_seen = max(self.last_seen, timestamp)
+
+    def totals(self, timestamp: float):
+        """(counts, amounts) per window as of timestamp"""
+        for window, (width, _, _) in enumerate(WINDOW_LAYOUT):
+            self._advance(window, int(timestamp // width))
+        return self.window_counts, self.window_amounts
+
+class VelocityIndex:
+    """
+    Sliding-window claim counts and amounts per policy, device IP and location.
+    Each dimension keeps at most max_keys counters in LRU order; keys with no
+    claims in the longest window expire. A claim is counted once per claim_id:
+    ids are remembered for claim_id_ttl seconds, at most max_claim_ids of them,
+    so a retried submission doesn't inflate the counts. The index lives in the
+    worker process; a VelocityJournal shares it between the workers of a task.
+    """
+    def __init__(self, max_keys: int = VELOCITY_MAX_KEYS, max_claim_ids: int = VELOCITY_MAX_CLAIM_IDS,
+                 claim_id_ttl: float = VELOCITY_CLAIM_ID_TTL):
+        self.max_keys = max_keys
+        self.max_claim_ids = max_claim_ids
+        self.claim_id_ttl = claim_id_ttl
+        self._entries = {dimension: OrderedDict() for dimension in VELOCITY_DIMENSIONS}
+        self._claim_ids = OrderedDict()  # claim_id -> time it was counted, oldest first
+
+    def record(self, claim_id: str, keys: Dict[str, Optional[str]], amount: float, timestamp: Optional[float] = None,
+               source: str = "request") -> bool:
+        """Count one claim against each of its non-empty keys; False if the claim_id was already counted"""
+        timestamp = time.time() if timestamp is None else timestamp
+        if not self._remember_claim(claim_id):
+            VELOCITY_CLAIMS.labels(source = source, result = "duplicate").inc()
+            return False
+        VELOCITY_CLAIMS.labels(source = source, result = "counted").inc()
+        for dimension, key in keys.items():
+            if key is None:
+                continue
+            entries = self._entries[dimension]
+            counter = entries.get(key)
+            if counter is None:
+                counter = entries[key] = VelocityCounter()
+                counter.add(timestamp, amount)
+                self._evict(dimension, timestamp)
+            else:
+                entries.move_to_end(key)
+                counter.add(timestamp, amount)
+        return True
+
+    def _remember_claim(self, claim_id: str) -> bool:
+        if claim_id in self._claim_ids:
+            return False
+        now = time.time()
+        self._claim_ids[claim_id] = now
+        while self._claim_ids:
+            oldest_id, counted_at = next(iter(self._claim_ids.items()))
+            if counted_at > now - self.claim_id_ttl and len(self._claim_ids) <= self.max_claim_ids:
+                break
+            del self._claim_ids[oldest_id]
+        return True
+
+    def features(self, keys: Dict[str, Optional[str]], timestamp: Optional[float] = None) -> dict:
+        """Velocity features for a claim's keys as of timestamp, zero for unseen keys"""
+        timestamp = time.time() if timestamp is None else timestamp
+        features = {}
+        for dimension, names in FEATURE_NAMES.items():
+            key = keys.get(dimension)
+            counter = self._entries[dimension].get(key) if key is not None else None
+            if counter is None:
+                for count_name, amount_name in names:
+                    features[count_name] = 0
+                    features[amount_name] = 0.0
+                continue
+            counts, amounts = counter.totals(timestamp)
+            for (count_name, amount_name), count, amount in zip(names, counts, amounts):
+                features[count_name] = count
+                # Running sums can drift a hair below zero as buckets are subtracted
+                features[amount_name] = max(amount, 0.0)
+        return features
+
+    def _evict(self, dimension: str, now: float):
+        entries = self._entries[dimension]
+        # Least recently updated keys come first; drop those with nothing left in any window
+        while entries:
+            key, counter = next(iter(entries.items()))
+            if counter.last_seen > now - MAX_WINDOW_SECONDS:
+                break
+            del entries[key]
+            VELOCITY_EVICTIONS.labels(reason = "expired").inc()
+        while len(entries) > self.max_keys:
+            entries.popitem(last = False)
+            VELOCITY_EVICTIONS.labels(reason = "capacity").inc()
+        VELOCITY_KEYS.labels(dimension = dimension).set(len(entries))
+
+    def snapshot_state(self) -> dict:
+        """Copy of the index contents for writing to disk"""
+        return {
+            "format": SNAPSHOT_FORMAT_VERSION,
+            "windows": VELOCITY_WINDOWS,
+            "created_at": time.time(),
+            "entries": {
+                dimension: [
+                    (key, list(c.heads), c.counts.tobytes(), c.amounts.tobytes(),
+                     list(c.window_counts), list(c.window_amounts), c.last_seen)
+                    for key, c in entries.items()
+                ]
+                for dimension, entries in self._entries.items()
+            },
+            "claim_ids": list(self._claim_ids.items())
+        }
+
+    def restore_state(self, state: dict) -> int:
+        """Replace the index contents from snapshot_state output; returns the keys restored"""
+        if state.get("format") != SNAPSHOT_FORMAT_VERSION or tuple(map(tuple, state["windows"])) != VELOCITY_WINDOWS:
+            raise ValueError("Velocity snapshot was written with different windows")
+        now = time.time()
+        restored = 0
+        for dimension in VELOCITY_DIMENSIONS:
+            entries = OrderedDict()
+            for key, heads, counts, amounts, window_counts, window_amounts, last_seen in state["entries"].get(dimension, []):
+                if last_seen <= now - MAX_WINDOW_SECONDS:
+                    continue
+                counter = VelocityCounter()
+                counter.heads = heads
+                counter.counts = array("i", counts)
+                counter.amounts = array("d", amounts)
+                counter.window_counts = window_counts
+                counter.window_amounts = window_amounts
+                counter.last_seen = last_seen
+                entries[key] = counter
+            while len(entries) > self.max_keys:
+                entries.popitem(last = False)
+            self._entries[dimension] = entries
+            VELOCITY_KEYS.labels(dimension = dimension).set(len(entries))
+            restored += len(entries)
+        self._claim_ids = OrderedDict(
+            (claim_id, counted_at) for claim_id, counted_at in state["claim_ids"]
+            if counted_at > now - self.claim_id_ttl)
+        while len(self._claim_ids) > self.max_claim_ids:
+            self._claim_ids.popitem(last = False)
+        return restored
+
+class VelocityJournal:
+    """
+    Shares the claims each worker of a task counts with the other workers, so
+    velocity thresholds hold per task rather than per worker. A worker appends
+    the claims it counts to its own journal under slot_path, and every sync
+    applies the claims the other workers journalled since the last one; the
+    index counts each claim_id once, so claims read twice are harmless. The
+    first sync also reads this slot's journal, left by the worker it replaces.
+    Journals rotate every segment_seconds and keep JOURNAL_SEGMENTS segments.
+    """
+    def __init__(self, path: str, slot_path: str, segment_seconds: float = VELOCITY_SNAPSHOT_INTERVAL):
+        self.path = path
+        self.slot_path = slot_path
+        self.segment_seconds = segment_seconds
+        self.pending: List[list] = []
+        self._offsets: Dict[str, int] = {}
+        self._read_own = True
+
+    def append(self, claim_id: str, keys: Dict[str, Optional[str]], amount: float, timestamp: float):
+        """Queue a claim this worker counted for the next sync"""
+        self.pending.append([claim_id, keys, amount, timestamp])
+
+    async def sync(self, index: VelocityIndex) -> int:
+        """Write queued claims and count the other workers' new ones in index; returns the claims counted"""
+        pending, self.pending = self.pending, []
+        if pending:
+            try:
+                await asyncio.to_thread(self._write, pending)
+            except Exception as e:
+                VELOCITY_JOURNAL_ERRORS.labels(stage = "write").inc()
+                logging.error(f"Error writing {len(pending)} claims to the velocity journal: {str(e)}")
+        records = await asyncio.to_thread(self._read)
+        # Applied on the event loop, where requests read the index
+        return sum(index.record(*record, source = "journal") for record in records)
+
+    def _write(self, records: List[list]):
+        segment = int(time.time() // self.segment_seconds)
+        with open(f"{self.slot_path}.{segment}.events", "a") as f:
+            f.write("".join(json.dumps(record, separators = (",", ":")) + "\n" for record in records))
+        for path in glob.glob(f"{glob.escape(self.slot_path)}.*.events"):
+            if journal_segment(path) <= segment - JOURNAL_SEGMENTS:
+                os.remove(path)
+
+    def _read(self) -> List[list]:
+        records = []
+        paths = glob.glob(f"{glob.escape(self.path)}.*.*.events")
+        for path in paths:
+            if not self._read_own and path.startswith(f"{self.slot_path}."):
+                continue
+            offset = self._offsets.get(path, 0)
+            try:
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            # A line still being written is picked up by the next sync
+            end = data.rfind(b"\n") + 1
+            self._offsets[path] = offset + end
+            for line in data[:end].splitlines():
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    VELOCITY_JOURNAL_ERRORS.labels(stage = "read").inc()
+        self._offsets = {path: offset for path, offset in self._offsets.items() if path in paths}
+        self._read_own = False
+        return records
+
+def journal_segment(path: str) -> int:
+    """Segment number of a journal file named <slot path>.<segment>.events"""
+    return int(path.rsplit(".", 2)[1])
+
+def claim_snapshot_slot(path: str) -> Tuple[str, IO]:
+    """
+    Claim the lowest slot no other worker holds and return its path with the lock
+    file holding it. The slot stays claimed until the file is closed or the worker
+    exits, so each worker writes its own snapshot and journal rather than every
+    worker overwriting one file.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok = True)
+    slot = 0
+    while True:
+        lock_file = open(f"{path}.{slot}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            slot += 1
+            continue
+        return f"{path}.{slot}", lock_file
+
+def write_snapshot(state: dict, path: str):
+    """Write a snapshot atomically so a crash never leaves a truncated file behind"""
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as f:
+        pickle.dump(state, f, protocol = pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, path)
+
+def read_latest_snapshot(path: str) -> Tuple[Optional[str], Optional[dict]]:
+    """
+    (path, snapshot) of the newest snapshot any slot under path wrote with
+    write_snapshot, or (None, None) if there is none yet. The workers share
+    their claims, so any slot's snapshot holds the whole task's.
+    """
+    snapshots = []
+    for candidate in glob.glob(f"{glob.escape(path)}.*"):
+        if candidate.rsplit(".", 1)[1].isdigit():
+            try:
+                snapshots.append((os.stat(candidate).st_mtime_ns, candidate))
+            except FileNotFoundError:
+                continue
+    for _, candidate in sorted(snapshots, reverse = True):
+        try:
+            with open(candidate, "rb") as f:
+                return candidate, pickle.load(f)
+        except FileNotFoundError:
+            continue
+        except Exception as e:
+            logging.error(f"Error reading velocity snapshot {candidate}: {str(e)}")
+    return None, None
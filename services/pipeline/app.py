@@ -0,0 +1,56 @@
+from fastapi import FastAPI, HTTPException
+import logging
+from prometheus_client import Counter, Histogram
+import time
+
+from pipeline import ClaimEvaluation, ServiceUnavailable, create_pipeline
+
+# Metrics
+PIPELINE_EVALUATIONS = Counter('claim_pipeline_evaluations_total', 'Composite claim evaluations by merged status', ['status'])
+PIPELINE_TIME = Histogram('claim_pipeline_seconds', 'Time spent on composite claim evaluations')
+
+app = FastAPI(title = "Claim Pipeline",
+              description = "Fraud, risk and claims evaluation of a claim in one call",
+              version = "1.0.0")
+
+PIPELINE = create_pipeline()
+
+@app.on_event("startup")
+async def start_pipeline():
+    await PIPELINE.start()
+
+@app.on_event("shutdown")
+async def stop_pipeline():
+    await PIPELINE.close()
+
+@app.post("/api/v1/evaluate", response_model = dict, tags = ["Claim Pipeline"])
+async def evaluate_claim(claim: ClaimEvaluation):
+    """
+    Run fraud detection, risk assessment and claims processing on one claim concurrently and return the merged decision
+    """
+    start_time = time.perf_counter()
+    try:
+        decision = await PIPELINE.evaluate(claim)
+    except ServiceUnavailable as e:
+        headers = {"Retry-After": e.retry_after or "1"} if e.status_code in (429, 503) else None
+        raise HTTPException(status_code = e.status_code, detail = str(e), headers = headers)
+    except Exception as e:
+        logging.error(f"Error evaluating claim {claim.claim_id}: {str(e)}")
+        raise HTTPException(status_code = 500, detail = str(e))
+
+    PIPELINE_EVALUATIONS.labels(status = decision["status"]).inc()
+    PIPELINE_TIME.observe(time.perf_counter() - start_time)
+    return decision
+
+@app.get("/health")
+async def health_check():
+    return {"status": "healthy", "service": "claim-pipeline"}
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness Endpoint, 503 until every in-process service is warm
+    """
+    if not PIPELINE.services.ready():
+        raise HTTPException(status_code = 503, detail = "Services starting")
+    return {"status": "ready"}
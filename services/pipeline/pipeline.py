@@ -0,0 +1,327 @@
+"""
+Evaluate one claim with fraud detection, risk assessment and claims processing
+at once, and merge the three results into a single decision.
+
+    pipeline = create_pipeline()   # PIPELINE_MODE=local or remote
+    await pipeline.start()
+    decision = await pipeline.evaluate(ClaimEvaluation(...))
+
+In local mode the three service apps are imported into this process and their
+handlers called directly, so a claim costs no network hops; the claim's policy
+is read once through the claims service's policy cache and reused by risk
+assessment and the claims rules. In remote mode the services are called over
+HTTP through one pooled keep-alive client, concurrently rather than one after
+another; each service then reads the policy itself.
+"""
+import asyncio
+import importlib.util
+import logging
+import os
+import sys
+import time
+from contextlib import AsyncExitStack
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+SERVICES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FRAUD_DIR = os.path.join(SERVICES_DIR, "fraud-detection-engine")
+RISK_DIR = os.path.join(SERVICES_DIR, "risk-assessment-service")
+CLAIMS_DIR = os.path.join(SERVICES_DIR, "claims-processing-service")
+COMMON_DIR = os.path.join(SERVICES_DIR, "common")
+
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "local")
+PIPELINE_FRAUD_URL = os.getenv("PIPELINE_FRAUD_URL", "http://localhost:8001")
+PIPELINE_RISK_URL = os.getenv("PIPELINE_RISK_URL", "http://localhost:8002")
+PIPELINE_CLAIMS_URL = os.getenv("PIPELINE_CLAIMS_URL", "http://localhost:8003")
+PIPELINE_MAX_CONNECTIONS = int(os.getenv("PIPELINE_MAX_CONNECTIONS", "100"))
+PIPELINE_TIMEOUT = float(os.getenv("PIPELINE_TIMEOUT", "5"))
+
+# Fraud statuses and risk levels that hold back an otherwise approved claim
+REVIEW_FRAUD_STATUSES = ("high_risk",)
+REVIEW_RISK_LEVELS = ("HIGH", "CRITICAL")
+
+class ClaimEvaluation(BaseModel):
+    claim_id: str = Field(..., description = "Unique identifier for the claim")
+    policy_id: str = Field(..., description = "Associated policy ID")
+    claim_amount: float = Field(..., description = "Amount claimed")
+    claim_type: str = Field(..., description = "Type of claim, also the policy type")
+    incident_date: datetime = Field(..., description = "Date of incident")
+    claim_date: Optional[datetime] = Field(None, description = "Date of claim submission, now if omitted")
+    description: str = Field(..., description = "Claim description")
+    supporting_documents: List[str] = Field(..., description = "List of supporting document IDs")
+    claimant_info: dict = Field(..., description = "Claimant information")
+    claimant_age: int = Field(..., description = "Age of claimant, also the policy holder")
+    previous_claims: int = Field(0, description = "Number of previous claims")
+    policy_start_date: datetime = Field(..., description = "Policy start date")
+    location: str = Field(..., description = "Claim location")
+    device_ip: Optional[str] = Field(None, description = "IP address of submission device")
+    customer_id: str = Field(..., description = "Customer identifier")
+    occupation: str = Field(..., description = "Customer occupation")
+    coverage_amount: Optional[float] = Field(None, description = "Policy coverage, the policy's coverage limit if omitted")
+    medical_history: Optional[List[str]] = Field(None, description = "Relevant medical history")
+    credit_score: Optional[int] = Field(None, description = "Customer credit score")
+    industry: Optional[str] = Field(None, description = "Customer industry")
+
+def fraud_fields(claim: ClaimEvaluation) -> dict:
+    """ClaimData fields for fraud detection"""
+    return {
+        "claim_id": claim.claim_id,
+        "policy_id": claim.policy_id,
+        "claim_amount": claim.claim_amount,
+        "claim_type": claim.claim_type,
+        "claimant_age": claim.claimant_age,
+        # Naive or aware like policy_start_date, which fraud detection subtracts it from
+        "claim_date": claim.claim_date or datetime.now(claim.policy_start_date.tzinfo),
+        "previous_claims": claim.previous_claims,
+        "policy_start_date": claim.policy_start_date,
+        "location": claim.location,
+        "device_ip": claim.device_ip
+    }
+
+def risk_fields(claim: ClaimEvaluation, policy: Optional[dict] = None) -> dict:
+    """PolicyData fields for risk assessment, taking the coverage from the policy record if the claim has none"""
+    coverage_amount = claim.coverage_amount
+    if coverage_amount is None:
+        coverage_amount = (policy or {}).get("coverage_limit", 0.0)
+    return {
+        "policy_id": claim.policy_id,
+        "customer_id": claim.customer_id,
+        "policy_type": claim.claim_type,
+        "coverage_amount": coverage_amount,
+        "customer_age": claim.claimant_age,
+        "occupation": claim.occupation,
+        "medical_history": claim.medical_history,
+        "credit_score": claim.credit_score,
+        "industry": claim.industry
+    }
+
+def claims_fields(claim: ClaimEvaluation) -> dict:
+    """Claim fields for claims processing"""
+    return {
+        "claim_id": claim.claim_id,
+        "policy_id": claim.policy_id,
+        "claim_amount": claim.claim_amount,
+        "incident_date": claim.incident_date,
+        "claim_type": claim.claim_type,
+        "description": claim.description,
+        "supporting_documents": claim.supporting_documents,
+        "claimant_info": claim.claimant_info
+    }
+
+class ServiceUnavailable(Exception):
+    """Raised when the claims service can't decide a claim, so there is no decision to merge"""
+    def __init__(self, message: str, status_code: int = 503, retry_after: Optional[str] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+def load_module(name: str, path: str):
+    """Import a service's app.py under its own name so all three apps fit in one process"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+class LocalServices:
+    """
+    The three service apps imported into this process. The modules the services
+    share come from the insurance_common package, so each is imported once.
+    """
+    shares_policy_lookup = True
+
+    def __init__(self):
+        for path in (COMMON_DIR, FRAUD_DIR, RISK_DIR, CLAIMS_DIR):
+            if path not in sys.path:
+                sys.path.append(path)
+        self.fraud = load_module("fraud_app", os.path.join(FRAUD_DIR, "app.py"))
+        self.risk = load_module("risk_app", os.path.join(RISK_DIR, "app.py"))
+        self.claims = load_module("claims_app", os.path.join(CLAIMS_DIR, "app.py"))
+        self._stack = AsyncExitStack()
+
+    async def start(self):
+        # Runs each app's startup hooks: executors, batchers, telematics and velocity state
+        for module in (self.fraud, self.risk, self.claims):
+            await self._stack.enter_async_context(module.app.router.lifespan_context(module.app))
+
+    async def close(self):
+        await self._stack.aclose()
+
+    def ready(self) -> bool:
+        return all(module.STARTUP.ready for module in (self.fraud, self.risk, self.claims))
+
+    async def policy(self, policy_id: str) -> Optional[dict]:
+        return await self.claims.POLICY_CACHE.get(policy_id)
+
+    async def detect_fraud(self, fields: dict) -> dict:
+        return await self._call(self.fraud.detect_fraud(self.fraud.ClaimData(**fields)))
+
+    async def assess_risk(self, fields: dict) -> dict:
+        return await self._call(self.risk.assess_risk(self.risk.PolicyData(**fields)))
+
+    async def process_claim(self, fields: dict) -> dict:
+        return await self._call(self.claims.process_claim(self.claims.Claim(**fields)))
+
+    @staticmethod
+    async def _call(handler) -> dict:
+        from fastapi import HTTPException
+
+        try:
+            return await handler
+        except HTTPException as e:
+            raise ServiceUnavailable(str(e.detail), e.status_code, (e.headers or {}).get("Retry-After"))
+
+class RemoteServices:
+    """
+    The three services called over HTTP with one httpx client, whose pool keeps up
+    to max_connections keep-alive connections across all of them.
+    """
+    shares_policy_lookup = False
+
+    def __init__(self, fraud_url: str = PIPELINE_FRAUD_URL, risk_url: str = PIPELINE_RISK_URL,
+                 claims_url: str = PIPELINE_CLAIMS_URL, max_connections: int = PIPELINE_MAX_CONNECTIONS,
+                 timeout: float = PIPELINE_TIMEOUT):
+        import httpx
+
+        self.fraud_url = fraud_url.rstrip("/")
+        self.risk_url = risk_url.rstrip("/")
+        self.claims_url = claims_url.rstrip("/")
+        self.client = httpx.AsyncClient(
+            limits = httpx.Limits(max_connections = max_connections, max_keepalive_connections = max_connections),
+            timeout = timeout)
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        await self.client.aclose()
+
+    def ready(self) -> bool:
+        return True
+
+    async def policy(self, policy_id: str) -> Optional[dict]:
+        return None
+
+    async def detect_fraud(self, fields: dict) -> dict:
+        return await self._post(f"{self.fraud_url}/api/v1/detect", fields)
+
+    async def assess_risk(self, fields: dict) -> dict:
+        return await self._post(f"{self.risk_url}/app/v1/assess", fields)
+
+    async def process_claim(self, fields: dict) -> dict:
+        return await self._post(f"{self.claims_url}/api/v1/process", fields)
+
+    async def _post(self, url: str, fields: dict) -> dict:
+        import httpx
+
+        body = {key: value.isoformat() if isinstance(value, datetime) else value for key, value in fields.items()}
+        try:
+            response = await self.client.post(url, json = body)
+        except httpx.HTTPError as e:
+            raise ServiceUnavailable(f"{url}: {type(e).__name__} {str(e)}")
+        if response.status_code != 200:
+            raise ServiceUnavailable(f"{url}: {response.text}", 503 if response.status_code >= 500 else response.status_code,
+                                     response.headers.get("Retry-After"))
+        return response.json()
+
+class ClaimPipeline:
+    """
+    Runs fraud detection, risk assessment and claims processing for one claim
+    concurrently and merges their results. Fraud detection starts at once; risk
+    assessment and claims processing start when the shared policy lookup
+    finishes, and the claims rules then find the policy in the cache. A fraud or
+    risk failure sends the claim to manual review; a claims failure raises
+    ServiceUnavailable since there is no decision to merge.
+    """
+    def __init__(self, services):
+        self.services = services
+
+    async def start(self):
+        await self.services.start()
+
+    async def close(self):
+        await self.services.close()
+
+    async def evaluate(self, claim: ClaimEvaluation) -> dict:
+        start_time = time.perf_counter()
+        fraud = asyncio.create_task(self.services.detect_fraud(fraud_fields(claim)))
+        try:
+            policy = None
+            if self.services.shares_policy_lookup:
+                try:
+                    policy = await self.services.policy(claim.policy_id)
+                except Exception as e:
+                    # The claims rules look the policy up again and report the failure
+                    logging.error(f"Error reading policy {claim.policy_id} for claim {claim.claim_id}: {str(e)}")
+            risk = asyncio.create_task(self.services.assess_risk(risk_fields(claim, policy)))
+            claims_result, fraud_result, risk_result = await asyncio.gather(
+                self.services.process_claim(claims_fields(claim)), fraud, risk, return_exceptions = True)
+        finally:
+            fraud.cancel()
+
+        if isinstance(claims_result, BaseException):
+            raise claims_result
+        decision = merge_decision(claim, claims_result, fraud_result, risk_result)
+        decision["processing_time"] = time.perf_counter() - start_time
+        return decision
+
+def merge_decision(claim: ClaimEvaluation, claims_result: dict, fraud_result, risk_result) -> dict:
+    """
+    One decision from the three results. The claims decision stands, with fraud
+    and risk flags added to its reasons, except that an approval goes to review
+    when fraud or risk assessment flags the claim or either of them failed.
+    """
+    reasons = list(claims_result.get("reasons", []))
+    errors = {}
+    review_reasons = []
+
+    if isinstance(fraud_result, BaseException):
+        errors["fraud"] = str(fraud_result)
+        review_reasons.append("Fraud check unavailable")
+        fraud_result = None
+    elif fraud_result["status"] in REVIEW_FRAUD_STATUSES:
+        review_reasons.append(f"Fraud risk score {fraud_result['risk_score']:.0f}")
+
+    if isinstance(risk_result, BaseException):
+        errors["risk"] = str(risk_result)
+        review_reasons.append("Risk assessment unavailable")
+        risk_result = None
+    elif risk_result["risk_level"]["risk_level"] in REVIEW_RISK_LEVELS:
+        review_reasons.append(f"{risk_result['risk_level']['risk_level'].title()} policy risk")
+
+    status = claims_result["status"]
+    approved_amount = claims_result.get("approved_amount", 0)
+    next_steps = claims_result.get("next_steps", [])
+    if review_reasons and status != "rejected":
+        reasons.extend(review_reasons)
+        if status == "approved":
+            status = "in_review"
+            approved_amount = 0
+            next_steps = ["Adjuster assignment", "Fraud and risk review"]
+
+    decision = {
+        "claim_id": claim.claim_id,
+        "status": status,
+        "approved_amount": approved_amount,
+        "reasons": reasons,
+        "next_steps": next_steps,
+        "claims": claims_result,
+        "fraud": fraud_result,
+        "risk": risk_result
+    }
+    if errors:
+        decision["errors"] = errors
+    return decision
+
+def create_pipeline() -> ClaimPipeline:
+    """Build the pipeline for PIPELINE_MODE (local or remote)"""
+    if PIPELINE_MODE == "local":
+        services = LocalServices()
+    elif PIPELINE_MODE == "remote":
+        services = RemoteServices()
+    else:
+        raise ValueError(f"Unknown PIPELINE_MODE {PIPELINE_MODE}")
+    logging.info(f"Evaluating claims with {PIPELINE_MODE} services")
+    return ClaimPipeline(services)
@@ -0,0 +1,263 @@
+"""
+Replay exported DynamoDB stream records of the insurance-claims table through
+the fraud and claims decision logic under two rule versions, and write the
+decisions that differ.
+
+    python replay.py exports/*.json.gz --fraud-rules-b rules_v2.yaml [--documents-b documents_v2.json]
+                     [--workers 8] [--mmap] [--output replay-diff.ndjson]
+
+Inputs are JSON lines, optionally gzipped, with one stream record per line
+({"eventName": ..., "dynamodb": {"NewImage": ...}}) or one exported item per
+line ({"Item": ...}). Version A defaults to the built-in rules; pass
+--fraud-rules-a / --documents-a to compare two files. Chunks of lines are
+decoded and decided in a process pool; only the reader runs in this process.
+
+Velocity features are replayed as zero: they depend on the arrival order of
+live traffic, which sharded exports don't preserve.
+"""
+import argparse
+import asyncio
+import gzip
+import importlib.util
+import json
+import mmap
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+SERVICES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FRAUD_DIR = os.path.join(SERVICES_DIR, "fraud-detection-engine")
+CLAIMS_DIR = os.path.join(SERVICES_DIR, "claims-processing-service")
+COMMON_DIR = os.path.join(SERVICES_DIR, "common")
+
+DEFAULT_CHUNK_SIZE = 5000
+
+def read_lines(path: str, use_mmap: bool = False) -> Iterator[bytes]:
+    """Lines of a plain or gzipped JSON lines file, read through mmap when asked"""
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f:
+        source = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) if use_mmap else f
+        try:
+            stream = gzip.GzipFile(fileobj = source) if path.endswith(".gz") else source
+            for line in iter(stream.readline, b""):
+                if line.strip():
+                    yield line
+        finally:
+            if use_mmap:
+                source.close()
+
+def read_chunks(paths: List[str], chunk_size: int, use_mmap: bool) -> Iterator[List[bytes]]:
+    chunk = []
+    for path in paths:
+        for line in read_lines(path, use_mmap):
+            chunk.append(line)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+def stream_image(record: dict) -> Optional[dict]:
+    """The claim item a stream record or export line carries, or None for deletes"""
+    if "Item" in record:
+        return record["Item"]
+    if record.get("eventName") == "REMOVE":
+        return None
+    return record.get("dynamodb", {}).get("NewImage")
+
+def load_module(name: str, path: str):
+    """
+    Import a service's app.py under its own name so both apps fit in one process.
+    Pool processes forked after main() loaded the apps reuse them, since their
+    metrics are already registered.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+class ReplayWorker:
+    """Decides chunks of records under both rule versions inside a pool process"""
+    def __init__(self, fraud_rules: tuple, documents: tuple):
+        # Spans around every pipeline stage would dominate offline decisions
+        os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+        for path in (COMMON_DIR, FRAUD_DIR, CLAIMS_DIR):
+            if path not in sys.path:
+                sys.path.append(path)
+        self.fraud = load_module("fraud_app", os.path.join(FRAUD_DIR, "app.py"))
+        self.claims = load_module("claims_app", os.path.join(CLAIMS_DIR, "app.py"))
+        from policy_repository import deserialize_attribute
+        from pydantic import ValidationError
+
+        self.deserialize_attribute = deserialize_attribute
+        self.validation_error = ValidationError
+        self.rule_sets = [self.load_rules(path) for path in fraud_rules]
+        self.document_indexes = [self.load_documents(path) for path in documents]
+        # Versions are swapped in explicitly, never picked up from the environment
+        self.claims.DOCUMENT_REQUIREMENTS_PATH = None
+        self.loop = asyncio.new_event_loop()
+
+    def load_rules(self, path: Optional[str]):
+        from fraud_rules import DEFAULT_RULES, compile_rules, load_rule_definition
+
+        if not path:
+            return compile_rules(DEFAULT_RULES, self.fraud.RULE_FEATURES)
+        try:
+            return compile_rules(load_rule_definition(path), self.fraud.RULE_FEATURES)
+        except Exception as e:
+            raise ValueError(f"Can't load fraud rules from {path}: {str(e)}")
+
+    def load_documents(self, path: Optional[str]) -> dict:
+        if not path:
+            return self.claims.compile_document_requirements(self.claims.DEFAULT_DOCUMENT_REQUIREMENTS)
+        try:
+            with open(path) as f:
+                return self.claims.compile_document_requirements(json.load(f))
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Can't load document requirements from {path}: {str(e)}")
+
+    def replay(self, lines: List[bytes]) -> dict:
+        stats = Counter()
+        fraud_claims, claims = [], []
+        for line in lines:
+            stats["records"] += 1
+            try:
+                image = stream_image(json.loads(line))
+            except ValueError:
+                stats["undecodable"] += 1
+                continue
+            if image is None:
+                stats["skipped"] += 1
+                continue
+            item = {key: self.deserialize_attribute(value) for key, value in image.items()}
+            try:
+                fraud_claims.append(self.fraud.ClaimData.model_validate(item))
+            except self.validation_error:
+                stats["fraud.invalid"] += 1
+            try:
+                claims.append(self.claims.Claim.model_validate(item))
+            except self.validation_error:
+                stats["claims.invalid"] += 1
+
+        diffs = []
+        fraud_results = [self.fraud.score_claims_vectorized(fraud_claims, rule_set) for rule_set in self.rule_sets]
+        for claim, a, b in zip(fraud_claims, *fraud_results):
+            a, b = fraud_decision(a), fraud_decision(b)
+            self.count("fraud", a, b, stats)
+            if a != b:
+                diffs.append({"service": "fraud", "claim_id": claim.claim_id, "policy_id": claim.policy_id, "a": a, "b": b})
+
+        claims_results = []
+        for index in self.document_indexes:
+            self.claims.DOCUMENT_INDEX = index
+            claims_results.append(self.loop.run_until_complete(self.decide_claims(claims)))
+        for claim, a, b in zip(claims, *claims_results):
+            a, b = claims_decision(a), claims_decision(b)
+            self.count("claims", a, b, stats)
+            if a != b:
+                diffs.append({"service": "claims", "claim_id": claim.claim_id, "policy_id": claim.policy_id, "a": a, "b": b})
+
+        return {"stats": stats, "diffs": [json.dumps(diff) for diff in diffs]}
+
+    async def decide_claims(self, claims: list) -> List[dict]:
+        """decide_claims, keeping one claim's error from failing the rest of the chunk"""
+        await self.claims.prefetch_policies(claims)
+        results = []
+        for claim in claims:
+            try:
+                results.append(await self.claims.decide_claim(claim))
+            except Exception as e:
+                results.append({"status": "error", "reasons": [str(e)]})
+        return results
+
+    @staticmethod
+    def count(service: str, a: dict, b: dict, stats: Counter):
+        stats[f"{service}.evaluated"] += 1
+        if a != b:
+            stats[f"{service}.changed"] += 1
+        if a["status"] != b["status"]:
+            stats[f"{service}.transitions.{a['status']}->{b['status']}"] += 1
+
+def fraud_decision(result: dict) -> dict:
+    return {"status": result["status"], "risk_score": round(result["risk_score"], 6), "risk_factors": result["risk_factors"]}
+
+def claims_decision(result: dict) -> dict:
+    if "reasons" in result:
+        return {"status": result["status"], "approved_amount": 0, "reasons": result["reasons"]}
+    return {"status": result["status"], "approved_amount": result["approved_amount"], "notes": result["processing_notes"]}
+
+_worker = None
+
+def init_worker(fraud_rules: tuple, documents: tuple):
+    global _worker
+    _worker = ReplayWorker(fraud_rules, documents)
+
+def replay_chunk(lines: List[bytes]) -> dict:
+    return _worker.replay(lines)
+
+def summarize(stats: Counter, elapsed: float) -> dict:
+    summary = {"records": stats["records"], "skipped": stats["skipped"], "undecodable": stats["undecodable"],
+               "elapsed_seconds": elapsed, "records_per_second": stats["records"] / elapsed if elapsed > 0 else 0.0}
+    for service in ("fraud", "claims"):
+        prefix = f"{service}.transitions."
+        summary[service] = {
+            "evaluated": stats[f"{service}.evaluated"],
+            "invalid": stats[f"{service}.invalid"],
+            "changed": stats[f"{service}.changed"],
+            "status_transitions": {k[len(prefix):]: v for k, v in sorted(stats.items()) if k.startswith(prefix)}
+        }
+    return summary
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description = "Replay DynamoDB stream exports under two rule versions")
+    parser.add_argument("paths", nargs = "+", help = "JSON lines files, .gz for gzipped")
+    parser.add_argument("--fraud-rules-a", help = "Fraud rule file for version A (default: built-in rules)")
+    parser.add_argument("--fraud-rules-b", help = "Fraud rule file for version B (default: built-in rules)")
+    parser.add_argument("--documents-a", help = "Document requirements file for version A (default: built-in)")
+    parser.add_argument("--documents-b", help = "Document requirements file for version B (default: built-in)")
+    parser.add_argument("--workers", type = int, default = os.cpu_count(), help = "Replay processes")
+    parser.add_argument("--chunk-size", type = int, default = DEFAULT_CHUNK_SIZE, help = "Records per task")
+    parser.add_argument("--mmap", action = "store_true", help = "Read input files through mmap")
+    parser.add_argument("--output", default = "replay-diff.ndjson", help = "Changed decisions, one JSON object per line")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    stats = Counter()
+    initargs = ((args.fraud_rules_a, args.fraud_rules_b), (args.documents_a, args.documents_b))
+    # Compile both versions here first: a bad file would otherwise fail every pool
+    # initializer and surface only as a BrokenProcessPool
+    try:
+        ReplayWorker(*initargs)
+    except ValueError as e:
+        parser.error(str(e))
+
+    with open(args.output, "w") as output, \
+         ProcessPoolExecutor(args.workers, initializer = init_worker, initargs = initargs) as pool:
+        # Keep a bounded number of chunks in flight so memory doesn't grow with the input
+        pending = deque()
+
+        def collect():
+            result = pending.popleft().result()
+            stats.update(result["stats"])
+            for diff in result["diffs"]:
+                output.write(diff + "\n")
+
+        for chunk in read_chunks(args.paths, args.chunk_size, args.mmap):
+            pending.append(pool.submit(replay_chunk, chunk))
+            if len(pending) >= 2 * args.workers:
+                collect()
+        while pending:
+            collect()
+
+    print(json.dumps(summarize(stats, time.perf_counter() - start_time), indent = 2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
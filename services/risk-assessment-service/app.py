@@ -1,25 +1,68 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 from datetime import datetime, timezone
+import asyncio
+import json
 import logging
+import os
 from prometheus_client import Counter, Histogram
+import tempfile
 import time
-from typing import List, Optional
+from typing import IO, Iterator, List, Optional
 import numpy as np
 
+import scoring_tables
+
+from insurance_common.audit_log import create_audit_log, warm_parquet_writer
+from insurance_common.executor import ExecutorOverloaded, ScoringExecutor
+from insurance_common.fastcodec import FastDecodeRoute, fast_decode, fast_record
+from insurance_common.microbatch import BatcherOverloaded, create_batcher
+from insurance_common.startup import StartupTracker
+from insurance_common.telematics import TELEMATICS_DAYS, TelematicsFeatureStore, create_consumer
+from insurance_common.telemetry import init_tracing, mark_worker_dead, metrics_response, observe
+
 # Metrics
 RISK_ASSESSMENTS = Counter('risk_assessment_total', 'Total Risk Assessments performed')
 RISK_SCORE = Histogram('risk_assessment_score', 'Distribution of Risk Assessment Scores')
 PROCESSING_TIME = Histogram('risk_assessment_processing_seconds', 'Time spent processing Risk Assessment')
+PORTFOLIO_INLINE_CHUNKS = Counter('risk_portfolio_inline_chunks_total',
+                                  'Portfolio chunks scored on a worker thread because the scoring executor was saturated')
 
 app = FastAPI(title = "Risk Assessment Service",
               description = "Risk Assessment for Insurance Policies",
               version = "1.0.0")
+# Endpoints marked @fast_decode read JSON and msgpack bodies into slotted records
+app.router.route_class = FastDecodeRoute
+
+init_tracing(app, "risk-assessment-service")
+STARTUP = StartupTracker("risk-assessment")
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness Endpoint for Load Balancer Routing, 503 until the scoring path and portfolio readers are warm
+    """
+    report = STARTUP.report()
+    if not STARTUP.ready:
+        raise HTTPException(status_code = 503, detail = report)
+    return report
+
+@app.get("/metrics")
+async def metrics(request: Request):
+    """
+    Prometheus Metrics Endpoint
+    """
+    return metrics_response(request)
+
+@app.on_event("shutdown")
+async def release_worker_metrics():
+    mark_worker_dead()
+
 class PolicyData(BaseModel):
     policy_id: str = Field(..., description = "Unique identifier for the policy")
     customer_id: str = Field(..., description = "Customer identifier")
@@ -29,8 +72,12 @@ class PolicyData(BaseModel):
     occupation: str = Field(..., description = "Customer occupation")
     medical_history: Optional[List[str]] = Field(None, description = "Relevant medical history")
     credit_score: Optional[int] = Field(None, description = "Customer credit score") 
+    industry: Optional[str] = Field(None, description = "Customer industry, for occupation risk modifiers")
+
+PolicyDataRecord = fast_record(PolicyData)
 
 @app.post("/app/v1/assess", response_model = dict, tags = ["Risk Asssessment"])
+@fast_decode(PolicyDataRecord)
 async def assess_risk(policy:PolicyData):
     """
     Perform Comprehensive Risk Assessment for Insurance Policies
@@ -40,141 +87,329 @@ async def assess_risk(policy:PolicyData):
     RISK_ASSESSMENTS.inc()
 
     try:
-        risk_factors = []
-        risk_scores = []
+        # Micro-batched with concurrent requests when enabled
+        if ASSESS_BATCHER is not None:
+            response = await ASSESS_BATCHER.submit(policy)
+        else:
+            response = await SCORING_EXECUTOR.run(score_policy, policy)
+        apply_usage_pricing(response, TELEMATICS_STORE.features(policy.policy_id))
+        await audit_risk_decision(policy, response)
+
+        processing_time = time.time() - start_time
+        observe(PROCESSING_TIME, processing_time)
 
-        # Age-based
-        age_risk = calculate_age_risk(policy.customer_age, policy.policy_type)
-        risk_scores.append(age_risk)
+        return response
 
-        # Coverage Amount Analysis
-        if policy.coverage_amount > 1000000:
-            risk_factors.append("High Coverage Amount")
-            risk_scores.append(30)
+    except (BatcherOverloaded, ExecutorOverloaded) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        logging.error(f"Error in risk assessment: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Occupation 
-        occupation_risk = assess_occupation_risk(policy.occupation)
-        risk_scores.append(occupation_risk)
+def score_policy(policy: PolicyData) -> dict:
+    """
+    Score a single policy against the age, coverage, occupation and credit risk factors
+    """
+    risk_factors = []
+    risk_scores = []
 
-        # Credit Score if available
-        if policy.credit_score:
-            credit_risk = assess_credit_risk(policy.credit_score)
-            risk_scores.append(credit_risk)
+    # Age-based
+    age_risk = calculate_age_risk(policy.customer_age, policy.policy_type)
+    risk_scores.append(age_risk)
 
-        # Calculate final risk score
-        final_score = calculated_weighted_risk(risk_scores)
-        RISK_SCORE.observe(final_score)
+    # Coverage Amount Analysis
+    if policy.coverage_amount > 1000000:
+        risk_factors.append("High Coverage Amount")
+        risk_scores.append(30)
+
+    # Occupation 
+    occupation_risk = assess_occupation_risk(policy.occupation, policy.industry)
+    risk_scores.append(occupation_risk)
+
+    # Credit Score if available
+    if policy.credit_score:
+        credit_risk = assess_credit_risk(policy.credit_score)
+        risk_scores.append(credit_risk)
+
+    # Calculate final risk score
+    final_score = calculated_weighted_risk(risk_scores)
+    RISK_SCORE.observe(final_score)
+
+    return {
+        "policy_id": policy.policy_id,
+        "risk_score": final_score,
+        "risk_factors": risk_factors,
+        "assessment_date": datetime.now(timezone.utc).isoformat(),
+        "risk_level": determine_risk_level(final_score),
+    }
+
+def apply_usage_pricing(response: dict, features: dict):
+    """
+    Add usage-based pricing from the policy's last 30 days of vehicle telematics and
+    home sensor data to an assessment. Policies without device data are left as scored.
+    """
+    if not features["telematics_events_30d"]:
+        return
+    premium_modifier = 1.0
+    annual_mileage = features["telematics_miles_30d"] * 365 / TELEMATICS_DAYS
+
+    if annual_mileage > HIGH_ANNUAL_MILEAGE:
+        response["risk_factors"].append("High Annual Mileage")
+        premium_modifier += 0.15
+    elif 0 < annual_mileage < LOW_ANNUAL_MILEAGE:
+        premium_modifier -= 0.1
+
+    if features["telematics_harsh_braking_per_100mi"] > HARSH_BRAKING_PER_100MI:
+        response["risk_factors"].append("Frequent Harsh Braking")
+        premium_modifier += 0.2
+
+    if features["water_leak_alerts_30d"] > 0:
+        response["risk_factors"].append("Water Leak Alerts")
+        premium_modifier += 0.1
+
+    response["usage_based_pricing"] = {
+        "annual_mileage": round(annual_mileage, 1),
+        "harsh_braking_per_100mi": round(features["telematics_harsh_braking_per_100mi"], 2),
+        "water_leak_alerts_30d": int(features["water_leak_alerts_30d"]),
+        "premium_modifier": round(premium_modifier, 2)
+    }
 
-        response = {
+def score_policies(policies: List[PolicyData]) -> List[dict]:
+    """
+    Score a batch of policies collected by the micro-batcher
+    """
+    columns = {
+        "policy_type": np.array([p.policy_type for p in policies], dtype = object),
+        "coverage_amount": np.array([p.coverage_amount for p in policies], dtype = np.float64),
+        "customer_age": np.array([p.customer_age for p in policies], dtype = np.int64),
+        "occupation": np.array([p.occupation for p in policies], dtype = object),
+        "credit_score": np.array([p.credit_score if p.credit_score is not None else np.nan for p in policies],
+                                 dtype = np.float64),
+        "industry": np.array([p.industry for p in policies], dtype = object)
+    }
+    scored = score_policy_columns(columns)
+    assessment_date = datetime.now(timezone.utc).isoformat()
+
+    results = []
+    for policy, high_coverage, final_score in zip(policies, scored["high_coverage"].tolist(),
+                                                  scored["risk_score"].tolist()):
+        RISK_SCORE.observe(final_score)
+        results.append({
             "policy_id": policy.policy_id,
             "risk_score": final_score,
-            "risk_factors": risk_factors,
-            "assessment_date": datetime.now(timezone.utc).isoformat(),
+            "risk_factors": ["High Coverage Amount"] if high_coverage else [],
+            "assessment_date": assessment_date,
             "risk_level": determine_risk_level(final_score),
-        }
+        })
+    return results
 
-        processing_time = time.time() - start_time
-        PROCESSING_TIME.observe(processing_time)
+class PortfolioColumns(BaseModel):
+    policy_id: List[str] = Field(..., description = "Unique identifier for each policy")
+    customer_id: List[str] = Field(..., description = "Customer identifier for each policy")
+    policy_type: List[str] = Field(..., description = "Type of each insurance policy")
+    coverage_amount: List[float] = Field(..., description = "Total coverage amount for each policy")
+    customer_age: List[int] = Field(..., description = "Age of each customer")
+    occupation: List[str] = Field(..., description = "Occupation of each customer")
+    credit_score: Optional[List[Optional[int]]] = Field(None, description = "Credit score for each customer, if known")
+    industry: Optional[List[Optional[str]]] = Field(None, description = "Industry of each customer, if known")
 
-        return response
+@app.post("/app/v1/assess/portfolio", tags = ["Risk Asssessment"])
+async def assess_portfolio(request: Request):
+    """
+    Re-rate a whole portfolio of policies with vectorized scoring. Accepts columnar JSON
+    (one array per PolicyData field), CSV or Parquet, and streams NDJSON results in chunks
+    followed by a summary line with risk level and score histograms.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    body = await spool_request_body(request)
 
-    except Exception as e:
-        logging.error(f"Error in risk assessment: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    try:
+        chunks = read_portfolio(body, content_type)
+        first_chunk = await asyncio.to_thread(next, chunks, None)
+    except PORTFOLIO_ERRORS as e:
+        body.close()
+        raise HTTPException(status_code=400, detail=f"Invalid portfolio: {str(e)}")
 
-def calculate_age_risk(age: int, policy_type: str) -> float:
-    # Age risk calculation logic
-    base_risk = 0
-    if policy_type == "life":
-        if age > 60:
-            base_risk = 40
-        elif age > 40:
-            base_risk = 20
-    elif policy_type == "health":
-        if age > 50:
-            base_risk = 35
-        elif age > 30:
-            base_risk = 15
-    return base_risk
-
-def assess_occupation_risk(occupation: str) -> float:
-    risk_scores = {
-        # High Risk Occupations
-        "construction_worker": 80,
-        "professional_athlete": 75,
-        "miner": 85,
-        "firefighter": 70,
-        "police_officer": 70,
-        "cab_driver": 70,
-        "pilot": 65,
-
-        # Medium Risk Occupations
-        "nurse": 40,
-        "factory_worker": 35,
-        "chef": 30,
-        
-        # Low Risk Occupations
-        "teacher": 10,
-        "accountant": 10,
-        "software_engineer": 10,
-        "receptionist": 10
-    }
+    return StreamingResponse(stream_portfolio_assessment(first_chunk, chunks, body), media_type = "application/x-ndjson")
 
-    # Industry-specific modifiers
-    industry_multipliers = {
-        "oil_and_gas": 1.3,
-        "mining": 1.4,
-        "healthcare": 1.1,
-        "technology": 0.8,
-        "education": 0.9
-    }
+async def spool_request_body(request: Request) -> IO[bytes]:
+    """
+    The request body in a temporary file, read as it arrives: kept in memory up to
+    PORTFOLIO_SPOOL_BYTES and on disk beyond that, up to PORTFOLIO_MAX_BYTES
+    """
+    body = tempfile.SpooledTemporaryFile(max_size = PORTFOLIO_SPOOL_BYTES)
+    size = 0
+    try:
+        async for data in request.stream():
+            size += len(data)
+            if size > PORTFOLIO_MAX_BYTES:
+                raise HTTPException(status_code=413, detail=f"Portfolio is larger than {PORTFOLIO_MAX_BYTES} bytes")
+            if size > PORTFOLIO_SPOOL_BYTES:
+                await asyncio.to_thread(body.write, data)  # Spilled to disk
+            else:
+                body.write(data)
+        body.seek(0)
+        return body
+    except BaseException:
+        body.close()
+        raise
 
-    base_score = risk_scores.get(occupation.lower(), 30) # Default Score if occupation unknown
-    return base_score
+def read_portfolio(body: IO[bytes], content_type: str) -> Iterator[dict]:
+    """
+    Decode a portfolio payload into NumPy columns, PORTFOLIO_CHUNK_SIZE policies at a
+    time. CSV and Parquet are read a chunk at a time; columnar JSON is parsed whole.
+    """
+    if content_type in PORTFOLIO_CSV_TYPES:
+        import pandas as pd
 
-def assess_credit_risk(credit_score: int) -> float:
-    # Credit score bands and associated risk scores
-    if credit_score >= 800:
-        base_risk = 10  # Excellent
-    elif credit_score >= 740:
-        base_risk = 20  # Very Good
-    elif credit_score >= 670:
-        base_risk = 40  # Good
-    elif credit_score >= 580:
-        base_risk = 70  # Fair
+        with pd.read_csv(body, dtype = {"policy_id": str, "customer_id": str}, chunksize = PORTFOLIO_CHUNK_SIZE) as frames:
+            for frame in frames:
+                yield frame_columns(frame)
+    elif content_type in PORTFOLIO_PARQUET_TYPES:
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(body).iter_batches(batch_size = PORTFOLIO_CHUNK_SIZE):
+            yield frame_columns(batch.to_pandas())
     else:
-        base_risk = 90  # Poor
-        
-    # Additional risk factors
-    risk_modifiers = {
-        "recent_bankruptcy": 50,
-        "multiple_credit_inquiries": 20,
-        "high_credit_utilization": 30,
-        "missed_payments": 40,
-        "account_age": -10  # Negative modifier for long-standing accounts
+        portfolio = PortfolioColumns.model_validate_json(body.read())
+        raw = portfolio.model_dump()
+        if raw["credit_score"] is None:
+            raw["credit_score"] = [None] * len(portfolio.policy_id)
+        columns = portfolio_columns(raw)
+        for offset in range(0, len(columns["policy_id"]), PORTFOLIO_CHUNK_SIZE):
+            yield {name: column[offset:offset + PORTFOLIO_CHUNK_SIZE] for name, column in columns.items()}
+
+def frame_columns(frame) -> dict:
+    if "credit_score" not in frame:
+        frame["credit_score"] = np.nan
+    raw = {name: frame[name].to_numpy() for name in PORTFOLIO_COLUMNS}
+    raw["industry"] = frame["industry"].to_numpy() if "industry" in frame else None
+    return portfolio_columns(raw)
+
+def portfolio_columns(raw: dict) -> dict:
+    lengths = {len(raw[name]) for name in PORTFOLIO_COLUMNS}
+    if raw["industry"] is not None:
+        lengths.add(len(raw["industry"]))
+    if len(lengths) != 1:
+        raise ValueError("All columns must have the same length")
+
+    columns = {
+        "policy_id": np.asarray(raw["policy_id"], dtype = object),
+        "customer_id": np.asarray(raw["customer_id"], dtype = object),
+        "policy_type": np.asarray(raw["policy_type"], dtype = object),
+        "coverage_amount": np.asarray(raw["coverage_amount"], dtype = np.float64),
+        "customer_age": np.asarray(raw["customer_age"], dtype = np.int64),
+        "occupation": np.asarray(raw["occupation"], dtype = object).astype(str).astype(object),
+        "credit_score": np.array([np.nan if c is None else c for c in raw["credit_score"]], dtype = np.float64)
     }
-    
-    return base_risk
+    if raw["industry"] is not None:
+        columns["industry"] = np.array([i if isinstance(i, str) else None for i in raw["industry"]], dtype = object)
+    return columns
+
+async def stream_portfolio_assessment(chunk: Optional[dict], chunks: Iterator[dict], body: IO[bytes]):
+    """Score the portfolio chunk by chunk as it is read, yielding NDJSON rows and a final summary"""
+    count = 0
+    assessment_date = datetime.now(timezone.utc).isoformat()
+    level_counts = np.zeros(len(RISK_LEVELS), dtype = np.int64)
+    score_counts = np.zeros(len(PORTFOLIO_SCORE_BINS) - 1, dtype = np.int64)
+    start_time = time.perf_counter()
+
+    try:
+        while chunk is not None:
+            text, scores, level_index, chunk_score_counts = await score_portfolio_chunk(chunk)
+            count += len(scores)
+            level_counts += np.bincount(level_index, minlength = len(RISK_LEVELS))
+            score_counts += chunk_score_counts
+            if AUDIT_LOG is not None:
+                await AUDIT_LOG.record_many(
+                    len(scores),
+                    policy_id = chunk["policy_id"].tolist(),
+                    customer_id = chunk["customer_id"].tolist(),
+                    policy_type = chunk["policy_type"].tolist(),
+                    coverage_amount = chunk["coverage_amount"].tolist(),
+                    risk_score = scores.tolist(),
+                    risk_level = [RISK_LEVELS[i][0] for i in level_index.tolist()],
+                    premium_modifier = [RISK_LEVELS[i][2] for i in level_index.tolist()],
+                    source = ["portfolio"] * len(scores)
+                )
+            yield text
+
+            try:
+                chunk = await asyncio.to_thread(next, chunks, None)
+            except PORTFOLIO_ERRORS as e:
+                # The response has started, so a malformed later chunk ends the rows with an error row
+                logging.error(f"Error reading portfolio: {str(e)}")
+                yield json.dumps({"error": f"Invalid portfolio after {count} policies: {str(e)}"}) + "\n"
+                chunk = None
+    finally:
+        chunks.close()
+        body.close()
+
+    RISK_ASSESSMENTS.inc(count)
+    observe(PROCESSING_TIME, time.perf_counter() - start_time)
+    yield json.dumps({"summary": {
+        "policies": count,
+        "assessment_date": assessment_date,
+        "risk_level_counts": {RISK_LEVELS[i][0]: int(n) for i, n in enumerate(level_counts)},
+        "score_histogram": {"bins": PORTFOLIO_SCORE_BINS, "counts": score_counts.tolist()}
+    }}) + "\n"
+
+async def score_portfolio_chunk(chunk: dict) -> tuple:
+    """assess_portfolio_chunk in the scoring executor, or on a worker thread while it is saturated"""
+    try:
+        return await SCORING_EXECUTOR.run(assess_portfolio_chunk, chunk)
+    except ExecutorOverloaded:
+        # Shedding a chunk of a response already under way would cut the portfolio short
+        PORTFOLIO_INLINE_CHUNKS.inc()
+        return await asyncio.to_thread(assess_portfolio_chunk, chunk)
+
+def assess_portfolio_chunk(chunk: dict) -> tuple:
+    """Score one portfolio chunk: (NDJSON rows, risk scores, risk level indexes, score histogram counts)"""
+    scored = score_policy_columns(chunk)
+    level_index = scored["level_index"]
+
+    lines = []
+    for policy_id, score, level, high_coverage in zip(chunk["policy_id"].tolist(), scored["risk_score"].tolist(),
+                                                      level_index.tolist(), scored["high_coverage"].tolist()):
+        name, action, premium_modifier = RISK_LEVELS[level]
+        lines.append(json.dumps({
+            "policy_id": policy_id,
+            "risk_score": score,
+            "risk_factors": ["High Coverage Amount"] if high_coverage else [],
+            "risk_level": name,
+            "recommended_action": action,
+            "premium_modifier": premium_modifier,
+            "assessment_confidence": "HIGH" if score > 90 or score < 10 else "MEDIUM"
+        }))
+    return ("\n".join(lines) + "\n",
+            scored["risk_score"],
+            level_index,
+            np.histogram(scored["risk_score"], bins = PORTFOLIO_SCORE_BINS)[0])
+
+def calculate_age_risk(age: int, policy_type: str) -> float:
+    # Age risk calculation logic, precomputed per policy type and age
+    return scoring_tables.age_risk(age, policy_type)
+
+def assess_occupation_risk(occupation: str, industry: Optional[str] = None) -> float:
+    # Base occupation score with industry-specific modifiers applied
+    return scoring_tables.occupation_risk(occupation.lower(), industry.lower() if industry else None)
+
+def assess_credit_risk(credit_score: int) -> float:
+    # Credit score bands and associated risk scores, precomputed per score
+    return scoring_tables.credit_risk(credit_score)
 
 def calculated_weighted_risk(risk_scores: list[float], weights: dict = None) -> float:
    """
    Calculate weighted risk score considering different risk factors and their importance.
    """
+   # Normalised weights are cached per weight profile
    if weights is None:
-       weights = {
-           "credit_risk": 0.30,
-           "occupation_risk": 0.25,
-           "medical_risk": 0.20,
-           "location_risk": 0.15,
-           "age_risk": 0.10
-       }
-   
-   # Normalise weights if they don't sum to 1
-   weight_sum = sum(weights.values())
-   normalized_weights = {k: v/weight_sum for k, v in weights.items()}
+       normalized_weights = scoring_tables.DEFAULT_NORMALIZED_WEIGHTS
+   else:
+       normalized_weights = scoring_tables.normalized_weights(tuple(weights.items()))
    
    # Calculate weighted sum
-   weighted_sum = sum(score * weight for score, weight in zip(risk_scores, normalized_weights.values()))
+   weighted_sum = sum(score * weight for score, weight in zip(risk_scores, normalized_weights))
    
    return min(100, weighted_sum)  # Cap at 100
 
@@ -211,3 +446,173 @@ def determine_risk_level(risk_score: float) -> dict:
        "assessment_confidence": "HIGH" if risk_score > 90 or risk_score < 10 else "MEDIUM"
    }
 
+async def score_policies_offloaded(policies: List[PolicyData]) -> List[dict]:
+    return await SCORING_EXECUTOR.run(score_policies, policies)
+
+# CPU-bound scoring runs here so the event loop stays free for requests and health checks
+SCORING_EXECUTOR = ScoringExecutor("risk")
+
+@app.on_event("startup")
+async def start_scoring_executor():
+    await SCORING_EXECUTOR.start()
+
+@app.on_event("shutdown")
+async def stop_scoring_executor():
+    SCORING_EXECUTOR.shutdown()
+
+# Per-policy vehicle telematics and home sensor features, fed from the IoT stream when TELEMATICS_SOURCE is set
+# by one worker per task, which shares them with the others
+TELEMATICS_STORE = TelematicsFeatureStore()
+TELEMATICS_CONSUMER = create_consumer(TELEMATICS_STORE, "risk-assessment-service")
+
+@app.on_event("startup")
+async def start_telematics_consumer():
+    if TELEMATICS_CONSUMER is not None:
+        await TELEMATICS_CONSUMER.start()
+
+@app.on_event("shutdown")
+async def stop_telematics_consumer():
+    if TELEMATICS_CONSUMER is not None:
+        await TELEMATICS_CONSUMER.stop()
+
+# Every risk level is recorded for compliance when AUDIT_STORE is set
+AUDIT_LOG = create_audit_log("risk-assessment", {
+    "policy_id": "string",
+    "customer_id": "string",
+    "policy_type": "string",
+    "coverage_amount": "float64",
+    "risk_score": "float64",
+    "risk_level": "string",
+    "premium_modifier": "float64",
+    "usage_premium_modifier": "float64",
+    "risk_factors": "list<string>",
+    "source": "string"
+})
+
+async def audit_risk_decision(policy: PolicyData, response: dict):
+    if AUDIT_LOG is None:
+        return
+    pricing = response.get("usage_based_pricing")
+    await AUDIT_LOG.record(
+        policy_id = policy.policy_id,
+        customer_id = policy.customer_id,
+        policy_type = policy.policy_type,
+        coverage_amount = policy.coverage_amount,
+        risk_score = response["risk_score"],
+        risk_level = response["risk_level"]["risk_level"],
+        premium_modifier = response["risk_level"]["premium_modifier"],
+        usage_premium_modifier = pricing["premium_modifier"] if pricing else None,
+        risk_factors = response["risk_factors"],
+        source = "assess"
+    )
+
+@app.on_event("startup")
+async def start_audit_log():
+    if AUDIT_LOG is not None:
+        await AUDIT_LOG.start()
+
+@app.on_event("shutdown")
+async def flush_audit_log():
+    if AUDIT_LOG is not None:
+        await AUDIT_LOG.stop()
+
+# Usage-based pricing thresholds
+HIGH_ANNUAL_MILEAGE = 15000
+LOW_ANNUAL_MILEAGE = 5000
+HARSH_BRAKING_PER_100MI = 2.0
+
+# Concurrent assess_risk requests are scored together
+ASSESS_BATCHER = create_batcher("risk_assess", score_policies_offloaded)
+
+# Vectorized equivalents of the scoring functions above, used for batches and portfolios.
+# They read the same precomputed tables so results match the per-policy path.
+
+# Ordered MINIMAL to CRITICAL, matching determine_risk_level
+RISK_LEVEL_BANDS = [25, 45, 65, 80]
+RISK_LEVELS = [
+    ("MINIMAL", "Fast-track approval possible.", 0.9),
+    ("LOW", "Standard process. Regular monitoring.", 1.0),
+    ("MEDIUM", "Standard review process. May require additional documentation.", 1.25),
+    ("HIGH", "Detailed review needed. Consider premium loading.", 1.75),
+    ("CRITICAL", "Immediate review required. Consider denial or specialist assessment.", 2.5),
+]
+
+def calculate_age_risk_vectorized(ages: np.ndarray, policy_types: np.ndarray) -> np.ndarray:
+    unique, inverse = np.unique(policy_types, return_inverse = True)
+    other_row = len(scoring_tables.AGE_POLICY_TYPES)
+    rows = np.array([scoring_tables.AGE_POLICY_TYPE_ROWS.get(t, other_row) for t in unique.tolist()], dtype = np.int64)
+    return scoring_tables.AGE_RISK_ARRAY[rows[inverse], np.clip(ages, 0, scoring_tables.MAX_AGE)]
+
+def assess_occupation_risk_vectorized(occupations: np.ndarray, industries: Optional[np.ndarray] = None) -> np.ndarray:
+    if industries is None:
+        # Score each distinct occupation once, then broadcast back to the rows
+        unique, inverse = np.unique(occupations, return_inverse = True)
+        return np.array([assess_occupation_risk(o) for o in unique.tolist()], dtype = np.float64)[inverse]
+    return np.fromiter((assess_occupation_risk(o, i) for o, i in zip(occupations.tolist(), industries.tolist())),
+                       dtype = np.float64, count = len(occupations))
+
+def assess_credit_risk_vectorized(credit_scores: np.ndarray) -> np.ndarray:
+    clipped = np.clip(np.nan_to_num(credit_scores), scoring_tables.MIN_CREDIT_SCORE, scoring_tables.MAX_CREDIT_SCORE)
+    return scoring_tables.CREDIT_RISK_ARRAY[clipped.astype(np.int64) - scoring_tables.MIN_CREDIT_SCORE]
+
+def score_policy_columns(columns: dict) -> dict:
+    """
+    Score policy columns. Weights are applied by position in the same order as
+    score_policy builds its risk_scores list, so a missing coverage or credit
+    factor shifts the later factors onto the next weight.
+    """
+    high_coverage = columns["coverage_amount"] > 1000000
+    credit_scores = columns["credit_score"]
+    has_credit = ~np.isnan(credit_scores) & (credit_scores != 0)
+
+    age_risk = calculate_age_risk_vectorized(columns["customer_age"], columns["policy_type"])
+    occupation_risk = assess_occupation_risk_vectorized(columns["occupation"], columns.get("industry"))
+    credit_risk = assess_credit_risk_vectorized(credit_scores)
+
+    w = scoring_tables.DEFAULT_NORMALIZED_WEIGHTS
+    weighted_sum = 0 + age_risk * w[0]
+    weighted_sum = weighted_sum + np.where(high_coverage, 30 * w[1], 0.0)
+    weighted_sum = weighted_sum + occupation_risk * np.where(high_coverage, w[2], w[1])
+    weighted_sum = weighted_sum + np.where(has_credit, credit_risk * np.where(high_coverage, w[3], w[2]), 0.0)
+    risk_score = np.minimum(100, weighted_sum)
+
+    return {
+        "risk_score": risk_score,
+        "high_coverage": high_coverage,
+        "level_index": np.digitize(risk_score, RISK_LEVEL_BANDS)
+    }
+
+# Portfolio endpoint settings
+PORTFOLIO_CHUNK_SIZE = 5000
+PORTFOLIO_SCORE_BINS = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+PORTFOLIO_COLUMNS = ("policy_id", "customer_id", "policy_type", "coverage_amount", "customer_age", "occupation", "credit_score")
+PORTFOLIO_CSV_TYPES = ("text/csv", "application/csv")
+PORTFOLIO_PARQUET_TYPES = ("application/vnd.apache.parquet", "application/x-parquet", "application/parquet")
+# Decoding failures of a portfolio payload, reported as a 400 or, once streaming, an error row
+PORTFOLIO_ERRORS = (ValueError, KeyError, ValidationError, OSError)
+# Bodies are kept in memory up to PORTFOLIO_SPOOL_BYTES and spill to disk beyond that
+PORTFOLIO_SPOOL_BYTES = int(os.getenv("PORTFOLIO_SPOOL_BYTES", str(8 * 1024 * 1024)))
+PORTFOLIO_MAX_BYTES = int(os.getenv("PORTFOLIO_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+def preload_portfolio_readers():
+    """Import the CSV and Parquet readers read_portfolio would otherwise import on its first call"""
+    import pandas
+    import pyarrow.parquet
+
+def warm_scoring_path():
+    """Score a synthetic policy once so the first request doesn't pay NumPy first-call costs"""
+    # Bypasses score_policies so the warm-up isn't counted in scoring metrics
+    score_policy_columns({
+        "policy_type": np.array(["auto"], dtype = object),
+        "coverage_amount": np.array([100000.0]),
+        "customer_age": np.array([40], dtype = np.int64),
+        "occupation": np.array(["engineer"], dtype = object),
+        "credit_score": np.array([700.0]),
+        "industry": None
+    })
+
+STARTUP.step("portfolio_readers", preload_portfolio_readers)
+if AUDIT_LOG is not None:
+    STARTUP.step("audit_writer", warm_parquet_writer, preload = False)
+STARTUP.step("scoring", warm_scoring_path, preload = False)
+STARTUP.finish_imports(app)
@@ -0,0 +1,125 @@
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Occupation base risk scores
+OCCUPATION_RISK_SCORES = {
+    # High Risk Occupations
+    "construction_worker": 80,
+    "professional_athlete": 75,
+    "miner": 85,
+    "firefighter": 70,
+    "police_officer": 70,
+    "cab_driver": 70,
+    "pilot": 65,
+
+    # Medium Risk Occupations
+    "nurse": 40,
+    "factory_worker": 35,
+    "chef": 30,
+
+    # Low Risk Occupations
+    "teacher": 10,
+    "accountant": 10,
+    "software_engineer": 10,
+    "receptionist": 10
+}
+DEFAULT_OCCUPATION_RISK = 30  # Default Score if occupation unknown
+
+# Industry-specific modifiers
+INDUSTRY_MULTIPLIERS = {
+    "oil_and_gas": 1.3,
+    "mining": 1.4,
+    "healthcare": 1.1,
+    "technology": 0.8,
+    "education": 0.9
+}
+
+# Additional credit risk factors, not yet supplied with policy data
+CREDIT_RISK_MODIFIERS = {
+    "recent_bankruptcy": 50,
+    "multiple_credit_inquiries": 20,
+    "high_credit_utilization": 30,
+    "missed_payments": 40,
+    "account_age": -10  # Negative modifier for long-standing accounts
+}
+
+DEFAULT_WEIGHTS = {
+    "credit_risk": 0.30,
+    "occupation_risk": 0.25,
+    "medical_risk": 0.20,
+    "location_risk": 0.15,
+    "age_risk": 0.10
+}
+
+# Dense table ranges. Every band threshold lies inside these ranges, so clamping
+# values outside them gives the same result as evaluating the bands directly.
+MIN_CREDIT_SCORE, MAX_CREDIT_SCORE = 300, 850
+MAX_AGE = 120
+AGE_POLICY_TYPES = ("life", "health")
+
+def credit_band_risk(credit_score: int) -> int:
+    # Credit score bands and associated risk scores
+    if credit_score >= 800:
+        return 10  # Excellent
+    elif credit_score >= 740:
+        return 20  # Very Good
+    elif credit_score >= 670:
+        return 40  # Good
+    elif credit_score >= 580:
+        return 70  # Fair
+    return 90  # Poor
+
+def age_band_risk(age: int, policy_type: str) -> int:
+    if policy_type == "life":
+        if age > 60:
+            return 40
+        elif age > 40:
+            return 20
+    elif policy_type == "health":
+        if age > 50:
+            return 35
+        elif age > 30:
+            return 15
+    return 0
+
+# Credit risk indexed by credit_score - MIN_CREDIT_SCORE
+CREDIT_RISK_TABLE = [credit_band_risk(score) for score in range(MIN_CREDIT_SCORE, MAX_CREDIT_SCORE + 1)]
+CREDIT_RISK_ARRAY = np.array(CREDIT_RISK_TABLE, dtype = np.int64)
+
+# Age risk indexed by [policy type row][age]; the last row is for other policy types
+AGE_RISK_TABLE = {policy_type: [age_band_risk(age, policy_type) for age in range(MAX_AGE + 1)]
+                  for policy_type in AGE_POLICY_TYPES}
+AGE_RISK_ARRAY = np.array([AGE_RISK_TABLE[t] for t in AGE_POLICY_TYPES] + [[0] * (MAX_AGE + 1)], dtype = np.int64)
+AGE_POLICY_TYPE_ROWS = {policy_type: row for row, policy_type in enumerate(AGE_POLICY_TYPES)}
+
+def credit_risk(credit_score: int) -> int:
+    return CREDIT_RISK_TABLE[min(max(credit_score, MIN_CREDIT_SCORE), MAX_CREDIT_SCORE) - MIN_CREDIT_SCORE]
+
+def age_risk(age: int, policy_type: str) -> int:
+    table = AGE_RISK_TABLE.get(policy_type)
+    if table is None:
+        return 0
+    return table[min(max(age, 0), MAX_AGE)]
+
+@lru_cache(maxsize = 4096)
+def occupation_risk(occupation: str, industry: Optional[str] = None) -> float:
+    """Occupation score with the multiplier of the stated industry applied, capped at 100"""
+    base_score = OCCUPATION_RISK_SCORES.get(occupation, DEFAULT_OCCUPATION_RISK)
+    multiplier = INDUSTRY_MULTIPLIERS.get(industry, 1.0)
+    return min(100, base_score * multiplier)
+
+@lru_cache(maxsize = 64)
+def normalized_weights(profile: Tuple[Tuple[str, float], ...]) -> Tuple[float, ...]:
+    """Normalized weights for a weight profile, in the profile's order"""
+    weight_sum = sum(weight for _, weight in profile)
+    return tuple(weight/weight_sum for _, weight in profile)
+
+DEFAULT_WEIGHT_PROFILE = tuple(DEFAULT_WEIGHTS.items())
+DEFAULT_NORMALIZED_WEIGHTS = normalized_weights(DEFAULT_WEIGHT_PROFILE)
+
+# Warm the score cache for every known combination
+for _occupation in OCCUPATION_RISK_SCORES:
+    for _industry in (None, *INDUSTRY_MULTIPLIERS):
+        occupation_risk(_occupation, _industry)
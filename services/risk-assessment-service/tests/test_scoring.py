@@ -0,0 +1,104 @@
+import asyncio
+import io
+import json
+import random
+
+import httpx
+import numpy as np
+import pytest
+
+import app
+import scoring_tables
+from insurance_common.executor import ExecutorOverloaded
+
+OCCUPATIONS = [*scoring_tables.OCCUPATION_RISK_SCORES, "astronaut", "Teacher"]
+INDUSTRIES = [None, *scoring_tables.INDUSTRY_MULTIPLIERS, "retail", "Mining"]
+
+def random_policies(count: int) -> list:
+    generator = random.Random(7)
+    return [app.PolicyData(policy_id = f"POL-{i}", customer_id = f"CUST-{i}",
+                           policy_type = generator.choice(["life", "health", "auto", "home"]),
+                           coverage_amount = generator.choice([50000.0, 1000000.0, 1000000.01, 2500000.0]),
+                           customer_age = generator.randint(-5, 130), occupation = generator.choice(OCCUPATIONS),
+                           credit_score = generator.choice([None, 0, 250, 579, 580, 669, 740, 799, 800, 900]),
+                           industry = generator.choice(INDUSTRIES))
+            for i in range(count)]
+
+def test_vectorized_scores_match_single_policy_scores():
+    policies = random_policies(500)
+    singles = [app.score_policy(policy) for policy in policies]
+    batch = app.score_policies(policies)
+
+    for single, batched in zip(singles, batch):
+        assert batched["policy_id"] == single["policy_id"]
+        assert batched["risk_score"] == pytest.approx(single["risk_score"])
+        assert batched["risk_factors"] == single["risk_factors"]
+        assert batched["risk_level"] == single["risk_level"]
+
+def portfolio_json(policies: list) -> bytes:
+    return app.PortfolioColumns(
+        policy_id = [p.policy_id for p in policies], customer_id = [p.customer_id for p in policies],
+        policy_type = [p.policy_type for p in policies], coverage_amount = [p.coverage_amount for p in policies],
+        customer_age = [p.customer_age for p in policies], occupation = [p.occupation for p in policies],
+        credit_score = [p.credit_score for p in policies], industry = [p.industry for p in policies]
+    ).model_dump_json().encode()
+
+def portfolio_csv(policies: list) -> bytes:
+    lines = ["policy_id,customer_id,policy_type,coverage_amount,customer_age,occupation,credit_score,industry"]
+    lines += [f"{p.policy_id},{p.customer_id},{p.policy_type},{p.coverage_amount},{p.customer_age},{p.occupation},"
+              f"{'' if p.credit_score is None else p.credit_score},{p.industry or ''}" for p in policies]
+    return ("\n".join(lines) + "\n").encode()
+
+@pytest.mark.parametrize("content_type, encode", [("application/json", portfolio_json), ("text/csv", portfolio_csv)])
+def test_portfolio_chunk_scores_match_single_policy_scores(monkeypatch, content_type, encode):
+    monkeypatch.setattr(app, "PORTFOLIO_CHUNK_SIZE", 64)
+    policies = random_policies(200)
+
+    chunks = list(app.read_portfolio(io.BytesIO(encode(policies)), content_type))
+    assert [len(chunk["policy_id"]) for chunk in chunks] == [64, 64, 64, 8]
+    scores = np.concatenate([app.assess_portfolio_chunk(chunk)[1] for chunk in chunks])
+    np.testing.assert_allclose(scores, [app.score_policy(p)["risk_score"] for p in policies])
+
+def post_portfolio(body: bytes, content_type: str) -> httpx.Response:
+    async def run():
+        async with httpx.AsyncClient(transport = httpx.ASGITransport(app = app.app), base_url = "http://test") as client:
+            return await client.post("/app/v1/assess/portfolio", content = body, headers = {"content-type": content_type})
+
+    return asyncio.run(run())
+
+def test_saturated_executor_scores_portfolio_chunks_on_a_thread(monkeypatch):
+    async def overloaded(fn, *args):
+        raise ExecutorOverloaded("risk scoring executor is saturated")
+
+    monkeypatch.setattr(app.SCORING_EXECUTOR, "run", overloaded)
+    monkeypatch.setattr(app, "PORTFOLIO_CHUNK_SIZE", 50)
+    response = post_portfolio(portfolio_csv(random_policies(120)), "text/csv")
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["policy_id"] for line in lines[:-1]] == [f"POL-{i}" for i in range(120)]
+    assert lines[-1]["summary"]["policies"] == 120
+
+def test_malformed_portfolio_is_rejected_before_streaming():
+    assert post_portfolio(b'{"policy_id": ["POL-1"]}', "application/json").status_code == 400
+
+def test_malformed_later_chunk_ends_the_stream_with_an_error_row(monkeypatch):
+    monkeypatch.setattr(app, "PORTFOLIO_CHUNK_SIZE", 2)
+    body = portfolio_csv(random_policies(3)) + b"POL-3,CUST-3,auto,1000.0,not-an-age,teacher,700,\n"
+    lines = [json.loads(line) for line in post_portfolio(body, "text/csv").text.splitlines()]
+
+    assert [line.get("policy_id") for line in lines[:2]] == ["POL-0", "POL-1"]
+    assert "error" in lines[2]
+    assert lines[3]["summary"]["policies"] == 2
+
+def test_portfolio_larger_than_the_limit_is_rejected(monkeypatch):
+    monkeypatch.setattr(app, "PORTFOLIO_MAX_BYTES", 100)
+    assert post_portfolio(portfolio_csv(random_policies(10)), "text/csv").status_code == 413
+
+def test_industry_multiplier_applies_only_when_stated():
+    assert app.assess_occupation_risk("miner") == 85
+    assert app.assess_occupation_risk("nurse") == 40
+    assert app.assess_occupation_risk("software_engineer") == 10
+    assert app.assess_occupation_risk("nurse", "healthcare") == pytest.approx(44)
+    assert app.assess_occupation_risk("Miner", "Mining") == 100  # 85 x 1.4, capped
+    assert app.assess_occupation_risk("teacher", "retail") == 10